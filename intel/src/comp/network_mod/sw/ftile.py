@@ -1,5 +1,7 @@
 import nfb
 import time
+import array
+import threading
 
 FTILE_RSFEC_BASES = {25: 0x6000, 50: 0x6200, 100: 0x6600, 200: 0x6E00, 400: 0x7E00}
 # See https://www.intel.com/content/www/us/en/docs/programmable/683023/22-2/ethernet-hard-ip-core-csrs.html
@@ -11,57 +13,372 @@ FEC_CL91        = 2
 FEC_CL134       = 3
 FEC_ETC         = 4
 FEC_MODE_STR    = {0: 'No FEC', 1: 'Firecode (CL 74)', 2: '2:RS(528,514) (Clause 91)', 3: 'RS(544,514) (Clause 134)', 4: 'Ethernet Technology Consortium RS(272,258)', 5: 'Reserved/Unknown', 6: 'Reserved/Unknown',  7: 'Reserved/Unknown'}
+# Registers which are static between resets (read through shadow cache)
+FTILE_STATIC_REGS = {0x100} # Ethernet configuration
+
+
+# DRP bridge registers in MI window
+DRP_DATA        = 0x18010
+DRP_ADDR        = 0x18014
+DRP_CMD         = 0x18018
+# Busy flag of DRP control register (set by command, cleared by DRPRDY).
+# It is used only when calibrate() sees it set and cleared.
+DRP_STATUS      = DRP_CMD
+DRP_BUSY        = 0x80000000
+# Value written to data register before read, read is finished when it is changed
+DRP_SENTINEL    = 0x5a5aa5a5
+# Fixed wait after DRP command (original behaviour)
+DRP_LATENCY     = 0.001
+# Maximal time of one DRP operation
+DRP_TIMEOUT     = 0.1
+# Poll delay starts at minimum and it is doubled up to maximum
+DRP_BACKOFF_MIN = 0.000001
+DRP_BACKOFF_MAX = 0.0001
+
+
+class drp_timeout(TimeoutError):
+    pass
+
+
+class drp_stats():
+    """
+    Latency statistics of DRP operations
+    """
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min   = None
+        self.max   = 0.0
+
+    def add(self, latency):
+        self.count += 1
+        self.total += latency
+        self.min    = latency if self.min is None else min(self.min, latency)
+        self.max    = max(self.max, latency)
+
+    def __str__(self):
+        if self.count == 0:
+            return 'count 0'
+        return f'count {self.count}, avg {self.total / self.count * 1e6:.1f} us, min {self.min * 1e6:.1f} us, max {self.max * 1e6:.1f} us'
+
+
+class drp_shadow():
+    """
+    Shadow copy of DRP registers which are static between resets
+    (configuration/status). Write through transport invalidates written register.
+    """
+    def __init__(self):
+        self.values = {}
+        self.hits   = 0
+        self.misses = 0
+
+    def get(self, addr, page):
+        val = self.values.get((addr, page))
+        if val is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return val
+
+    def put(self, addr, page, val):
+        self.values[(addr, page)] = val
+
+    def invalidate(self, addr=None, page=0):
+        # Without addr all registers are invalidated
+        if addr is None:
+            self.values.clear()
+        else:
+            self.values.pop((addr, page), None)
+
+    def __str__(self):
+        return f'hits {self.hits}, misses {self.misses}, entries {len(self.values)}'
+
+
+class drp_transport():
+    """
+    DRP access through MI window of pcsregs component. End of operation is detected by:
+
+    busy     : busy_mask bits of status register are polled until they are cleared
+    sentinel : data register is set to sentinel before read and polled until it is changed,
+               write waits calibrated latency
+    latency  : fixed latency is waited (DRP_LATENCY), hang cannot be detected
+
+    calibrate() selects the mode. drp_timeout is raised when operation is not finished in timeout.
+    """
+    def __init__(self, comp, latency=DRP_LATENCY, busy_mask=None, status_reg=DRP_STATUS, timeout=DRP_TIMEOUT):
+        self.comp       = comp
+        self.latency    = latency
+        self.busy_mask  = busy_mask
+        self.status_reg = status_reg
+        self.sentinel   = False
+        self.timeout    = timeout
+        self.stats      = {'read': drp_stats(), 'write': drp_stats()}
+        self.timeouts   = 0
+        self.shadow     = drp_shadow()
+        # One operation is in progress, batch is not interleaved with other threads
+        self.lock       = threading.RLock()
+
+    def mode(self):
+        return 'busy' if self.busy_mask is not None else 'sentinel' if self.sentinel else 'latency'
+
+    def fail(self, start):
+        if time.perf_counter() - start > self.timeout:
+            self.timeouts += 1
+            raise drp_timeout(f'DRP operation is not finished after {self.timeout} s')
+
+    def wait(self, start, sentinel=None):
+        """
+        Wait for end of operation started at start. Return value of data
+        register when read with sentinel is finished, None otherwise.
+        """
+        if self.busy_mask is not None:
+            delay = DRP_BACKOFF_MIN
+            while self.comp.read32(self.status_reg) & self.busy_mask:
+                self.fail(start)
+                time.sleep(delay)
+                delay = min(2 * delay, DRP_BACKOFF_MAX)
+            return None
+        if sentinel is None:
+            # Short latency is waited actively, other threads can run meanwhile
+            if self.latency >= DRP_BACKOFF_MAX:
+                time.sleep(self.latency)
+            while time.perf_counter() - start < self.latency:
+                time.sleep(0)
+            return None
+        delay = DRP_BACKOFF_MIN
+        while True:
+            val = self.comp.read32(DRP_DATA)
+            if val != sentinel or time.perf_counter() - start > self.timeout:
+                return val
+            time.sleep(delay)
+            delay = min(2 * delay, DRP_BACKOFF_MAX)
+
+    def op(self, write, addr, page=0, val=0):
+        """
+        Execute one operation, addr is register index. Return read value.
+        """
+        with self.lock:
+            return self.op_locked(write, addr, page, val)
+
+    def op_locked(self, write, addr, page, val):
+        cmd = (page << 4) + write
+        if write:
+            # Write value
+            self.comp.write32(DRP_DATA, val)
+        # Register can have value of sentinel, second try uses inverted sentinel
+        sentinels = (DRP_SENTINEL, ~DRP_SENTINEL & 0xffffffff) if self.sentinel and not write else (None,)
+        for sentinel in sentinels:
+            # Write DRP address
+            self.comp.write32(DRP_ADDR, addr)
+            if sentinel is not None:
+                self.comp.write32(DRP_DATA, sentinel)
+            # Set page & start the operation
+            start = time.perf_counter()
+            self.comp.write32(DRP_CMD, cmd)
+            data = self.wait(start, sentinel)
+            if write:
+                self.stats['write'].add(time.perf_counter() - start)
+                return None
+            # Get the result
+            if data is None:
+                data = self.comp.read32(DRP_DATA)
+            if data != sentinel:
+                self.stats['read'].add(time.perf_counter() - start)
+                return data
+        self.timeouts += 1
+        raise drp_timeout(f'DRP read of {addr:08x} is not finished after {self.timeout} s')
+
+    def read(self, addr, page=0, verbose=False):
+        """
+        Read DRP address (register index, not byte offset)
+        """
+        val = self.op(0, addr, page)
+        if verbose:
+            print('Reading reg {:08x}, page {:d}, cmd {:08x}, value {:08x}'.format(addr, page, page << 4, val))
+        return val
+
+    def read_cached(self, addr, page=0):
+        """
+        Read static DRP address through shadow cache
+        """
+        val = self.shadow.get(addr, page)
+        if val is None:
+            val = self.read(addr, page)
+            self.shadow.put(addr, page, val)
+        return val
+
+    def write(self, addr, val, page=0):
+        """
+        Write DRP address (register index, not byte offset)
+        """
+        self.shadow.invalidate(addr, page)
+        self.op(1, addr, page, val)
+
+    def execute(self, ops):
+        """
+        Execute list of operations (write, addr, page, val) back to back,
+        addr is register index. Return array of values of read operations.
+
+        Operations cannot overlap: bridge_drp passes DRP address and data
+        registers to IP combinationally and keeps select of one operation,
+        so next operation is started when previous one is finished.
+        Address is written for every operation. Every operation waits only
+        until its end is detected (see calibrate()), whole list is executed
+        under transport lock.
+        """
+        result = array.array('I')
+        with self.lock:
+            for (write, addr, page, val) in ops:
+                if write:
+                    self.shadow.invalidate(addr, page)
+                    self.op_locked(1, addr, page, val)
+                else:
+                    result.append(self.op_locked(0, addr, page, 0))
+        return result
+
+    def calibrate(self, addr=0x100 >> 2, page=0, samples=16, margin=2.0):
+        """
+        Select mode of transport. Busy mode is used when busy flag of status
+        register is seen set after command and cleared later. Sentinel mode
+        is used when value written to data register is read back, latency
+        of write is margin times maximal latency of samples reads. Otherwise
+        DRP_LATENCY is waited. Return mode.
+        """
+        self.busy_mask = None
+        self.sentinel  = False
+        self.latency   = DRP_LATENCY
+        self.read(addr, page)
+        # Busy flag
+        self.comp.write32(DRP_ADDR, addr)
+        start = time.perf_counter()
+        self.comp.write32(DRP_CMD, page << 4)
+        busy = self.comp.read32(DRP_STATUS) & DRP_BUSY
+        while self.comp.read32(DRP_STATUS) & DRP_BUSY:
+            if time.perf_counter() - start > self.timeout:
+                # Flag is not busy flag
+                busy = 0
+                break
+        if busy:
+            self.busy_mask = DRP_BUSY
+            self.status_reg = DRP_STATUS
+            return self.mode()
+        # Probe command is finished
+        time.sleep(DRP_LATENCY)
+        # Data register read back
+        for sentinel in (DRP_SENTINEL, ~DRP_SENTINEL & 0xffffffff):
+            self.comp.write32(DRP_DATA, sentinel)
+            if self.comp.read32(DRP_DATA) != sentinel:
+                return self.mode()
+        self.sentinel = True
+        self.latency  = 0
+        latency = 0.0
+        for i in range(samples):
+            start = time.perf_counter()
+            self.read(addr, page)
+            latency = max(latency, time.perf_counter() - start)
+        self.latency = min(DRP_LATENCY, latency * margin)
+        return self.mode()
+
+    def print_stats(self):
+        print(f'DRP mode: {self.mode()}, latency {self.latency * 1e6:.1f} us')
+        for op, stats in self.stats.items():
+            print(f'DRP {op}: {stats}')
+        print(f'DRP timeouts: {self.timeouts}')
+        print(f'DRP shadow: {self.shadow}')
+
+
+# Transport of every DRP window used by drp_* functions
+DRP_TRANSPORTS = {}
+# Window key of component (comp, key), components of one window share transport and shadow
+DRP_WINDOWS    = {}
+DRP_LOCK       = threading.Lock()
+
+def drp_node_key(device, node):
+    """
+    Return key of DRP window of pcsregs node (node.path is path of parent)
+    """
+    return (str(device), node.path.rstrip('/') + '/' + node.name)
+
+def drp_window_set(comp, key):
+    DRP_WINDOWS[id(comp)] = (comp, key)
 
+def drp_window_key(comp):
+    window = DRP_WINDOWS.get(id(comp))
+    return id(comp) if window is None else window[1]
+
+def drp_transport_get(comp):
+    # New transport is calibrated once
+    key = drp_window_key(comp)
+    with DRP_LOCK:
+        if key not in DRP_TRANSPORTS:
+            transport = drp_transport(comp)
+            transport.calibrate()
+            DRP_TRANSPORTS[key] = transport
+        return DRP_TRANSPORTS[key]
+
+def drp_transport_set(comp, transport):
+    DRP_TRANSPORTS[drp_window_key(comp)] = transport
+
+class drp_batch():
+    """
+    List of DRP transactions executed in one call. Addresses are byte
+    offsets like in drp_read/drp_write. Values of reads are returned by
+    execute() in order of queued reads, read64 queues two reads.
+    """
+    def __init__(self, comp):
+        self.transport = drp_transport_get(comp)
+        self.ops = []
+
+    def read(self, reg, page=0):
+        self.ops.append((0, reg >> 2, page, 0))
+
+    def read64(self, reg, page=0):
+        self.read(reg,   page)
+        self.read(reg+4, page)
+
+    def write(self, reg, val, page=0):
+        self.ops.append((1, reg >> 2, page, val))
+
+    def execute(self):
+        ops = self.ops
+        self.ops = []
+        return self.transport.execute(ops)
+
+def drp_join64(values):
+    """
+    Return list of 64 bit values from pairs of low and high words
+    """
+    return [(values[i+1] << 32) + values[i] for i in range(0, len(values), 2)]
+
+def drp_split(values, count):
+    """
+    Split list of values to rows of count values
+    """
+    return [list(values[i:i+count]) for i in range(0, len(values), count)]
+
+def drp_shadow_invalidate(comp=None):
+    """
+    Invalidate shadow registers of component or of all components
+    (e.g. after profile swap by DR controller)
+    """
+    for key, transport in DRP_TRANSPORTS.items():
+        if comp is None or key == drp_window_key(comp):
+            transport.shadow.invalidate()
+
+def drp_read_cached(regs, reg, page=0):
+    return drp_transport_get(regs).read_cached(reg >> 2, page)
 
 def drp_read(regs, reg, page=0, verbose=False):
-     reg = reg >> 2
-     cmd = (page << 4) + 0
-     # Write DRP address 
-     regs.write32(0x18014,reg)
-     # Set page & start the operation
-     regs.write32(0x18018, cmd)
-     # Get the result
-     time.sleep(0.001)
-     val = regs.read32(0x18010)
-     if verbose:
-         print('Reading reg {:08x}, page {:d}, cmd {:08x}, value {:08x}'.format(reg, page, cmd, val))
-     return val
+    return drp_transport_get(regs).read(reg >> 2, page, verbose)
 
 def drp_write(comp, reg, val, page=0):
-     reg = reg >> 2
-     cmd = (page << 4) + 1
-     # Write value 
-     comp.write32(0x18010,val)
-     # Write DRP address 
-     comp.write32(0x18014,reg)
-     # Set page & start the operation
-     #print('Writing reg {:08x}, cmd {:08x}'.format(reg, cmd))
-     comp.write32(0x18018, cmd)
-     time.sleep(0.001) # !!!!!!!!!!!!!!!
+    drp_transport_get(comp).write(reg >> 2, val, page)
 
 def drp_read_drc(regs, reg, page=0, verbose=False):
-     cmd = (page << 4) + 0
-     # Write DRP address 
-     regs.write32(0x18014,reg)
-     # Set page & start the operation
-     regs.write32(0x18018, cmd)
-     # Get the result
-     time.sleep(0.001)
-     val = regs.read32(0x18010)
-     if verbose:
-         print('Reading reg {:08x}, page {:d}, cmd {:08x}, value {:08x}'.format(reg, page, cmd, val))
-     return val
+    return drp_transport_get(regs).read(reg, page, verbose)
 
 def drp_write_drc(comp, reg, val, page=0):
-     cmd = (page << 4) + 1
-     # Write value 
-     comp.write32(0x18010,val)
-     # Write DRP address 
-     comp.write32(0x18014,reg)
-     # Set page & start the operation
-     #print('Writing reg {:08x}, cmd {:08x}'.format(reg, cmd))
-     comp.write32(0x18018, cmd)
-     time.sleep(0.001) # !!!!!!!!!!!!!!!     
+    drp_transport_get(comp).write(reg, val, page)
 
 
 def bit(val, b):
@@ -106,42 +423,97 @@ class ftile_rsfec():
         addr = self.base + lane * 0x200 + reg
         drp_write(self.comp, addr, val, 0)
 
+    def addr(self, reg, lane):
+        return self.base + lane * 0x200 + reg
+
     def snapshot(self, lane):
         self.write(0x1e0, 1, lane)
         self.write(0x1e0, 0, lane)
 
     def clear_stats(self):
+        batch = drp_batch(self.comp)
         for lane in range(0, self.lanes):
-            self.write(0x1e0, 0x10, lane)
+            batch.write(self.addr(0x1e0, lane), 0x10)
+        batch.execute()
+
+    def snapshot_all(self, lanes=None):
+        batch = drp_batch(self.comp)
+        for lane in (range(self.lanes) if lanes is None else lanes):
+            batch.write(self.addr(0x1e0, lane), 1)
+            batch.write(self.addr(0x1e0, lane), 0)
+        batch.execute()
+
+    def read_all(self, regs, lanes=None):
+        """
+        Read registers regs of every lane, return list of lanes of values
+        """
+        batch = drp_batch(self.comp)
+        for lane in (range(self.lanes) if lanes is None else lanes):
+            for reg in regs:
+                batch.read(self.addr(reg, lane))
+        return drp_split(batch.execute(), len(regs))
+
+    def read64_all(self, regs, lanes=None, snapshot=False):
+        """
+        Read 64 bit counters regs of every lane, return list of lanes of values.
+        With snapshot the counters of lane are latched before read.
+        """
+        batch = drp_batch(self.comp)
+        for lane in (range(self.lanes) if lanes is None else lanes):
+            if snapshot:
+                batch.write(self.addr(0x1e0, lane), 1)
+                batch.write(self.addr(0x1e0, lane), 0)
+            for reg in regs:
+                batch.read64(self.addr(reg, lane))
+        return drp_split(drp_join64(batch.execute()), len(regs))
 
 class ftile_pma():
-    def __init__(self, pcsregs, lanes = 8):
+    def __init__(self, pcsregs, lanes = 8, log=print):
         self.comp = pcsregs
         self.lanes = lanes
+        # Output of messages (fleet collects them from worker threads)
+        self.log = log
 
     def read(self, reg, lane=0):
+        # Not cached, transceiver index (0xffffc) is read again by every CPI request
         return drp_read(self.comp, reg, lane+1)
 
     def write(self, reg, val, lane=0):
         # Get offset to PCS lane
         drp_write(self.comp, reg, val, lane+1)
 
+    def read_all(self, regs, lanes=None):
+        """
+        Read registers regs of every lane, return list of lanes of values
+        """
+        batch = drp_batch(self.comp)
+        for lane in (range(self.lanes) if lanes is None else lanes):
+            for reg in regs:
+                batch.read(reg, lane+1)
+        return drp_split(batch.execute(), len(regs))
+
+    def write_all(self, reg, val, lanes=None):
+        batch = drp_batch(self.comp)
+        for lane in (range(self.lanes) if lanes is None else lanes):
+            batch.write(reg, val, lane+1)
+        batch.execute()
+
     def cpi_request(self, data, option, lane, opcode):
         #  See https://www.intel.com/content/www/us/en/docs/programmable/683872/22-4-4-3-0/fgt-attribute-access-method.html
         # Get transceiver index 
         index = self.read(0xffffc, lane) ## !!!! Not working after design boot !!! Why???????????????????????????????????????????????????????????????
-        print(f'Phy lane readout {index:08x}')
+        self.log(f'Phy lane readout {index:08x}')
         index &= 0x00000003
         val = (data << 16)  + (option << 12) + (index << 8) + (opcode)
-        print(f'CPI req {lane}, phy lane {index}, value {val:08x}')
+        self.log(f'CPI req {lane}, phy lane {index}, value {val:08x}')
         self.write(0x9003c, val,  lane)
         # poll 0x90040 until bit 14 = 0 and bit 15 = option[3]
         ref = 0x8000 if (option&0x8) else 0x0000
         readout = self.read(0x90040, lane)
-        print(f'CPI status: {readout:08x}')
+        self.log(f'CPI status: {readout:08x}')
         while (readout & 0xC000) != ref:
             readout = self.read(0x90040, lane)
-            print(f'CPI status: {readout:08x}')
+            self.log(f'CPI status: {readout:08x}')
 
     def set_pma_loop(self, enable):
         val = 0x6 if enable else 0x0
@@ -185,25 +557,53 @@ class ftile_pcs():
         addr = self.base + (reg - 0x1000)
         drp_write(self.comp, addr, val, 0)
 
+    def addr(self, reg):
+        return self.base + (reg - 0x1000)
+
     def snapshot(self):
         self.write(0x1000, 3)
         self.write(0x1000, 0)
 
     def clear_stats(self):
+        batch = drp_batch(self.comp)
         # Reset RX stats
-        self.write(0x1278, 1)
-        self.write(0x1278, 0)
+        batch.write(self.addr(0x1278), 1)
+        batch.write(self.addr(0x1278), 0)
         # Reset TX stats
-        self.write(0x1274, 1)
-        self.write(0x1274, 0)
+        batch.write(self.addr(0x1274), 1)
+        batch.write(self.addr(0x1274), 0)
+        batch.execute()
+
+    def read_all(self, regs):
+        batch = drp_batch(self.comp)
+        for reg in regs:
+            batch.read(self.addr(reg))
+        return list(batch.execute())
+
+    def read64_all(self, regs, snapshot=False):
+        """
+        Read 64 bit counters regs, with snapshot the counters are latched before read
+        """
+        batch = drp_batch(self.comp)
+        if snapshot:
+            batch.write(self.addr(0x1000), 3)
+        for reg in regs:
+            batch.read64(self.addr(reg))
+        if snapshot:
+            batch.write(self.addr(0x1000), 0)
+        return drp_join64(batch.execute())
       
 
 class ftile_eth():
 
-    def __init__(self, pcsregs):
+    def __init__(self, pcsregs, window=None, log=print):
+        # window is key of DRP window (drp_node_key), instances of one window share shadow
+        self.log = log
+        if window is not None:
+            drp_window_set(pcsregs, window)
         self.comp = pcsregs
         # Decode Ethernet mode from register 0x100
-        config = drp_read(pcsregs, 0x100, 0)
+        config = self.read(0x100)
         self.lanes = bits(config, 21, 4)
         self.modulation = 'PAM-4' if bit(config, 9) else 'NRZ'
         speed = bits(config, 5, 3)
@@ -217,7 +617,7 @@ class ftile_eth():
             400 if speed == 6 else\
             0
         # Assign PMA
-        self.pma = ftile_pma(pcsregs, self.lanes)
+        self.pma = ftile_pma(pcsregs, self.lanes, log)
         # Assign PCS 
         pcsbase = FTILE_ETH_BASES[self.speed]
         pcslanes = ETH_LANES[self.speed]
@@ -233,20 +633,22 @@ class ftile_eth():
         self.print_config()
 
     def print_config(self):
-        config = drp_read(self.comp, 0x100, 0)
+        config = self.read(0x100)
         fec_mode = bits(config, 10, 3)
         fec_base = 0
         if self.speed in FTILE_RSFEC_BASES:
             fec_base = FTILE_RSFEC_BASES[self.speed]    
-        print(f'\nEth init: config = {config:08x}, speed = {self.speed}, modulation : {self.modulation}, lanes = {self.lanes}, rsfec mode = "{FEC_MODE_STR[fec_mode]}", base = {fec_base:04x}')
+        self.log(f'\nEth init: config = {config:08x}, speed = {self.speed}, modulation : {self.modulation}, lanes = {self.lanes}, rsfec mode = "{FEC_MODE_STR[fec_mode]}", base = {fec_base:04x}')
 
     def read(self, reg):
         #print('Reading Eth reg {:08x}'.format(reg))
+        if reg in FTILE_STATIC_REGS:
+            return drp_read_cached(self.comp, reg, 0)
         return drp_read(self.comp, reg, 0)
 
     def read64(self, reg):
-        lo = drp_read(self.comp, addr,   0)
-        hi = drp_read(self.comp, addr+4, 0)
+        lo = drp_read(self.comp, reg,   0)
+        hi = drp_read(self.comp, reg+4, 0)
         return (hi<<32)+lo
 
     def write(self, reg, val):
@@ -263,10 +665,13 @@ class ftile_eth():
     def set_reset(self):
         self.write(0x108, 6)
         time.sleep(0.5)
+        # Registers could be read while reset was in progress
+        drp_shadow_invalidate(self.comp)
         
     def clr_reset(self):
         self.write(0x108, 0)
         time.sleep(0.5)
+        drp_shadow_invalidate(self.comp)
 
     def pma_loopback(self, enable):
         self.set_rxreset()
@@ -274,12 +679,14 @@ class ftile_eth():
         self.clr_rxreset()
         time.sleep(0.1)
 
-dev = nfb.open(path='0')
-nodes = dev.fdt_get_compatible("netcope,pcsregs")
+if __name__ == '__main__':
+    dev = nfb.open(path='0')
+    nodes = dev.fdt_get_compatible("netcope,pcsregs")
 
-eths = [] 
-for i, node in enumerate(nodes):
-    comp = dev.comp_open(node)
-    eth = ftile_eth(comp)
-    eths.append(eth)
+    eths = []
+    for i, node in enumerate(nodes):
+        comp = dev.comp_open(node)
+        eth = ftile_eth(comp, drp_node_key(0, node))
+        eths.append(eth)
+        drp_transport_get(comp).print_stats()
 
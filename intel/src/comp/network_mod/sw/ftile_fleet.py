@@ -0,0 +1,152 @@
+# ftile_fleet.py: Concurrent operations on F-tile Ethernet ports of all cards
+# Copyright (C) 2022 CESNET z. s. p. o.
+#
+# Every pcsregs node of every nfb device is one port. Operations run in
+# thread pool, operations of ports which share DRP window (same device and
+# node) are serialized by lock of the window. Messages of ports are
+# collected by workers and printed by caller in port order.
+#
+# Counter addresses are not built in, they differ between IP versions.
+# RS-FEC lane counters are given by --rsfec-reg name=offset (offset relative
+# to lane, see CSR map of used IP).
+#
+# Usage: python3 ftile_fleet.py [-d DEVICE ...] [-j THREADS] [--rsfec-reg NAME=OFFSET ...] stats|reset|loopback-on|loopback-off|mode
+
+import argparse
+import glob
+import re
+import threading
+from multiprocessing.pool import ThreadPool
+
+import nfb
+import ftile
+
+FLEET_DEVICES = '/dev/nfb[0-9]*'
+
+
+def fleet_devices():
+    """
+    Return paths of all nfb devices in system
+    """
+    return sorted(glob.glob(FLEET_DEVICES), key=lambda path: int(re.sub(r'\D', '', path)))
+
+
+class fleet_port():
+    def __init__(self, device, index, node, comp, lock):
+        self.device = device
+        self.index  = index
+        self.node   = node
+        self.comp   = comp
+        # Lock of DRP window
+        self.lock   = lock
+        self.eth    = None
+        # Messages of port operations, printed by caller
+        self.messages = []
+
+    def name(self):
+        return f'{self.device}:{self.index}'
+
+
+class ftile_fleet():
+    def __init__(self, devices=None, threads=None):
+        self.devs  = []
+        self.ports = []
+        self.locks = {}
+        for path in (fleet_devices() if devices is None else devices):
+            dev = nfb.open(path=path)
+            self.devs.append(dev)
+            for index, node in enumerate(dev.fdt_get_compatible("netcope,pcsregs")):
+                # Node path is path of parent, key contains node name
+                key  = ftile.drp_node_key(path, node)
+                lock = self.locks.setdefault(key, threading.Lock())
+                comp = dev.comp_open(node)
+                ftile.drp_window_set(comp, key)
+                self.ports.append(fleet_port(path, index, node, comp, lock))
+        self.pool = ThreadPool(threads if threads else max(1, len(self.locks)))
+
+    def task(self, port, op, args):
+        with port.lock:
+            try:
+                if port.eth is None:
+                    port.eth = ftile.ftile_eth(port.comp, ftile.drp_window_key(port.comp), port.messages.append)
+                return (port, op(port.eth, *args))
+            except Exception as e:
+                return (port, e)
+
+    def run(self, op, *args, ports=None):
+        """
+        Run op(eth, *args) on every port concurrently.
+        Return list of (port, result), result is exception when op failed.
+        """
+        results = self.pool.starmap(self.task, [(port, op, args) for port in (self.ports if ports is None else ports)])
+        for port, result in results:
+            for message in port.messages:
+                print(f'{port.name()}: {message.lstrip()}')
+            port.messages.clear()
+        return results
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+
+def fleet_regs(items):
+    """
+    Parse list of "name=address" to dictionary
+    """
+    return {name: int(addr, 0) for name, addr in (item.split('=', 1) for item in items)}
+
+def fleet_stats(eth, regs):
+    """
+    Return dictionary of RS-FEC counters, every counter is list of lanes.
+    regs is dictionary of name: offset of 64 bit lane counter.
+    """
+    if eth.rsfec is None:
+        return {}
+    eth.rsfec.snapshot_all()
+    lanes = eth.rsfec.read64_all(list(regs.values()))
+    return {name: [lane[i] for lane in lanes] for i, name in enumerate(regs)}
+
+def fleet_reset(eth):
+    eth.set_reset()
+    eth.clr_reset()
+
+def fleet_loopback(eth, enable):
+    eth.pma_loopback(enable)
+
+def fleet_mode(eth, mode):
+    eth.pma.set_mode(mode)
+
+
+if __name__ == '__main__':
+    args = argparse.ArgumentParser(description = "Concurrent F-tile port operations")
+    args.add_argument("-d", "--device", action="append", help="nfb device, can be used more times (default all devices)")
+    args.add_argument("-j", "--threads", type=int, default=None, help="number of threads (default number of DRP windows)")
+    args.add_argument("-m", "--mode", type=lambda x: int(x, 0), default=0x14, help="PMA media mode for mode operation")
+    args.add_argument("--rsfec-reg", action="append", default=[], help="64 bit RS-FEC lane counter as name=offset from CSR map of used IP (stats operation)")
+    args.add_argument("operation", choices=["stats", "reset", "loopback-on", "loopback-off", "mode"])
+    arguments = args.parse_args()
+    if arguments.operation == "stats" and not arguments.rsfec_reg:
+        args.error("stats operation requires --rsfec-reg")
+
+    fleet = ftile_fleet(arguments.device, arguments.threads)
+    if arguments.operation == "stats":
+        results = fleet.run(fleet_stats, fleet_regs(arguments.rsfec_reg))
+    elif arguments.operation == "reset":
+        results = fleet.run(fleet_reset)
+    elif arguments.operation == "loopback-on":
+        results = fleet.run(fleet_loopback, True)
+    elif arguments.operation == "loopback-off":
+        results = fleet.run(fleet_loopback, False)
+    else:
+        results = fleet.run(fleet_mode, arguments.mode)
+    fleet.close()
+
+    for port, result in results:
+        if isinstance(result, Exception):
+            print(f'{port.name()}: error {result}')
+        elif isinstance(result, dict):
+            for name, lanes in result.items():
+                print(f'{port.name()}: {name} ' + ' '.join(str(val) for val in lanes))
+        else:
+            print(f'{port.name()}: done')
@@ -0,0 +1,246 @@
+# ftile_stats.py: Collector of PCS and RS-FEC counters of all F-tile ports
+# Copyright (C) 2022 CESNET z. s. p. o.
+#
+# PCS counters of every port and RS-FEC counters of every lane are
+# periodically latched (snapshot) and read, one DRP batch for PCS and one
+# for every RS-FEC lane. Delta and rate to previous poll is computed and
+# samples are kept in bounded history. Last poll is exported in Prometheus
+# text format (file or unix socket, every connection gets actual text)
+# and as JSON lines (appended to file, streamed to clients of unix socket).
+#
+# Counter addresses are not built in, they differ between IP versions.
+# PCS counters are given by --pcs-reg name=address and RS-FEC lane counters
+# by --rsfec-reg name=offset (see CSR map of used IP).
+#
+# Polling budget limits number of DRP operations per second. Every batch
+# takes its operations from token bucket shared by all ports, so DRP
+# traffic of collector is spread over poll interval.
+#
+# Usage: python3 ftile_stats.py [-d DEVICE ...] [-i INTERVAL] [--budget OPS] [--prom FILE] [--jsonl FILE]
+#                               [--pcs-reg NAME=ADDRESS ...] [--rsfec-reg NAME=OFFSET ...] [--socket PATH] [--jsonl-socket PATH]
+
+import argparse
+import collections
+import json
+import os
+import socket
+import threading
+import time
+
+import ftile
+import ftile_fleet
+
+STATS_INTERVAL     = 1.0
+STATS_HISTORY      = 4096
+# DRP operations per second
+STATS_BUDGET       = 10000
+# Maximal burst of DRP operations in seconds of budget
+STATS_BURST        = 0.01
+# Send timeout of JSON lines client, slow client is disconnected
+STATS_SEND_TIMEOUT = 0.1
+
+
+class stats_budget():
+    """
+    Token bucket of DRP operations shared by threads, rate 0 is unlimited
+    """
+    def __init__(self, rate):
+        self.rate     = rate
+        self.capacity = rate * STATS_BURST
+        self.tokens   = self.capacity
+        self.last     = time.monotonic()
+        self.lock     = threading.Lock()
+
+    def take(self, ops):
+        # Operations are reserved and caller waits until they are available
+        if not self.rate:
+            return
+        with self.lock:
+            now         = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate) - ops
+            self.last   = now
+            wait        = -self.tokens / self.rate
+        if wait > 0:
+            time.sleep(wait)
+
+
+def stats_read(eth, pcs_regs, rsfec_regs, budget):
+    """
+    Return dictionary of counters of port, key is (counter, lane)
+    """
+    values = {}
+    if pcs_regs:
+        budget.take(2 + 2 * len(pcs_regs))
+        for name, val in zip(pcs_regs, eth.pcs.read64_all(list(pcs_regs.values()), snapshot=True)):
+            values[(name, 0)] = val
+    if rsfec_regs and eth.rsfec is not None:
+        for lane in range(eth.rsfec.lanes):
+            budget.take(2 + 2 * len(rsfec_regs))
+            lane_values = eth.rsfec.read64_all(list(rsfec_regs.values()), [lane], snapshot=True)[0]
+            for name, val in zip(rsfec_regs, lane_values):
+                values[(name, lane)] = val
+    return values
+
+
+class stats_collector():
+    def __init__(self, fleet, interval=STATS_INTERVAL, budget=STATS_BUDGET, history=STATS_HISTORY,
+                 pcs_regs=None, rsfec_regs=None):
+        self.fleet      = fleet
+        self.interval   = interval
+        self.budget     = stats_budget(budget)
+        # Counters have no default, their addresses depend on IP version
+        self.pcs_regs   = {} if pcs_regs is None else pcs_regs
+        self.rsfec_regs = {} if rsfec_regs is None else rsfec_regs
+        # Samples (time, port, counter, lane, value, delta, rate)
+        self.history    = collections.deque(maxlen=history)
+        self.last       = {}
+        self.samples    = []
+        self.lock       = threading.Lock()
+        # Connections of JSON lines socket
+        self.clients    = []
+
+    def drp_ops(self):
+        ops = 0
+        for port in self.fleet.ports:
+            transport = ftile.drp_transport_get(port.comp)
+            ops += transport.stats['read'].count + transport.stats['write'].count
+        return ops
+
+    def poll(self):
+        """
+        Read counters of all ports, return number of DRP operations
+        """
+        ops = self.drp_ops()
+        now = time.time()
+        samples = []
+        for port, values in self.fleet.run(stats_read, self.pcs_regs, self.rsfec_regs, self.budget):
+            if isinstance(values, Exception):
+                print(f'{port.name()}: error {values}')
+                continue
+            for (name, lane), val in values.items():
+                key  = (port.name(), name, lane)
+                prev = self.last.get(key)
+                if prev is None:
+                    delta, rate = 0, 0.0
+                else:
+                    # Counter was cleared
+                    delta = val - prev[1] if val >= prev[1] else val
+                    rate  = delta / (now - prev[0]) if now > prev[0] else 0.0
+                self.last[key] = (now, val)
+                samples.append((now, port, name, lane, val, delta, rate))
+        with self.lock:
+            self.samples = samples
+            self.history.extend(samples)
+            clients      = list(self.clients)
+        if clients:
+            data = self.jsonl().encode()
+            for conn in clients:
+                try:
+                    conn.sendall(data)
+                except OSError:
+                    with self.lock:
+                        self.clients.remove(conn)
+                    conn.close()
+        return self.drp_ops() - ops
+
+    def prometheus(self):
+        with self.lock:
+            samples = self.samples
+        # Samples of one metric have to be together
+        metrics = collections.defaultdict(list)
+        for (now, port, name, lane, val, delta, rate) in samples:
+            labels = f'device="{port.device}",port="{port.index}",lane="{lane}"'
+            metrics[(f'ftile_{name}_total', 'counter')].append(f'ftile_{name}_total{{{labels}}} {val} {int(now * 1000)}')
+            metrics[(f'ftile_{name}_rate', 'gauge')].append(f'ftile_{name}_rate{{{labels}}} {rate:.3f} {int(now * 1000)}')
+        lines = []
+        for (metric, kind), values in metrics.items():
+            lines.append(f'# TYPE {metric} {kind}')
+            lines.extend(values)
+        return '\n'.join(lines) + '\n'
+
+    def jsonl(self):
+        with self.lock:
+            samples = self.samples
+        return ''.join(json.dumps({'time': now, 'device': port.device, 'port': port.index, 'counter': name, 'lane': lane,
+                                   'value': val, 'delta': delta, 'rate': rate}) + '\n'
+                       for (now, port, name, lane, val, delta, rate) in samples)
+
+    def write_prometheus(self, file_name):
+        # Reader never sees partially written file
+        with open(file_name + '.tmp', 'w') as f:
+            f.write(self.prometheus())
+        os.replace(file_name + '.tmp', file_name)
+
+    def serve(self, path, fmt='prom'):
+        """
+        Serve unix socket in background thread. prom: every connection gets
+        actual Prometheus text, jsonl: samples of every poll are sent to
+        connected clients as JSON lines.
+        """
+        if os.path.exists(path):
+            os.unlink(path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(path)
+        server.listen()
+        def accept():
+            while True:
+                conn, addr = server.accept()
+                if fmt == 'jsonl':
+                    # Poll is not blocked by slow client
+                    conn.settimeout(STATS_SEND_TIMEOUT)
+                    with self.lock:
+                        self.clients.append(conn)
+                    continue
+                with conn:
+                    conn.sendall(self.prometheus().encode())
+        threading.Thread(target=accept, daemon=True).start()
+        return server
+
+    def run(self, polls=None, prom=None, jsonl=None):
+        count = 0
+        while polls is None or count < polls:
+            start = time.monotonic()
+            self.poll()
+            if prom is not None:
+                self.write_prometheus(prom)
+            if jsonl is not None:
+                with open(jsonl, 'a') as f:
+                    f.write(self.jsonl())
+            count += 1
+            # DRP traffic is limited by budget during poll
+            wait = self.interval - (time.monotonic() - start)
+            if wait > 0 and (polls is None or count < polls):
+                time.sleep(wait)
+
+
+if __name__ == '__main__':
+    args = argparse.ArgumentParser(description = "F-tile PCS and RS-FEC counter collector")
+    args.add_argument("-d", "--device", action="append", help="nfb device, can be used more times (default all devices)")
+    args.add_argument("-j", "--threads", type=int, default=None, help="number of threads (default number of DRP windows)")
+    args.add_argument("-i", "--interval", type=float, default=STATS_INTERVAL, help="poll interval in seconds")
+    args.add_argument("-n", "--polls", type=int, default=None, help="number of polls (default infinite)")
+    args.add_argument("--budget", type=int, default=STATS_BUDGET, help="maximal DRP operations per second, 0 is unlimited")
+    args.add_argument("--history", type=int, default=STATS_HISTORY, help="number of samples kept in memory")
+    args.add_argument("--pcs-reg", action="append", default=[], help="64 bit PCS counter as name=address from CSR map of used IP, can be used more times (default none)")
+    args.add_argument("--rsfec-reg", action="append", default=[], help="64 bit RS-FEC lane counter as name=offset from CSR map of used IP, can be used more times (default none)")
+    args.add_argument("--prom", default=None, help="Prometheus text file")
+    args.add_argument("--jsonl", default=None, help="JSON lines file, samples are appended")
+    args.add_argument("--socket", default=None, help="unix socket serving Prometheus text")
+    args.add_argument("--jsonl-socket", default=None, help="unix socket streaming JSON lines of every poll")
+    arguments = args.parse_args()
+    if not arguments.pcs_reg and not arguments.rsfec_reg:
+        args.error("no counter, use --pcs-reg or --rsfec-reg")
+
+    fleet = ftile_fleet.ftile_fleet(arguments.device, arguments.threads)
+    collector = stats_collector(fleet, arguments.interval, arguments.budget, arguments.history,
+                                ftile_fleet.fleet_regs(arguments.pcs_reg),
+                                ftile_fleet.fleet_regs(arguments.rsfec_reg))
+    if arguments.socket is not None:
+        collector.serve(arguments.socket)
+    if arguments.jsonl_socket is not None:
+        collector.serve(arguments.jsonl_socket, 'jsonl')
+    try:
+        collector.run(arguments.polls, arguments.prom, arguments.jsonl)
+    except KeyboardInterrupt:
+        pass
+    fleet.close()
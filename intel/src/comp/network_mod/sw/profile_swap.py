@@ -116,6 +116,8 @@ comp = []
 for i in range (eth_channels):
     node.append(nodes[component[i]])
     comp.append(dev.comp_open(node[i]))
+    # ftile_eth instances of one channel share shadow registers
+    ftile.drp_window_set(comp[i], ftile.drp_node_key(arguments.device, node[i]))
 
 print()
 print()
@@ -162,6 +164,8 @@ for i in range (arguments.channels):
     while val != 2:
         print("It is not yet possible to set up a profile, wait")
         val = ftile.drp_read_drc(comp[0], 0x0, p_mi_bus)
+    # configuration of all channels could be changed by profile swap
+    ftile.drp_shadow_invalidate()
 
     # setup multirate parameters
     print("target ftile is :", device_v[i])
@@ -0,0 +1,95 @@
+# conftest.py: Fake nfb device with DRP bridge of pcsregs component
+# Copyright (C) 2022 CESNET z. s. p. o.
+#
+# Tests run without nfb library and hardware. DRP operation of fake
+# component is finished immediately when command is written.
+
+import sys
+import os
+import types
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# nfb is replaced by tests which open devices
+sys.modules.setdefault("nfb", types.ModuleType("nfb"))
+
+import ftile
+
+# 50G, 4 lanes, RS(528,514)
+DRP_CONFIG = (4 << 21) | (3 << 5) | (2 << 10)
+
+
+class drp_comp():
+    def __init__(self, config=DRP_CONFIG):
+        # Registers (page, register index)
+        self.regs = {(0, 0x100 >> 2): config}
+        self.data = 0
+        self.addr = 0
+        # Executed operations (write, register index, page)
+        self.ops  = []
+
+    def set64(self, reg, val, page=0):
+        self.regs[(page, reg >> 2)]       = val & 0xffffffff
+        self.regs[(page, (reg >> 2) + 1)] = val >> 32
+
+    def reads(self, reg, page=0):
+        return self.ops.count((0, reg >> 2, page))
+
+    def write32(self, addr, val):
+        if addr == ftile.DRP_DATA:
+            self.data = val
+        elif addr == ftile.DRP_ADDR:
+            self.addr = val
+        elif addr == ftile.DRP_CMD:
+            write, page = val & 1, val >> 4
+            self.ops.append((write, self.addr, page))
+            if write:
+                self.regs[(page, self.addr)] = self.data
+            else:
+                self.data = self.regs.get((page, self.addr), 0)
+
+    def read32(self, addr):
+        if addr == ftile.DRP_DATA:
+            return self.data
+        return 0
+
+
+class node():
+    # Node path is path of parent
+    def __init__(self, name):
+        self.path = '/firmware/mi_bus0'
+        self.name = name
+
+
+class device():
+    def __init__(self, path, nodes):
+        self.path  = path
+        self.nodes = [node(name) for name in nodes]
+        self.comps = []
+
+    def fdt_get_compatible(self, compatible):
+        return self.nodes
+
+    def comp_open(self, node):
+        comp = drp_comp()
+        self.comps.append(comp)
+        return comp
+
+
+@pytest.fixture(autouse=True)
+def drp_clean():
+    # Transports are global, every test starts without them
+    ftile.DRP_TRANSPORTS.clear()
+    ftile.DRP_WINDOWS.clear()
+    yield
+    ftile.DRP_TRANSPORTS.clear()
+    ftile.DRP_WINDOWS.clear()
+
+@pytest.fixture
+def devices(monkeypatch):
+    # Return function which opens fake devices, every device has nodes
+    def devices_open(paths, nodes=("pcs0", "pcs1")):
+        opened = {path: device(path, nodes) for path in paths}
+        monkeypatch.setattr(sys.modules["nfb"], "open", lambda path: opened[path], raising=False)
+        return opened
+    return devices_open
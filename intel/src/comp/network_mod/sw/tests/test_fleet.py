@@ -0,0 +1,54 @@
+# test_fleet.py: Concurrent operations on ports of all cards
+# Copyright (C) 2022 CESNET z. s. p. o.
+
+import ftile
+import ftile_fleet
+
+def test_fleet_regs():
+    assert ftile_fleet.fleet_regs(["cw=0x1e4", "err=16"]) == {"cw": 0x1e4, "err": 16}
+    assert ftile_fleet.fleet_regs([]) == {}
+
+def test_fleet_ports(devices):
+    opened = devices(["/dev/nfb0", "/dev/nfb1"])
+    fleet  = ftile_fleet.ftile_fleet(["/dev/nfb0", "/dev/nfb1"])
+    assert [port.name() for port in fleet.ports] == ["/dev/nfb0:0", "/dev/nfb0:1", "/dev/nfb1:0", "/dev/nfb1:1"]
+    # Every node is own DRP window with own lock and transport
+    assert len(fleet.locks) == 4
+    assert len({id(port.lock) for port in fleet.ports}) == 4
+    assert fleet.pool._processes == 4
+    fleet.run(lambda eth: None)
+    assert len(ftile.DRP_TRANSPORTS) == 4
+    assert fleet.ports[2].comp is opened["/dev/nfb1"].comps[0]
+    fleet.close()
+
+def test_fleet_messages(devices, capsys):
+    devices(["/dev/nfb0"])
+    fleet = ftile_fleet.ftile_fleet(["/dev/nfb0"])
+    fleet.run(lambda eth: eth.log("message"))
+    # Messages are printed by caller in port order
+    lines = capsys.readouterr().out.splitlines()
+    assert [line.split(": ")[0] for line in lines] == ["/dev/nfb0:0"] * 2 + ["/dev/nfb0:1"] * 2
+    assert lines[0].startswith("/dev/nfb0:0: Eth init") and lines[1] == "/dev/nfb0:0: message"
+    assert all(port.messages == [] for port in fleet.ports)
+    fleet.close()
+
+def test_fleet_stats(devices):
+    opened = devices(["/dev/nfb0"], ["pcs0"])
+    fleet  = ftile_fleet.ftile_fleet(["/dev/nfb0"])
+    comp   = opened["/dev/nfb0"].comps[0]
+    for lane in range(2):
+        comp.set64(ftile.FTILE_RSFEC_BASES[50] + lane * 0x200 + 0x10, 100 + lane)
+        comp.set64(ftile.FTILE_RSFEC_BASES[50] + lane * 0x200 + 0x18, 1 << 33)
+    ((port, result),) = fleet.run(ftile_fleet.fleet_stats, {"cw": 0x10, "err": 0x18})
+    assert result == {"cw": [100, 101], "err": [1 << 33, 1 << 33]}
+    fleet.close()
+
+def test_fleet_error(devices):
+    devices(["/dev/nfb0"])
+    fleet = ftile_fleet.ftile_fleet(["/dev/nfb0"])
+    def fail(eth):
+        raise ValueError("port failed")
+    # Exception of operation is result of port
+    results = fleet.run(fail)
+    assert all(isinstance(result, ValueError) for port, result in results)
+    fleet.close()
@@ -0,0 +1,79 @@
+# test_ftile.py: DRP transport and shadow of static registers
+# Copyright (C) 2022 CESNET z. s. p. o.
+
+import ftile
+from conftest import drp_comp, node, DRP_CONFIG
+
+def test_transport_sentinel():
+    # Fake component reads back data register, operation is finished immediately
+    comp = drp_comp()
+    assert ftile.drp_transport_get(comp).mode() == 'sentinel'
+    ftile.drp_write(comp, 0x200, 0x1234)
+    assert ftile.drp_read(comp, 0x200) == 0x1234
+
+def test_shadow_static():
+    comp = drp_comp()
+    eth  = ftile.ftile_eth(comp, log=lambda message: None)
+    assert eth.speed == 50 and eth.lanes == 4 and eth.rsfec.lanes == 2
+    reads = comp.reads(0x100)
+    # Configuration is read from shadow
+    assert eth.read(0x100) == eth.read(0x100) == DRP_CONFIG
+    assert comp.reads(0x100) == reads
+    # Other registers are always read
+    eth.read(0x104)
+    eth.read(0x104)
+    assert comp.reads(0x104) == 2
+
+def test_shadow_write():
+    comp = drp_comp()
+    eth  = ftile.ftile_eth(comp, log=lambda message: None)
+    eth.write(0x100, 0x5)
+    assert eth.read(0x100) == 0x5
+    # Write of batch invalidates register too
+    batch = ftile.drp_batch(comp)
+    batch.write(0x100, 0x6)
+    batch.execute()
+    assert eth.read(0x100) == 0x6
+
+def test_shadow_reset(monkeypatch):
+    # Registers read during reset are not kept
+    monkeypatch.setattr(ftile.time, "sleep", lambda delay: None)
+    comp = drp_comp()
+    eth  = ftile.ftile_eth(comp, log=lambda message: None)
+    reads = comp.reads(0x100)
+    eth.set_reset()
+    eth.read(0x100)
+    eth.clr_reset()
+    eth.read(0x100)
+    assert comp.reads(0x100) == reads + 2
+
+def test_shadow_window():
+    # Components of one window share transport and shadow
+    key    = ftile.drp_node_key('/dev/nfb0', node('pcs0'))
+    first  = drp_comp()
+    second = drp_comp()
+    other  = drp_comp()
+    ftile.ftile_eth(first, key, log=lambda message: None)
+    ftile.drp_window_set(second, key)
+    assert ftile.drp_transport_get(second) is ftile.drp_transport_get(first)
+    assert ftile.drp_transport_get(other) is not ftile.drp_transport_get(first)
+    hits = ftile.drp_transport_get(first).shadow.hits
+    ftile.drp_read_cached(second, 0x100)
+    assert ftile.drp_transport_get(first).shadow.hits == hits + 1
+    # Invalidation of one component invalidates whole window
+    ftile.drp_shadow_invalidate(second)
+    assert len(ftile.drp_transport_get(first).shadow.values) == 0
+
+def test_pma_not_cached():
+    comp = drp_comp()
+    pma  = ftile.ftile_pma(comp, 2, log=lambda message: None)
+    pma.read(0xffffc, 1)
+    pma.read(0xffffc, 1)
+    assert comp.reads(0xffffc, 2) == 2
+
+def test_rsfec_read64_all():
+    comp = drp_comp()
+    eth  = ftile.ftile_eth(comp, log=lambda message: None)
+    for lane in range(2):
+        comp.set64(eth.rsfec.addr(0x10, lane), (lane + 1) << 40)
+    assert eth.rsfec.read64_all([0x10], snapshot=True) == [[1 << 40], [2 << 40]]
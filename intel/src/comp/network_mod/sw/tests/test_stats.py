@@ -0,0 +1,111 @@
+# test_stats.py: Collector of PCS and RS-FEC counters
+# Copyright (C) 2022 CESNET z. s. p. o.
+
+import json
+import socket
+import time
+
+import ftile
+import ftile_fleet
+import ftile_stats
+
+class clock():
+    # Time of budget, sleep moves time
+    def __init__(self):
+        self.now    = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, delay):
+        self.sleeps.append(delay)
+        self.now += delay
+
+class budget_log():
+    def __init__(self):
+        self.ops = []
+
+    def take(self, ops):
+        self.ops.append(ops)
+
+def test_budget(monkeypatch):
+    fake = clock()
+    monkeypatch.setattr(ftile_stats, "time", fake)
+    budget = ftile_stats.stats_budget(1000)
+    # Burst is taken without wait
+    budget.take(10)
+    assert fake.sleeps == []
+    # Operations over burst wait for budget
+    budget.take(100)
+    assert fake.sleeps == [0.1]
+    fake.now += 1.0
+    budget.take(5)
+    assert fake.sleeps == [0.1]
+
+def test_budget_unlimited(monkeypatch):
+    fake = clock()
+    monkeypatch.setattr(ftile_stats, "time", fake)
+    ftile_stats.stats_budget(0).take(1000000)
+    assert fake.sleeps == []
+
+def stats_fleet(devices):
+    opened = devices(["/dev/nfb0"], ["pcs0"])
+    fleet  = ftile_fleet.ftile_fleet(["/dev/nfb0"])
+    return (fleet, opened["/dev/nfb0"].comps[0])
+
+def test_stats_read(devices):
+    (fleet, comp) = stats_fleet(devices)
+    budget = budget_log()
+    ((port, values),) = fleet.run(ftile_stats.stats_read, {"rx": 0x1100, "tx": 0x1108}, {"cw": 0x10}, budget)
+    assert sorted(values) == [("cw", 0), ("cw", 1), ("rx", 0), ("tx", 0)]
+    # Snapshot and counters of PCS, then of every RS-FEC lane
+    assert budget.ops == [6, 4, 4]
+    fleet.close()
+
+def test_collector_delta(devices):
+    (fleet, comp) = stats_fleet(devices)
+    collector = ftile_stats.stats_collector(fleet, interval=0, budget=0, pcs_regs={"rx": 0x1100})
+    addr = ftile.FTILE_ETH_BASES[50] + 0x100
+    comp.set64(addr, 100)
+    collector.poll()
+    comp.set64(addr, 150)
+    collector.poll()
+    assert [(name, val, delta) for (now, port, name, lane, val, delta, rate) in collector.samples] == [("rx", 150, 50)]
+    # Cleared counter
+    comp.set64(addr, 20)
+    collector.poll()
+    assert collector.samples[0][4:6] == (20, 20)
+    assert len(collector.history) == 3
+    assert 'ftile_rx_total{device="/dev/nfb0",port="0",lane="0"} 20' in collector.prometheus()
+    fleet.close()
+
+class slow_client():
+    def __init__(self):
+        self.closed = False
+
+    def sendall(self, data):
+        raise socket.timeout("timed out")
+
+    def close(self):
+        self.closed = True
+
+def test_collector_slow_client(devices, tmp_path):
+    (fleet, comp) = stats_fleet(devices)
+    collector = ftile_stats.stats_collector(fleet, interval=0, budget=0, pcs_regs={"rx": 0x1100})
+    server = collector.serve(str(tmp_path / "stats.sock"), 'jsonl')
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(str(tmp_path / "stats.sock"))
+    while len(collector.clients) == 0:
+        time.sleep(0.001)
+    # Poll is not blocked by client longer than send timeout
+    assert collector.clients[0].gettimeout() == ftile_stats.STATS_SEND_TIMEOUT
+    slow = slow_client()
+    collector.clients.append(slow)
+    collector.poll()
+    assert collector.clients != [] and slow not in collector.clients and slow.closed
+    sample = json.loads(client.makefile().readline())
+    assert (sample["device"], sample["counter"], sample["lane"]) == ("/dev/nfb0", "rx", 0)
+    client.close()
+    server.close()
+    fleet.close()
@@ -20,6 +20,7 @@ lappend COMPONENTS [ list "PACKETS"    "$OFM_PATH/comp/uvm/packet_generators"
 lappend COMPONENTS [ list "CHANNEL_ROUTER_MODEL" "$OFM_PATH/comp/mvb_tools/flow/channel_router/uvm"  "FULL" ]
 
 
+lappend MOD "$ENTITY_BASE/pkt_gen/ring_dpi.c"
 lappend MOD "$ENTITY_BASE/top_agent/pkg.sv"
 lappend MOD "$ENTITY_BASE/env/pkg.sv"
 lappend MOD "$ENTITY_BASE/property.sv"
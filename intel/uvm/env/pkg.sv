@@ -27,6 +27,7 @@ package uvm_app_core;
     `include "scoreboard_cmp.sv"
     `include "scoreboard.sv"
     `include "sequencer.sv"
+    `include "pkt_gen_ring.sv"
     `include "env.sv"
 
     `include "sequence_eth.sv"
@@ -0,0 +1,18 @@
+/*
+ * file       : pkt_gen_ring.sv
+ * Copyright (C) 2022 CESNET z. s. p. o.
+ * description: DPI consumer of pkt_gen shared memory ring (pkt_gen/ring_dpi.c)
+ * date       : 2022
+ * author     : Radek Iša <isa@cesnet.ch>
+ *
+ * SPDX-License-Identifier: BSD-3-Clause
+*/
+
+// Wait until pkt_gen initialize ring. Return null after timeout (ms).
+import "DPI-C" context function chandle pkt_gen_ring_open(string file_name, int timeout);
+// Wait for next packet. Return length of packet or -1 when pkt_gen finished.
+import "DPI-C" context function int pkt_gen_ring_next(chandle ring);
+// Copy packet returned by pkt_gen_ring_next
+import "DPI-C" context function void pkt_gen_ring_get(chandle ring, inout byte unsigned data[]);
+// Close ring, consumed ring is removed
+import "DPI-C" context function void pkt_gen_ring_close(chandle ring);
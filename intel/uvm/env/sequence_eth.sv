@@ -425,6 +425,17 @@ class sequence_search_eth  #(
     int unsigned pkt_size_min = 60;
     int unsigned pkt_size_max = 0;
     string config_json = "./filter.json";
+    // pkt_gen runs in background and writes packets to named pipe.
+    // Packets are consumed while they are generated.
+    bit pkt_gen_fifo = 0;
+    // UNIX socket of running "pkt_gen.py --server". Generator is called as client
+    // and doesn't pay python import time.
+    string pkt_gen_server = "";
+    // Directory of pcap cache shared by simulations. Same pcap is generated only once.
+    string pkt_gen_cache = "";
+    // pkt_gen runs in background and writes packets to shared memory ring (pkt_gen_ring.sv).
+    // Packets are consumed while they are generated without pcap parsing.
+    bit pkt_gen_ring = 0;
     rand int unsigned transaction_count;
     rand int unsigned pkt_gen_seed;
     int unsigned transaction_count_min = 100;
@@ -604,14 +615,32 @@ class sequence_search_eth  #(
     // -----------------------
     // Functions.
     // -----------------------
+    // Read next packet from pcap file or from ring. Return 0 at end of packets.
+    function bit packet_read(uvm_pcap::reader reader, chandle ring, ref byte unsigned data[]);
+        int length;
+
+        if (ring == null) begin
+            return reader.read(data) == uvm_pcap::RET_OK;
+        end
+        length = pkt_gen_ring_next(ring);
+        if (length < 0) begin
+            return 0;
+        end
+        data = new[length];
+        pkt_gen_ring_get(ring, data);
+        return 1;
+    endfunction
+
     task body;
         uvm_pcap::reader reader;
+        chandle          ring = null;
         byte unsigned    data[];
         int unsigned     pkt_num = 0;
         uvm_common::sequence_cfg state;
 
         string pcap_file = "test.pcap";
         string pkt_gen_params;
+        string pkt_gen_end = "";
 
         reader = new();
         if (!uvm_config_db #(string)::get(m_sequencer, "", "pcap_file", pcap_file)) begin
@@ -623,7 +652,27 @@ class sequence_search_eth  #(
 
         this.configure(config_json);
         pkt_gen_params = $sformatf("-a %s -f \"%s\" -p %0d -c %s -s %0d", algorithm == 0 ? "rand" : "dfs",  pcap_file, transaction_count, config_json, pkt_gen_seed);
-        if($system({uvm_packet_generators::PKT_GEN_PATH, " ", pkt_gen_params, " >> pkt_gen_out"}) != 0) begin
+        if (pkt_gen_fifo) begin
+            if ($system({"rm -f \"", pcap_file, "\" && mkfifo \"", pcap_file, "\""}) != 0) begin
+                `uvm_fatal(m_sequencer.get_full_name(), $sformatf("\n\t Cannot create named pipe %s", pcap_file))
+            end
+            pkt_gen_params = {pkt_gen_params, " --fifo"};
+            pkt_gen_end    = " &";
+        end else if (pkt_gen_ring) begin
+            // Ring of previous run is removed, so it is never read again
+            if ($system({"rm -f \"", pcap_file, "\""}) != 0) begin
+                `uvm_fatal(m_sequencer.get_full_name(), $sformatf("\n\t Cannot remove ring %s", pcap_file))
+            end
+            pkt_gen_params = {pkt_gen_params, " -w ring"};
+            pkt_gen_end    = " &";
+        end
+        if (pkt_gen_server != "") begin
+            pkt_gen_params = {pkt_gen_params, " --client \"", pkt_gen_server, "\""};
+        end
+        if (pkt_gen_cache != "") begin
+            pkt_gen_params = {pkt_gen_params, " --cache \"", pkt_gen_cache, "\""};
+        end
+        if($system({uvm_packet_generators::PKT_GEN_PATH, " ", pkt_gen_params, " >> pkt_gen_out", pkt_gen_end}) != 0) begin
             `uvm_fatal(m_sequencer.get_full_name(), $sformatf("\n\t Cannot run command %s", {uvm_packet_generators::PKT_GEN_PATH, " ", pkt_gen_params}))
         end
 
@@ -631,9 +680,16 @@ class sequence_search_eth  #(
             state = null;
         end
 
-        void'(reader.open(pcap_file));
+        if (pkt_gen_ring) begin
+            ring = pkt_gen_ring_open(pcap_file, 60000);
+            if (ring == null) begin
+                `uvm_fatal(m_sequencer.get_full_name(), $sformatf("\n\t Ring %s is not initialized", pcap_file))
+            end
+        end else begin
+            void'(reader.open(pcap_file));
+        end
         req = uvm_app_core_top_agent::sequence_eth_item#(CHANNELS, LENGTH_WIDTH, ITEM_WIDTH)::type_id::create("req", m_sequencer);
-        while(reader.read(data) == uvm_pcap::RET_OK && (state == null || !state.stopped())) begin
+        while(packet_read(reader, ring, data) && (state == null || !state.stopped())) begin
             logic [32-1:0] time_act_sec;
             logic [32-1:0] time_act_nano_sec;
             logic [64-1:0] time_sim = (cfg.time_start + $time())/1ns;
@@ -661,7 +717,11 @@ class sequence_search_eth  #(
             req.data = {>>{data}};
             finish_item(req);
         end
-        reader.close();
+        if (ring != null) begin
+            pkt_gen_ring_close(ring);
+        end else begin
+            reader.close();
+        end
     endtask
 
 endclass
@@ -0,0 +1,145 @@
+#!/bin/python3
+
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+#  simple packet generator. Batch randomization of header fields.
+#  Addresses, ports, labels, ... are drawn for thousands of packets at once
+#  by numpy generator. Every column is volatile value, so it can be used
+#  as explicit field of scapy layer. Template engine copy column bytes
+#  directly to header.
+#
+#  Copyright (C) 2022 CESNET
+#  Author(s):
+#    Radek Iša <isa@cesnet.cz>
+
+import scapy.volatile
+import socket
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Default number of values drawn at once
+BATCH_SIZE  = 4096
+# Columns are seeded again every BATCH_BLOCK packet counters
+BATCH_BLOCK = 4096
+
+
+def batch_available():
+    return numpy != None
+
+
+def address_draw(rng, ranges, width, count):
+    # ranges is list of (min, max) integers. Range is selected uniformly and then
+    # address is selected uniformly from range. Return count*width bytes.
+    out   = numpy.zeros((count, 2), dtype=numpy.uint64)  # (high, low) 64 bits
+    index = rng.integers(0, len(ranges), count)
+    for (it, (val_min, val_max)) in enumerate(ranges):
+        sel  = (index == it)
+        size = int(numpy.count_nonzero(sel))
+        if (size == 0):
+            continue
+        span   = val_max - val_min
+        min_hi = numpy.uint64(val_min >> 64)
+        min_lo = numpy.uint64(val_min & 0xffffffffffffffff)
+        if (span <= 0xffffffffffffffff):
+            off = rng.integers(0, span, size, dtype=numpy.uint64, endpoint=True)
+            low = min_lo + off
+            out[sel, 0] = min_hi + (low < off).astype(numpy.uint64)
+            out[sel, 1] = low
+        elif ((span & (span + 1)) == 0 and (val_min & span) == 0):
+            # Aligned prefix. Random bits under mask.
+            rand = rng.integers(0, 0xffffffffffffffff, (size, 2), dtype=numpy.uint64, endpoint=True)
+            out[sel, 0] = min_hi | (rand[:, 0] & numpy.uint64(span >> 64))
+            out[sel, 1] = rand[:, 1]
+        else:
+            values = [val_min + int.from_bytes(rng.bytes(24), "big") % (span + 1) for x in range(size)]
+            out[sel, 0] = [x >> 64 for x in values]
+            out[sel, 1] = [x & 0xffffffffffffffff for x in values]
+    return out.astype(">u8").view(numpy.uint8).reshape(count, 16)[:, 16 - width:].tobytes()
+
+
+def uint_draw(rng, bits, width, count):
+    values = rng.integers(0, 1 << bits, count, dtype=numpy.uint64)
+    return values.astype(">u%d" % (width)).tobytes()
+
+
+class batch_column(scapy.volatile.VolatileValue):
+    # Every use return next value from column. Values are drawn by whole batches.
+    def __init__(self, batch, draw, width, conv):
+        self.batch = batch
+        self.draw  = draw
+        self.width = width
+        self.conv  = conv
+        self.reset()
+
+    def reset(self):
+        self.data = b""
+        self.pos  = 0
+
+    def take(self):
+        # Return next value as big endian bytes
+        if (self.pos >= len(self.data)):
+            self.data = self.draw(self.batch.rng, self.batch.size)
+            self.pos  = 0
+        ret = self.data[self.pos:self.pos + self.width]
+        self.pos += self.width
+        return ret
+
+    def _fix(self):
+        # Value for scapy field
+        return self.conv(self.take())
+
+
+def bytes_mac(data):
+    return ":".join("%02x" % (it) for it in data)
+
+def bytes_int(data):
+    return int.from_bytes(data, "big")
+
+def bytes_ipv4(data):
+    return socket.inet_ntoa(data)
+
+def bytes_ipv6(data):
+    return socket.inet_ntop(socket.AF_INET6, data)
+
+
+class field_batch:
+    def __init__(self, seed, size = None):
+        if (numpy == None):
+            raise ImportError("batch randomization requires numpy")
+        self.size    = BATCH_SIZE if size == None else size
+        self.columns = {}
+        self.seed(seed)
+
+    def seed(self, seed):
+        # Values depends only on seed and order of use
+        self.rng = numpy.random.default_rng(seed & 0xffffffffffffffff)
+        for it in self.columns.values():
+            it.reset()
+
+    def column(self, name, draw, width, conv):
+        # Columns are not compared with None. Comparison of volatile value take its value.
+        if (name not in self.columns):
+            self.columns[name] = batch_column(self, draw, width, conv)
+        return self.columns[name]
+
+    def mac(self):
+        return self.column("mac", lambda rng, count : rng.bytes(6*count), 6, bytes_mac)
+
+    def uint(self, name, bits):
+        # Unsigned number with "bits" random bits
+        width = 1
+        while (width*8 < bits):
+            width *= 2
+        return self.column(name, lambda rng, count : uint_draw(rng, bits, width, count), width, bytes_int)
+
+    def address(self, name, values, version):
+        # values is list of {"min" : "0x..", "max" : "0x.."} from configuration
+        if (name not in self.columns):
+            ranges = [(int(it.get("min"), 0), int(it.get("max"), 0)) for it in values]
+            width  = 4 if version == 4 else 16
+            conv   = bytes_ipv4 if version == 4 else bytes_ipv6
+            self.column(name, lambda rng, count : address_draw(rng, ranges, width, count), width, conv)
+        return self.columns[name]
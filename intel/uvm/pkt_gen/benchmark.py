@@ -0,0 +1,178 @@
+#!/bin/python3
+
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+#  Benchmarks of packet generator. Results are printed as JSON lines.
+#  Every generator benchmark runs in new process, so peak RSS is not
+#  affected by previous runs.
+#
+#  Copyright (C) 2022 CESNET
+#  Author(s):
+#    Radek Iša <isa@cesnet.cz>
+
+from writer import *
+from parser_rand import *
+from parser_dfs import *
+import multiprocessing
+import resource
+import argparse
+import tempfile
+import random
+import json
+import time
+import sys
+import os
+
+# Representative configurations of generator
+BENCH_CONFIGS = {
+    "default"    : {},
+    "deep_stack" : {"vlan" : {"stack" : {"max" : 8}}, "mpls" : {"stack" : {"max" : 8}},
+                    "ETH"  : {"weight" : {"VLAN" : 4, "MPLS" : 4}},
+                    "VLAN" : {"weight" : {"VLAN" : 8, "MPLS" : 4}},
+                    "MPLS" : {"weight" : {"MPLS" : 8}}},
+    "ipv6ext"    : {"ipv6ext" : {"stack" : {"max" : 8}},
+                    "ETH"     : {"weight" : {"IPv6" : 8}},
+                    "IPv6"    : {"weight" : {"IPv6Ext" : 8}},
+                    "IPv6Ext" : {"weight" : {"IPv6Ext" : 8}}},
+    "trill"      : {"ETH" : {"weight" : {"TRILL" : 8}}},
+    "errors"     : {"packet" : {"err_probability" : 50}},
+}
+
+def bench_gen(algorithm, conf, conf_file, engine, packets, seed, file_name):
+    # Run in separate process. ru_maxrss is in kilobytes on linux.
+    out = pcap_writer_create(file_name)
+    if (algorithm == "dfs"):
+        gen = parser_dfs(out, conf_file, seed, engine, 0, packets)
+    else:
+        gen = parser_rand(out, conf_file, seed, packets, engine)
+    start = time.perf_counter()
+    gen.profile_start()
+    count = parser.gen(gen)
+    gen.close()
+    gen.profile_stage("write")
+    elapsed = time.perf_counter() - start
+    return {"bench" : "gen", "algorithm" : algorithm, "config" : conf, "engine" : engine, "packets" : count,
+            "time" : elapsed, "pps" : count/elapsed, "rss_kb" : resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "stages" : gen.profile}
+
+def generators(args):
+    ret = []
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        confs = {}
+        for conf in args.conf:
+            confs[conf] = os.path.join(tmp_dir, conf + ".json")
+            with open(confs[conf], "w") as conf_file:
+                json.dump(BENCH_CONFIGS[conf], conf_file)
+        for conf_file in args.conf_file:
+            confs[os.path.basename(conf_file)] = conf_file
+
+        for algorithm in args.algorithm:
+            for (conf, conf_file) in confs.items():
+                for engine in args.engine:
+                    with ctx.Pool(1) as pool:
+                        ret.append(pool.apply(bench_gen, (algorithm, conf, conf_file, engine, args.packets, args.seed,
+                                                          os.path.join(tmp_dir, "out.pcap"))))
+    return ret
+
+def bench_writer(writer, packets, file_name):
+    start = time.perf_counter()
+    out   = pcap_writer_create(file_name, writer)
+    for (index, data) in enumerate(packets):
+        out.write(data, index // 1000000, index % 1000000)
+    out.close()
+    elapsed = time.perf_counter() - start
+    return {"bench" : "writer", "writer" : writer, "packets" : len(packets), "size" : os.path.getsize(file_name),
+            "time" : elapsed, "pps" : len(packets)/elapsed}
+
+def writers(args):
+    rand    = random.Random(args.seed)
+    packets = [rand.randbytes(rand.randint(args.size_min, args.size_max)) for x in range(args.packets)]
+    ret     = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for writer in args.writer:
+            ret.append(bench_writer(writer, packets, os.path.join(tmp_dir, writer + ".pcap")))
+    return ret
+
+def ring_consume(file_name):
+    # Consumer of ring runs in separate process. Return number of read packets.
+    reader = ring_reader(file_name, timeout = 60)
+    count  = sum(1 for it in reader)
+    reader.close()
+    return count
+
+def rings(args):
+    rand    = random.Random(args.seed)
+    packets = [rand.randbytes(rand.randint(args.size_min, args.size_max)) for x in range(args.packets)]
+    ctx     = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_name = os.path.join(tmp_dir, "ring")
+        with ctx.Pool(1) as pool:
+            consumer = pool.apply_async(ring_consume, (file_name,))
+            start    = time.perf_counter()
+            out      = pcap_writer_create(file_name, "ring", ring_size = args.ring_size << 10)
+            for (index, data) in enumerate(packets):
+                out.write(data, index // 1000000, index % 1000000)
+            out.close()
+            count    = consumer.get()
+            elapsed  = time.perf_counter() - start
+    return [{"bench" : "ring", "packets" : count, "ring_size_kb" : args.ring_size, "time" : elapsed, "pps" : count/elapsed}]
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="pkt_gen benchmarks")
+    arg_parser.add_argument("-o", "--output", type=str,
+                        help="append results to file (JSON lines)", default=None)
+    arg_parser.add_argument("-s", "--seed", type=int,
+                        help="seed of random generator", default=0)
+    sub_parsers = arg_parser.add_subparsers(dest="bench", required=True)
+
+    writer_parser = sub_parsers.add_parser("writer", help="pcap writers throughput")
+    writer_parser.add_argument("-p", "--packets", type=int,
+                        help="number of written packets", default=200000)
+    writer_parser.add_argument("--size_min", type=int,
+                        help="minimal size of packet", default=60)
+    writer_parser.add_argument("--size_max", type=int,
+                        help="maximal size of packet", default=128)
+    writer_parser.add_argument("-w", "--writer", type=str, nargs="+", choices=list(PCAP_WRITERS),
+                        help="measured writers", default=list(PCAP_WRITERS))
+
+    ring_parser = sub_parsers.add_parser("ring", help="ring writer throughput with consumer in other process")
+    ring_parser.add_argument("-p", "--packets", type=int,
+                        help="number of written packets", default=200000)
+    ring_parser.add_argument("--size_min", type=int,
+                        help="minimal size of packet", default=60)
+    ring_parser.add_argument("--size_max", type=int,
+                        help="maximal size of packet", default=128)
+    ring_parser.add_argument("--ring_size", type=int,
+                        help="size of ring buffer in kB", default=RING_SIZE >> 10)
+
+    gen_parser = sub_parsers.add_parser("gen", help="generator throughput, peak RSS and time of stages")
+    gen_parser.add_argument("-p", "--packets", type=int,
+                        help="number of generated packets (maximal number of paths for dfs)", default=2000)
+    gen_parser.add_argument("-a", "--algorithm", type=str, nargs="+", choices=["rand", "dfs"],
+                        help="measured algorithms", default=["rand", "dfs"])
+    gen_parser.add_argument("-e", "--engine", type=str, nargs="+", choices=["scapy", "template", "raw"],
+                        help="measured build engines", default=["scapy", "template", "raw"])
+    gen_parser.add_argument("-c", "--conf", type=str, nargs="+", choices=list(BENCH_CONFIGS),
+                        help="measured built-in configurations", default=list(BENCH_CONFIGS))
+    gen_parser.add_argument("--conf_file", type=str, nargs="+",
+                        help="measured configuration files", default=[])
+
+    args = arg_parser.parse_args()
+    if (args.bench == "writer"):
+        results = writers(args)
+    elif (args.bench == "ring"):
+        results = rings(args)
+    elif (args.bench == "gen"):
+        results = generators(args)
+
+    out = sys.stdout if args.output == None else open(args.output, "a")
+    for it in results:
+        it["timestamp"] = time.time()
+        print(json.dumps(it), file=out)
+    if (out != sys.stdout):
+        out.close()
+
+
+if __name__ == "__main__":
+    main()
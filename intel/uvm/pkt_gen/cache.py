@@ -0,0 +1,140 @@
+#!/bin/python3
+
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+#  simple packet generator. Content addressed cache of generated pcap files.
+#  Key is hash of generator sources, content of JSON configuration and
+#  arguments which change output. Entry is copied to output file when
+#  it is found. Generation of one key is protected by file lock, so
+#  concurrent runs with same key generate pcap only once. Entries are
+#  stored by atomic rename and the least recently used entries are removed
+#  when cache is larger than its limit. Lock of key without entry is removed
+#  too, so number of files in cache is bounded.
+#
+#  Copyright (C) 2022 CESNET
+#  Author(s):
+#    Radek Iša <isa@cesnet.cz>
+
+import contextlib
+import hashlib
+import shutil
+import fcntl
+import json
+import glob
+import os
+
+CACHE_SIZE = 1 << 30
+
+def generator_version():
+    # Hash of generator sources
+    base    = os.path.dirname(os.path.abspath(__file__))
+    version = hashlib.sha256()
+    for it in sorted(glob.glob(os.path.join(base, "*.py")) + glob.glob(os.path.join(base, "layers", "*.py"))):
+        with open(it, "rb") as source:
+            version.update(os.path.relpath(it, base).encode() + b"\0" + source.read())
+    return version.hexdigest()
+
+def cache_key(params, cfg):
+    # params is dictionary of arguments, cfg is name of JSON configuration
+    conf = None
+    if (cfg != None):
+        with open(cfg) as conf_file:
+            conf = json.load(conf_file)
+    key = {"version" : generator_version(), "conf" : conf, "params" : params}
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+
+class pcap_cache:
+    def __init__(self, directory, size = CACHE_SIZE):
+        self.directory = directory
+        self.size      = size
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ".pcap")
+
+    def lock_path(self, key):
+        return os.path.join(self.directory, key + ".lock")
+
+    @contextlib.contextmanager
+    def lock(self, key = "cache"):
+        while (True):
+            lock_file = open(self.lock_path(key), "a")
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            # Lock file could be removed by evict while we waited
+            try:
+                if (os.stat(self.lock_path(key)).st_ino == os.fstat(lock_file.fileno()).st_ino):
+                    break
+            except FileNotFoundError:
+                pass
+            lock_file.close()
+        with lock_file:
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def lock_remove(self, key):
+        # Remove lock of key if it isn't held
+        try:
+            lock_file = open(self.lock_path(key), "r")
+        except FileNotFoundError:
+            return
+        with lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return
+            try:
+                if (os.stat(self.lock_path(key)).st_ino == os.fstat(lock_file.fileno()).st_ino):
+                    os.unlink(self.lock_path(key))
+            except FileNotFoundError:
+                pass
+
+    def get(self, key, file_name):
+        # Copy entry to file. Return False if entry doesn't exist.
+        try:
+            entry = open(self.path(key), "rb")
+        except FileNotFoundError:
+            return False
+        with entry:
+            # Entry is recently used
+            os.utime(entry.fileno())
+            if (file_name == "-"):
+                output = os.fdopen(os.dup(1), "wb")
+            else:
+                output = open(file_name, "wb")
+            with output:
+                shutil.copyfileobj(entry, output, 1 << 20)
+        return True
+
+    def put(self, key, file_name):
+        tmp = "%s.%d.tmp" % (self.path(key), os.getpid())
+        shutil.copyfile(file_name, tmp)
+        os.replace(tmp, self.path(key))
+        self.evict()
+
+    def evict(self):
+        # Remove least recently used entries
+        with self.lock():
+            entries = []
+            for it in glob.glob(os.path.join(self.directory, "*.pcap")):
+                try:
+                    st = os.stat(it)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, it))
+            entries.sort()
+            total = sum(size for (mtime, size, it) in entries)
+            for (mtime, size, it) in entries:
+                if (total <= self.size):
+                    break
+                try:
+                    os.unlink(it)
+                except FileNotFoundError:
+                    pass
+                total -= size
+            for it in glob.glob(os.path.join(self.directory, "*.lock")):
+                key = os.path.basename(it)[:-len(".lock")]
+                if (key != "cache" and not os.path.exists(self.path(key))):
+                    self.lock_remove(key)
@@ -26,6 +26,8 @@ class packet_config:
         self.vlan    = 4
         self.mpls    = 4
         self.ipv6ext = 4
+        # Batch randomization of fields (field_batch) or None
+        self.batch   = None
 
         self.constraints = constraints
 
@@ -39,7 +41,7 @@ class packet_config:
 
         ipv6ext_stack = self.object_get(["ipv6ext", "stack"]);
         if (ipv6ext_stack != None):
-            self.ipv6ext = int(ipv6ext.get("max"));
+            self.ipv6ext = int(ipv6ext_stack.get("max"));
 
     def copy(self):
         ret = packet_config(self.constraints)
@@ -47,6 +49,7 @@ class packet_config:
         ret.vlan    = self.vlan
         ret.mpls    = self.mpls
         ret.ipv6ext = self.ipv6ext
+        ret.batch   = self.batch
         return ret;
 
     def object_get(self, path):
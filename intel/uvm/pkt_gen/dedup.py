@@ -0,0 +1,77 @@
+#!/bin/python3
+
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+#  simple packet generator. Suppression of duplicate packets.
+#  Hashes of written packets are stored in Bloom filter with fixed size.
+#  When filter contains capacity packets, it becomes previous filter and
+#  new filter is started. Packet is duplicate if it is in one of them,
+#  so memory is constant. Each filter is sized for half of fp_rate,
+#  so false positive rate of lookup in both filters is at most fp_rate.
+#
+#  Configuration "packet" : {"dedup" : {"fp_rate" : 0.001, "capacity" : 4194304}}
+#
+#  Copyright (C) 2022 CESNET
+#  Author(s):
+#    Radek Iša <isa@cesnet.cz>
+
+import hashlib
+import math
+
+DEDUP_FP_RATE  = 0.001
+DEDUP_CAPACITY = 1 << 22
+
+class bloom_filter:
+    def __init__(self, capacity, fp_rate):
+        # Optimal number of bits and hash functions
+        self.bits   = max(64, int(math.ceil(-capacity * math.log(fp_rate) / (math.log(2) ** 2))))
+        self.hashes = max(1, int(round(self.bits / capacity * math.log(2))))
+        self.array  = bytearray((self.bits + 7) // 8)
+        self.count  = 0
+
+    def indexes(self, digest):
+        # Double hashing of 128 bit digest
+        h1 = int.from_bytes(digest[0:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        return [(h1 + it * h2) % self.bits for it in range(self.hashes)]
+
+    def contains(self, indexes):
+        array = self.array
+        for it in indexes:
+            if (not (array[it >> 3] >> (it & 0x7)) & 1):
+                return False
+        return True
+
+    def add(self, indexes):
+        array = self.array
+        for it in indexes:
+            array[it >> 3] |= 1 << (it & 0x7)
+        self.count += 1
+
+
+class packet_dedup:
+    def __init__(self, fp_rate = DEDUP_FP_RATE, capacity = DEDUP_CAPACITY):
+        self.fp_rate    = fp_rate
+        self.capacity   = capacity
+        self.actual     = bloom_filter(capacity, fp_rate / 2)
+        self.previous   = None
+        self.duplicates = 0
+
+    def memory(self):
+        # Size of allocated filters in bytes. Previous filter exists after first rotation.
+        ret = len(self.actual.array)
+        if (self.previous != None):
+            ret += len(self.previous.array)
+        return ret
+
+    def seen(self, data):
+        # Return True if packet was already written. New packet is added to filter.
+        indexes = self.actual.indexes(hashlib.blake2b(data, digest_size=16).digest())
+        if (self.actual.contains(indexes) or (self.previous != None and self.previous.contains(indexes))):
+            self.duplicates += 1
+            return True
+        if (self.actual.count >= self.capacity):
+            self.previous = self.actual
+            self.actual   = bloom_filter(self.capacity, self.fp_rate / 2)
+        self.actual.add(indexes)
+        return False
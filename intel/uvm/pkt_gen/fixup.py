@@ -0,0 +1,126 @@
+#!/bin/python3
+
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+#  simple packet generator. Length and checksum fixups computed on raw
+#  packet bytes. Fixups are planned once per layer stack and applied
+#  to every packet with same layout.
+#
+#  Copyright (C) 2022 CESNET
+#  Author(s):
+#    Radek Iša <isa@cesnet.cz>
+
+import array
+import struct
+
+def checksum_sum(data):
+    # Sum of 16 bit words in native byte order (RFC 1071)
+    if (len(data) % 2):
+        data = bytes(data) + b"\0"
+    return sum(array.array("H", bytes(data)))
+
+def checksum(*parts):
+    # Internet checksum of concatenated parts. Every part except last have to be even length.
+    # Return two bytes in network order.
+    ret = 0
+    for it in parts:
+        ret += checksum_sum(it)
+    while (ret >> 16):
+        ret = (ret & 0xffff) + (ret >> 16)
+    return struct.pack("=H", (~ret) & 0xffff)
+
+
+def crc32c_table_gen():
+    ret = []
+    for it in range(256):
+        crc = it
+        for x in range(8):
+            if (crc & 1):
+                crc = (crc >> 1) ^ 0x82f63b78
+            else:
+                crc = crc >> 1
+        ret.append(crc)
+    return ret
+
+CRC32C_TABLE = crc32c_table_gen()
+
+def crc32c(data):
+    crc = 0xffffffff
+    for c in bytes(data):
+        crc = (crc >> 8) ^ CRC32C_TABLE[(crc ^ c) & 0xff]
+    return (~crc) & 0xffffffff
+
+
+# Protocol numbers of layers checksumed with pseudo header
+FIXUP_L4_PROTO = {"TCP" : 6, "UDP" : 17, "ICMPv6" : 58}
+
+def fixup_plan(layers):
+    # layers is list of (name, offset, header length)
+    # name is scapy layer class name ("IP", "IPv6", "TCP", ...)
+    # Return list of fixups in order in which they have to be applied.
+    lengths   = []
+    checksums = []
+    ip_hdr    = []
+    ip_act    = None
+
+    for (name, offset, hdr_len) in layers:
+        if (name == "IP"):
+            ip_act = ("IP", offset)
+            lengths.append(("len", offset + 2, offset))
+            ip_hdr.append(("ipv4", offset, hdr_len))
+        elif (name == "IPv6"):
+            ip_act = ("IPv6", offset)
+            lengths.append(("len", offset + 4, offset + 40))
+        elif (name == "PPPoE"):
+            lengths.append(("len", offset + 4, offset + 6))
+        elif (name == "UDP"):
+            lengths.append(("len", offset + 4, offset))
+            checksums.append(("l4", offset, offset + 6, FIXUP_L4_PROTO["UDP"], ip_act))
+        elif (name == "TCP"):
+            checksums.append(("l4", offset, offset + 16, FIXUP_L4_PROTO["TCP"], ip_act))
+        elif (name.startswith("ICMPv6")):
+            checksums.append(("l4", offset, offset + 2, FIXUP_L4_PROTO["ICMPv6"], ip_act))
+        elif (name == "ICMP"):
+            checksums.append(("icmp", offset, offset + 2))
+        elif (name == "SCTP"):
+            checksums.append(("sctp", offset, offset + 8))
+
+    # Inner checksums have to be computed first.
+    checksums.reverse()
+    return lengths + checksums + ip_hdr
+
+
+def fixup_apply(buf, length, fixups):
+    # buf is bytearray with packet, length is size of packet in buffer
+    for fix in fixups:
+        kind = fix[0]
+        if (kind == "len"):
+            (kind, field, base) = fix
+            buf[field:field+2] = ((length - base) & 0xffff).to_bytes(2, "big")
+        elif (kind == "l4"):
+            (kind, offset, field, proto, ip) = fix
+            buf[field:field+2] = b"\0\0"
+            if (ip == None):
+                # No IP underlayer, checksum cannot be computed.
+                continue
+            (ip_name, ip_offset) = ip
+            if (ip_name == "IP"):
+                pseudo = bytes(buf[ip_offset+12:ip_offset+20]) + struct.pack("!BBH", 0, proto, length - offset)
+            else:
+                pseudo = bytes(buf[ip_offset+8:ip_offset+40]) + struct.pack("!I3xB", length - offset, proto)
+            ck = checksum(pseudo, buf[offset:length])
+            if (proto == FIXUP_L4_PROTO["UDP"] and ck == b"\0\0"):
+                ck = b"\xff\xff"
+            buf[field:field+2] = ck
+        elif (kind == "icmp"):
+            (kind, offset, field) = fix
+            buf[field:field+2] = b"\0\0"
+            buf[field:field+2] = checksum(buf[offset:length])
+        elif (kind == "sctp"):
+            (kind, offset, field) = fix
+            buf[field:field+4] = b"\0\0\0\0"
+            buf[field:field+4] = struct.pack("<I", crc32c(buf[offset:length]))
+        elif (kind == "ipv4"):
+            (kind, offset, hdr_len) = fix
+            buf[offset+10:offset+12] = b"\0\0"
+            buf[offset+10:offset+12] = checksum(buf[offset:offset+hdr_len])
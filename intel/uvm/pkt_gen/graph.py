@@ -0,0 +1,166 @@
+#!/bin/python3
+
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+#  simple packet generator. Protocol graph compiled to transition tables.
+#  State is protocol together with remaining TRILL/VLAN/MPLS/IPv6Ext stack
+#  budget. Next protocol is sampled by alias method in constant time.
+#  Paths are counted and ranked in same order as they are found by DFS.
+#
+#  Copyright (C) 2022 CESNET
+#  Author(s):
+#    Radek Iša <isa@cesnet.cz>
+
+from config import *
+import random
+
+# Next state index of protocol which is not known by generator. Packet ends.
+GRAPH_END = -1
+
+def alias_table(weights):
+    # Vose's alias method. Return (probability, alias) tuples.
+    count = len(weights)
+    total = sum(weights)
+    prob  = [w * count / total for w in weights]
+    alias = list(range(count))
+    small = [it for it in range(count) if prob[it] <  1.0]
+    large = [it for it in range(count) if prob[it] >= 1.0]
+
+    while (len(small) > 0 and len(large) > 0):
+        less = small.pop()
+        more = large.pop()
+        alias[less] = more
+        prob[more]  = prob[more] + prob[less] - 1.0
+        if (prob[more] < 1.0):
+            small.append(more)
+        else:
+            large.append(more)
+
+    for it in small + large:
+        prob[it] = 1.0
+    return (tuple(prob), tuple(alias))
+
+
+class protocol_graph:
+    def __init__(self, protocols, constraints, start = "ETH"):
+        self.protocols = protocols
+        # Per state tables. Index of list is state id.
+        self.name   = []   # protocol name
+        self.budget = []   # (trill, vlan, mpls, ipv6ext) before protocol is added
+        self.next   = []   # tuple of next state ids (zero weights are removed)
+        self.weight = []   # tuple of weights of next states
+        self.prob   = []   # alias method probability
+        self.alias  = []   # alias method alias
+        self.index  = {}
+        self.count  = None # number of paths from state (memoized)
+
+        self.start = self.compile(start, packet_config(constraints))
+
+    @staticmethod
+    def budget_get(cfg):
+        return (cfg.trill, cfg.vlan, cfg.mpls, cfg.ipv6ext)
+
+    @staticmethod
+    def budget_set(cfg, budget):
+        (cfg.trill, cfg.vlan, cfg.mpls, cfg.ipv6ext) = budget
+
+    def state_add(self, name, budget):
+        key   = (name,) + budget
+        state = len(self.name)
+        self.index[key] = state
+        self.name.append(name)
+        self.budget.append(budget)
+        self.next.append(None)
+        self.weight.append(None)
+        self.prob.append(None)
+        self.alias.append(None)
+        return state
+
+    def compile(self, name, cfg):
+        start = self.state_add(name, self.budget_get(cfg))
+        stack = [start]
+        while (len(stack) > 0):
+            state = stack.pop()
+            cfg_act = cfg.copy()
+            self.budget_set(cfg_act, self.budget[state])
+            # protocol_next update budget in config
+            proto_next = self.protocols[self.name[state]].protocol_next(cfg_act)
+            budget = self.budget_get(cfg_act)
+
+            next_states = []
+            weights     = []
+            for it in proto_next:
+                if (proto_next[it] <= 0):
+                    continue
+                weights.append(proto_next[it])
+                if (it not in self.protocols):
+                    next_states.append(GRAPH_END)
+                    continue
+                key = (it,) + budget
+                if (key not in self.index):
+                    stack.append(self.state_add(it, budget))
+                next_states.append(self.index[key])
+
+            self.next[state]   = tuple(next_states)
+            self.weight[state] = tuple(weights)
+            if (len(next_states) > 0):
+                (self.prob[state], self.alias[state]) = alias_table(weights)
+        return start
+
+    def states(self):
+        return len(self.name)
+
+    def next_sample(self, state):
+        # Return next state or None if state is last.
+        next_states = self.next[state]
+        if (len(next_states) == 0):
+            return None
+        x = random.random() * len(next_states)
+        index = int(x)
+        if (x - index >= self.prob[state][index]):
+            index = self.alias[state][index]
+        return next_states[index]
+
+    def path_count(self, state = None):
+        # Number of paths from state (default start) to end of packet.
+        if (self.count == None):
+            self.count = [None] * self.states()
+        if (state == None):
+            state = self.start
+        if (state == GRAPH_END):
+            return 0
+        if (self.count[state] == None):
+            # Unknown protocol end packet same as state without next protocol.
+            next_states = self.next[state]
+            ret = 0 if len(next_states) > 0 else 1
+            for it in next_states:
+                ret += self.path_count(it) if it != GRAPH_END else 1
+            self.count[state] = ret
+        return self.count[state]
+
+    def unrank(self, rank):
+        # Return list of states of path with index rank in DFS order
+        if (rank < 0 or rank >= self.path_count()):
+            raise IndexError("Path %d is out of range <0, %d)" % (rank, self.path_count()))
+        ret   = []
+        state = self.start
+        while (state != GRAPH_END):
+            ret.append(state)
+            next_state = GRAPH_END
+            for it in self.next[state]:
+                count = self.path_count(it) if it != GRAPH_END else 1
+                if (rank < count):
+                    next_state = it
+                    break
+                rank -= count
+            state = next_state
+        return ret
+
+    def walk(self):
+        # Random walk from start. Return list of visited states.
+        ret   = []
+        state = self.start
+        while (state != None and state != GRAPH_END):
+            ret.append(state)
+            state = self.next_sample(state)
+        return ret
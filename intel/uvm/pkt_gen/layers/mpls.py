@@ -0,0 +1,16 @@
+#!/bin/python3
+
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+#  simple packet generator. MPLS over PPP is not bound by scapy,
+#  PPP protocol number of MPLS unicast is 0x0281 (RFC 3032).
+#
+#  Copyright (C) 2022 CESNET
+#  Author(s):
+#    Radek Iša <isa@cesnet.cz>
+
+import scapy.contrib.mpls
+import scapy.layers.ppp
+import scapy.packet
+
+scapy.packet.bind_layers(scapy.layers.ppp.PPP, scapy.contrib.mpls.MPLS, proto=0x0281)
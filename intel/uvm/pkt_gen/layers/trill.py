@@ -9,7 +9,7 @@
 #  Author(s):
 #    Radek Iša <isa@cesnet.cz>
 
-import scapy.all
+import scapy.layers.l2
 import scapy.packet
 import scapy.fields
 import scapy.utils
@@ -47,7 +47,7 @@ class Trill(scapy.packet.Packet):
             #16bits
             scapy.fields.ShortField("dst_trill_id", 0),
             #Variable lengtih
-            MyStrLenField("data", None, length_from=lambda pkt: pkt.opt_length)
+            MyStrLenField("data", None, length_from=lambda pkt: pkt.opt_length*4)
     ]
 
     def do_build(self):
@@ -83,8 +83,8 @@ class Trill(scapy.packet.Packet):
             return pkt + pay
 
 
-scapy.packet.bind_layers(scapy.all.Ether, Trill, type=0x22f3)
-scapy.packet.bind_layers(scapy.all.Dot1Q, Trill, type=0x22f3)
-scapy.packet.bind_layers(Trill, scapy.all.Ether)
+scapy.packet.bind_layers(scapy.layers.l2.Ether, Trill, type=0x22f3)
+scapy.packet.bind_layers(scapy.layers.l2.Dot1Q, Trill, type=0x22f3)
+scapy.packet.bind_layers(Trill, scapy.layers.l2.Ether)
 
 
@@ -0,0 +1,106 @@
+#!/bin/python3
+
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+#  simple packet generator. Binary metadata sidecar of pcap file.
+#  Every packet in pcap has one fixed size record on the same index,
+#  so checker can find record of packet without parsing of file.
+#
+#  File layout (little endian)
+#    header : magic "PKTM", version, record size, number of layer offsets
+#    record : path id, flags, packet length, number of layers, layer offsets
+#             (0xffff if layer doesn't exist)
+#    paths  : number of paths, for every path length and "/" separated names of scapy layers
+#    footer : file offset of paths
+#  Path id is index to path table. Offsets are in order of layers in path.
+#
+#  Copyright (C) 2022 CESNET
+#  Author(s):
+#    Radek Iša <isa@cesnet.cz>
+
+import struct
+import mmap
+
+META_MAGIC   = 0x4d544b50 # "PKTM"
+META_VERSION = 1
+META_LAYERS  = 16
+META_NONE    = 0xffff
+
+META_HEADER  = struct.Struct("<IHHH")
+META_RECORD  = struct.Struct("<IHHB" + "H" * META_LAYERS)
+META_COUNT   = struct.Struct("<I")
+META_NAME    = struct.Struct("<H")
+META_FOOTER  = struct.Struct("<Q")
+
+# Record flags
+META_ERROR   = 0x1 # packet was truncated by err_probability
+META_PADDED  = 0x2 # zeros were appended after packet
+META_DEEP    = 0x4 # packet has more layers than META_LAYERS, offsets of last layers are missing
+META_PARTIAL = 0x8 # packet cannot be dissected, offsets are missing
+META_MUTANT  = 0x10 # packet is mutant of previous packet, offsets are offsets of previous packet
+
+class meta_writer:
+    def __init__(self, file_name):
+        self.file  = open(file_name, "wb")
+        self.paths = {}
+        self.names = []
+        self.file.write(META_HEADER.pack(META_MAGIC, META_VERSION, META_RECORD.size, META_LAYERS))
+
+    def write(self, names, offsets, length, flags):
+        # names is tuple of scapy layer names, offsets is list of layer offsets
+        path = self.paths.get(names)
+        if (path == None):
+            path = len(self.names)
+            self.paths[names] = path
+            self.names.append(names)
+        if (len(names) > META_LAYERS):
+            flags |= META_DEEP
+        offsets = list(offsets[0:META_LAYERS])
+        offsets = [min(it, META_NONE) for it in offsets] + [META_NONE] * (META_LAYERS - len(offsets))
+        self.file.write(META_RECORD.pack(path, flags, min(length, 0xffff), min(len(names), 0xff), *offsets))
+
+    def close(self):
+        if (self.file == None):
+            return
+        table = self.file.tell()
+        self.file.write(META_COUNT.pack(len(self.names)))
+        for names in self.names:
+            name = "/".join(names).encode()
+            self.file.write(META_NAME.pack(len(name)) + name)
+        self.file.write(META_FOOTER.pack(table))
+        self.file.close()
+        self.file = None
+
+
+class meta_reader:
+    # Sequence of (path, flags, length, offsets). path is tuple of layer names.
+    def __init__(self, file_name):
+        with open(file_name, "rb") as meta_file:
+            self.mem = mmap.mmap(meta_file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.record, self.layers) = META_HEADER.unpack_from(self.mem, 0)
+        if (magic != META_MAGIC or version != META_VERSION):
+            raise ValueError("%s is not pkt_gen metadata file" % (file_name))
+        (table,) = META_FOOTER.unpack_from(self.mem, len(self.mem) - META_FOOTER.size)
+        self.count = (table - META_HEADER.size) // self.record
+
+        self.paths = []
+        (paths,) = META_COUNT.unpack_from(self.mem, table)
+        offset   = table + META_COUNT.size
+        for it in range(paths):
+            (length,) = META_NAME.unpack_from(self.mem, offset)
+            offset   += META_NAME.size
+            self.paths.append(tuple(bytes(self.mem[offset:offset + length]).decode().split("/")))
+            offset   += length
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if (index < 0 or index >= self.count):
+            raise IndexError("Packet %d is not in metadata file" % (index))
+        record = struct.unpack_from(META_RECORD.format, self.mem, META_HEADER.size + index * self.record)
+        (path, flags, length, layers) = record[0:4]
+        return (self.paths[path], flags, length, tuple(record[4:4 + min(layers, self.layers)]))
+
+    def close(self):
+        self.mem.close()
@@ -0,0 +1,118 @@
+#!/bin/python3
+
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+#  simple packet generator. Mutation of built packets (error packets).
+#  Built packet is base of mutants. Base is copied to reusable buffer
+#  and mutated in place, it is not built again. Mutation uses offsets of
+#  layers of base packet. Mutation which cannot be applied (packet doesn't
+#  have required layer) is skipped.
+#
+#  Configuration "packet" : {"mutate" : {"mutants" : 2, "bitflip" : {"rate" : 5, "bits" : 1}, "fcs" : {"rate" : 1}, ...}}
+#    mutants   : maximal number of mutants of one base packet (default 1)
+#    rate      : probability of mutation in percents
+#    bitflip   : flip "bits" random bits
+#    fcs       : append bad FCS
+#    length    : change length field of first IPv4, IPv6, UDP or PPPoE header
+#    ext_trunc : truncate packet inside of IPv6 extension header
+#    trill_opt : change options length of TRILL header
+#    truncate  : truncate packet to random length
+#
+#  Copyright (C) 2022 CESNET
+#  Author(s):
+#    Radek Iša <isa@cesnet.cz>
+
+import random
+import struct
+import zlib
+
+MUTATE_FCS    = struct.Struct("<I")
+MUTATE_SHORT  = struct.Struct("!H")
+# Offset of length field in header
+MUTATE_LENGTH = {"IP" : 2, "IPv6" : 4, "UDP" : 4, "PPPoE" : 4}
+
+def mutate_bitflip(buf, length, names, offsets, cfg):
+    if (length == 0):
+        return None
+    for it in range(cfg.get("bits", 1)):
+        bit = random.randrange(length * 8)
+        buf[bit >> 3] ^= 0x80 >> (bit & 0x7)
+    return length
+
+def mutate_fcs(buf, length, names, offsets, cfg):
+    # Right FCS with flipped bits
+    fcs = zlib.crc32(buf[0:length]) ^ random.randint(1, 0xffffffff)
+    MUTATE_FCS.pack_into(buf, length, fcs)
+    return length + MUTATE_FCS.size
+
+def mutate_length(buf, length, names, offsets, cfg):
+    for (name, offset) in zip(names, offsets):
+        field = MUTATE_LENGTH.get(name)
+        if (field != None and offset + field + 2 <= length):
+            (value,) = MUTATE_SHORT.unpack_from(buf, offset + field)
+            MUTATE_SHORT.pack_into(buf, offset + field, (value + random.randint(1, 0xffff)) & 0xffff)
+            return length
+    return None
+
+def mutate_ext_trunc(buf, length, names, offsets, cfg):
+    headers = [(name, offset) for (name, offset) in zip(names, offsets) if name.startswith("IPv6ExtHdr") and offset + 2 <= length]
+    if (len(headers) == 0):
+        return None
+    (name, offset) = random.choice(headers)
+    # Fragment header has fixed length
+    hdr_len = 8 if name == "IPv6ExtHdrFragment" else (buf[offset + 1] + 1) * 8
+    return min(length, offset + random.randint(1, hdr_len - 1))
+
+def mutate_trill_opt(buf, length, names, offsets, cfg):
+    for (name, offset) in zip(names, offsets):
+        if (name == "Trill" and offset + 2 <= length):
+            (hdr,) = MUTATE_SHORT.unpack_from(buf, offset)
+            opt_length = (((hdr >> 6) & 0x1f) + random.randint(1, 0x1f)) & 0x1f
+            MUTATE_SHORT.pack_into(buf, offset, (hdr & ~(0x1f << 6)) | (opt_length << 6))
+            return length
+    return None
+
+def mutate_truncate(buf, length, names, offsets, cfg):
+    if (length == 0):
+        return None
+    return random.randrange(length)
+
+MUTATE_KINDS = {"bitflip" : mutate_bitflip, "fcs" : mutate_fcs, "length" : mutate_length, "ext_trunc" : mutate_ext_trunc,
+                "trill_opt" : mutate_trill_opt, "truncate" : mutate_truncate}
+
+
+class mutator:
+    def __init__(self, cfg):
+        self.mutants = cfg.get("mutants", 1)
+        self.kinds   = []
+        for (kind, kind_cfg) in cfg.items():
+            if (kind == "mutants"):
+                continue
+            if (kind not in MUTATE_KINDS):
+                raise ValueError("Unknown mutation %s" % (kind))
+            self.kinds.append((kind, MUTATE_KINDS[kind], kind_cfg.get("rate", 0), kind_cfg))
+        self.buf   = bytearray(2048)
+        self.count = {kind : 0 for kind in cfg if kind != "mutants"}
+
+    def mutate(self, data, names, offsets):
+        # Generator of mutants of packet data. names and offsets are layers of packet.
+        mutants = 0
+        for (kind, fn, rate, cfg) in self.kinds:
+            if (mutants >= self.mutants):
+                break
+            if (random.random() * 100 >= rate):
+                continue
+            length = len(data)
+            if (len(self.buf) < length + MUTATE_FCS.size):
+                self.buf = bytearray(2 * (length + MUTATE_FCS.size))
+            view = memoryview(self.buf)
+            view[0:length] = data
+            length = fn(view, length, names, offsets, cfg)
+            if (length != None):
+                mutant = view[0:length].tobytes()
+            view.release()
+            if (length == None):
+                continue
+            mutants += 1
+            self.count[kind] += 1
+            yield mutant
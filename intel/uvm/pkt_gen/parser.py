@@ -10,24 +10,68 @@
 #    Radek Iša <isa@cesnet.cz>
 
 from config import *
-from layers import trill
-import scapy.all
-import scapy.utils
+from template import *
+from raw import *
+from validate import *
+from graph import *
+from writer import *
+from batch import *
+from size import *
+from meta import *
+from dedup import *
+from mutate import *
+import layers
+import scapy.packet
 import scapy.volatile
-import scapy.contrib.mpls
+import importlib
 import random
 import string
 import ipaddress
+import time
+import sys
+
+#################################
+# Helpers
+#################################
+def packet_seed(seed, counter):
+    # Counter based generator (splitmix64). Seed of packet depends only on seed and packet counter.
+    x = (seed + (counter + 1) * 0x9e3779b97f4a7c15) & 0xffffffffffffffff
+    x = ((x ^ (x >> 30)) * 0xbf58476d1ce4e5b9) & 0xffffffffffffffff
+    x = ((x ^ (x >> 27)) * 0x94d049bb133111eb) & 0xffffffffffffffff
+    return x ^ (x >> 31)
+
+def port_fields(config):
+    # Ports are randomized by fuzz if batch is not used
+    if (config.batch == None):
+        return {}
+    port = config.batch.uint("port", 16)
+    return {"sport" : port, "dport" : port}
+
 
 class base_node:
+    # Modules with scapy layers of protocol. They are imported only
+    # if protocol is reachable from start of protocol graph.
+    modules = ()
+
     def __init__(self, name):
         self.name = name
 
+    def load(self):
+        for it in self.modules:
+            importlib.import_module(it)
+
     def name_get(self):
         return self.name
 
+    def protocol_layers(self, config):
+        # List of (scapy layer class, explicit fields) added by protocol
+        return []
+
     def protocol_add(self, config):
-        return None
+        layers = self.protocol_layers(config)
+        if (len(layers) == 0):
+            return None
+        return packet_stack(layers)
 
     def protocol_next(self, config):
         return {}
@@ -45,16 +89,18 @@ class Payload(base_node):
     def __init__(self):
         super().__init__("Payload");
 
-    def protocol_add(self, config):
-        return scapy.all.Raw()
+    def protocol_layers(self, config):
+        return [(scapy.packet.Raw, {})]
 
 
 class TRILL(base_node):
+    modules = ("layers.trill",)
+
     def __init__(self):
         super().__init__("TRILL");
 
-    def protocol_add(self, config):
-        return trill.Trill(version = 0, res=0)
+    def protocol_layers(self, config):
+        return [(layers.trill.Trill, {"version" : 0, "res" : 0})]
 
     def protocol_next(self, config):
         if (config.trill != 0):
@@ -67,26 +113,35 @@ class TRILL(base_node):
 # L7 protocols
 #################################
 class ICMPv4(base_node):
+    modules = ("scapy.layers.inet",)
+
     def __init__(self):
         super().__init__("ICMPv4");
 
-    def protocol_add(self, config):
-        return scapy.all.ICMP()
+    def protocol_layers(self, config):
+        # Timestamps are set explicitly, otherwise scapy fill them from actual time
+        # and generated output is not reproducible.
+        ts = [random.randint(0, 24*60*60*1000-1) for x in range(3)]
+        return [(scapy.layers.inet.ICMP, {"ts_ori" : ts[0], "ts_rx" : ts[1], "ts_tx" : ts[2]})]
 
 
 class ICMPv6(base_node):
+    modules = ("scapy.layers.inet6",)
+
     def __init__(self):
         super().__init__("ICMPv6");
 
-    def protocol_add(self, config):
-        return scapy.all.ICMPv6Unknown()
+    def protocol_layers(self, config):
+        return [(scapy.layers.inet6.ICMPv6Unknown, {})]
 
 class UDP(base_node):
+    modules = ("scapy.layers.inet",)
+
     def __init__(self):
         super().__init__("UDP");
 
-    def protocol_add(self, config):
-        return scapy.all.UDP()
+    def protocol_layers(self, config):
+        return [(scapy.layers.inet.UDP, port_fields(config))]
 
     def protocol_next(self, config):
         proto = { "Empty" : 1, "Payload" : 1 }
@@ -97,11 +152,13 @@ class UDP(base_node):
 
 
 class TCP(base_node):
+    modules = ("scapy.layers.inet",)
+
     def __init__(self):
         super().__init__("TCP");
 
-    def protocol_add(self, config):
-        return scapy.all.TCP()
+    def protocol_layers(self, config):
+        return [(scapy.layers.inet.TCP, port_fields(config))]
 
     def protocol_next(self, config):
         proto = { "Empty" : 1, "Payload" : 1 }
@@ -112,11 +169,13 @@ class TCP(base_node):
 
 
 class SCTP(base_node):
+    modules = ("scapy.layers.sctp",)
+
     def __init__(self):
         super().__init__("SCTP");
 
-    def protocol_add(self, config):
-        return scapy.all.SCTP()
+    def protocol_layers(self, config):
+        return [(scapy.layers.sctp.SCTP, port_fields(config))]
 
     def protocol_next(self, config):
         proto = { "Empty" : 1, "Payload" : 1 }
@@ -130,28 +189,33 @@ class SCTP(base_node):
 # IP protocols
 #################################
 class IPv4(base_node):
+    modules = ("scapy.layers.inet",)
+
     def __init__(self):
         super().__init__("IPv4");
 
-    def protocol_add(self, config):
-        src = None;
-        dst = None;
+    def protocol_layers(self, config):
+        fields = {"version" : 4}
 
         src_rand = config.object_get([self.name, "values", "src"]);
-        if (src_rand != None):
+        if (src_rand != None and config.batch != None):
+            fields["src"] = config.batch.address(self.name + ".src", src_rand, 4)
+        elif (src_rand != None):
             val_range = random.choice(src_rand)
             src_min = int(val_range.get("min"), 0)
             src_max = int(val_range.get("max"), 0)
-            src = str(ipaddress.IPv4Address(random.randint(src_min, src_max)))
+            fields["src"] = str(ipaddress.IPv4Address(random.randint(src_min, src_max)))
 
         dst_rand = config.object_get([self.name, "values", "dst"]);
-        if (dst_rand != None):
+        if (dst_rand != None and config.batch != None):
+            fields["dst"] = config.batch.address(self.name + ".dst", dst_rand, 4)
+        elif (dst_rand != None):
             val_range = random.choice(dst_rand)
             dst_min = int(val_range.get("min"), 0)
             dst_max = int(val_range.get("max"), 0)
-            dst = str(ipaddress.IPv4Address(random.randint(dst_min, dst_max)))
+            fields["dst"] = str(ipaddress.IPv4Address(random.randint(dst_min, dst_max)))
 
-        return scapy.all.IP(version=4, src = src, dst = dst)
+        return [(scapy.layers.inet.IP, fields)]
 
     def protocol_next(self, config):
         proto = { "Payload" : 1, "Empty" : 1, "ICMPv4" : 1, "UDP" : 1, "TCP" : 1, "SCTP" : 1}
@@ -162,12 +226,19 @@ class IPv4(base_node):
 
 
 class IPv6Ext(base_node):
+    modules = ("scapy.layers.inet6",)
+
     def __init__(self):
         super().__init__("IPv6Ext");
 
-    def protocol_add(self, config):
-        possible_protocols = [ scapy.all.IPv6ExtHdrDestOpt(), scapy.all.IPv6ExtHdrFragment(id=random.randint(0, 2**32-1)), scapy.all.IPv6ExtHdrHopByHop(), scapy.all.IPv6ExtHdrRouting() ]
-        return random.choice(possible_protocols)
+    def protocol_layers(self, config):
+        possible_protocols = [ scapy.layers.inet6.IPv6ExtHdrDestOpt, scapy.layers.inet6.IPv6ExtHdrFragment, scapy.layers.inet6.IPv6ExtHdrHopByHop, scapy.layers.inet6.IPv6ExtHdrRouting ]
+        proto = random.choice(possible_protocols)
+        if (proto == scapy.layers.inet6.IPv6ExtHdrFragment):
+            if (config.batch != None):
+                return [(proto, {"id" : config.batch.uint("frag_id", 32)})]
+            return [(proto, {"id" : random.randint(0, 2**32-1)})]
+        return [(proto, {})]
 
     def protocol_next(self, config):
         proto = { "Payload" : 1, "Empty" : 1, "ICMPv4" : 1, "ICMPv6" : 1, "UDP" : 1, "TCP" : 1, "SCTP" : 1, "IPv6Ext" : 1}
@@ -184,28 +255,33 @@ class IPv6Ext(base_node):
 
 
 class IPv6(base_node):
+    modules = ("scapy.layers.inet6",)
+
     def __init__(self):
         super().__init__("IPv6");
 
-    def protocol_add(self, config):
-        src = None;
-        dst = None;
+    def protocol_layers(self, config):
+        fields = {"version" : 6}
 
         src_rand = config.object_get([self.name, "values", "src"]);
-        if (src_rand != None):
+        if (src_rand != None and config.batch != None):
+            fields["src"] = config.batch.address(self.name + ".src", src_rand, 6)
+        elif (src_rand != None):
             val_range = random.choice(src_rand)
             src_min = int(val_range.get("min"), 0)
             src_max = int(val_range.get("max"), 0)
-            src = str(ipaddress.IPv6Address(random.randint(src_min, src_max)))
+            fields["src"] = str(ipaddress.IPv6Address(random.randint(src_min, src_max)))
 
         dst_rand = config.object_get([self.name, "values", "dst"]);
-        if (dst_rand != None):
+        if (dst_rand != None and config.batch != None):
+            fields["dst"] = config.batch.address(self.name + ".dst", dst_rand, 6)
+        elif (dst_rand != None):
             val_range = random.choice(dst_rand)
             dst_min = int(val_range.get("min"), 0)
             dst_max = int(val_range.get("max"), 0)
-            dst = str(ipaddress.IPv6Address(random.randint(dst_min, dst_max)))
+            fields["dst"] = str(ipaddress.IPv6Address(random.randint(dst_min, dst_max)))
 
-        return scapy.all.IPv6(version=6, src = src, dst = dst)
+        return [(scapy.layers.inet6.IPv6, fields)]
 
     def protocol_next(self, config):
         proto = { "Payload" : 1, "Empty" : 1, "ICMPv4" : 1, "ICMPv6" : 1, "UDP" : 1, "TCP" : 1, "SCTP" : 1, "IPv6Ext" : 1}
@@ -218,11 +294,15 @@ class IPv6(base_node):
 # ETHERNET protocols
 #################################
 class MPLS(base_node):
+    modules = ("scapy.contrib.mpls", "layers.mpls")
+
     def __init__(self):
         super().__init__("MPLS");
 
-    def protocol_add(self, config):
-        return scapy.contrib.mpls.MPLS()
+    def protocol_layers(self, config):
+        if (config.batch != None):
+            return [(scapy.contrib.mpls.MPLS, {"label" : config.batch.uint("label", 20)})]
+        return [(scapy.contrib.mpls.MPLS, {})]
 
     def protocol_next(self, config):
         proto   = {"IPv4" : 1, "IPv6" : 1, "MPLS" : 1,"Empty" : 1}
@@ -239,11 +319,13 @@ class MPLS(base_node):
 
 
 class PPP(base_node):
+    modules = ("scapy.layers.ppp",)
+
     def __init__(self):
         super().__init__("PPP");
 
-    def protocol_add(self, config):
-        return scapy.all.PPPoE()/scapy.all.PPP()
+    def protocol_layers(self, config):
+        return [(scapy.layers.ppp.PPPoE, {}), (scapy.layers.ppp.PPP, {})]
 
     def protocol_next(self, config):
         proto = {"IPv4" : 1, "IPv6" : 1, "MPLS" : 1, "Empty" : 1}
@@ -255,12 +337,16 @@ class PPP(base_node):
 
 
 class VLAN(base_node):
+    modules = ("scapy.layers.l2",)
+
     def __init__(self):
         super().__init__("VLAN");
 
-    def protocol_add(self, config):
-        possible_protocols = [ scapy.all.Dot1Q(), scapy.all.Dot1AD() ]
-        return random.choice(possible_protocols)
+    def protocol_layers(self, config):
+        possible_protocols = [ scapy.layers.l2.Dot1Q, scapy.layers.l2.Dot1AD ]
+        if (config.batch != None):
+            return [(random.choice(possible_protocols), {"vlan" : config.batch.uint("vlan", 12)})]
+        return [(random.choice(possible_protocols), {})]
 
     def protocol_next(self, config):
         proto   = {"IPv4" : 1, "IPv6" : 1, "VLAN" : 1 , "TRILL" : 1, "MPLS" : 1, "Empty" : 1, "PPP" : 1}
@@ -279,11 +365,16 @@ class VLAN(base_node):
 
 
 class ETH(base_node):
+    modules = ("scapy.layers.l2",)
+
     def __init__(self):
         super().__init__("ETH");
+        # Volatile value. Every use generate new random MAC address.
+        self.mac = scapy.volatile.RandMAC()
 
-    def protocol_add(self, config):
-        return scapy.all.Ether(src=scapy.volatile.RandMAC(), dst=scapy.volatile.RandMAC())
+    def protocol_layers(self, config):
+        mac = self.mac if config.batch == None else config.batch.mac()
+        return [(scapy.layers.l2.Ether, {"src" : mac, "dst" : mac})]
 
     def protocol_next(self, config):
         proto = {"IPv4" : 1, "IPv6" : 1, "VLAN" : 1, "TRILL" : 1, "MPLS" : 1, "Empty" : 1, "PPP" : 1}
@@ -298,18 +389,79 @@ class ETH(base_node):
 
 
 class parser:
-    def __init__(self, pcap_file, cfg, seed):
+    def __init__(self, pcap_file, cfg, seed, engine = "scapy"):
         self.protocols = {"ETH" : ETH(), "VLAN" : VLAN(), "TRILL" : TRILL(), "PPP" : PPP(), "MPLS" : MPLS(), "IPv6" : IPv6(), "IPv6Ext" : IPv6Ext(),
                 "IPv4" : IPv4(), "TCP" : TCP(), "UDP" : UDP(), "ICMPv6" : ICMPv6(), "ICMPv4" : ICMPv4(), "SCTP" : SCTP(),
                 "Payload" : Payload(), "Empty" : Empty()};
-        self.pcap_file = scapy.utils.PcapWriter(pcap_file, append=False, sync=True)
+        # Sidecar index file of generated packets
+        self.index_file = None
+        # Binary metadata sidecar and record of last built packet
+        self.meta_file  = None
+        self.meta_last  = None
+        # Output is file name or pcap writer object
+        self.pcap_file = None
+        if (isinstance(pcap_file, str)):
+            self.pcap_file = pcap_writer_create(pcap_file)
+        elif (pcap_file != None):
+            self.pcap_file = pcap_file
         self.cfg = None
         if (cfg != None):
             conf_file = open(cfg)
             json_cfg  = conf_file.read()
             conf_file.close();
             self.cfg = json.loads(json_cfg);
+        # Batch randomization of addresses, ports, labels, ...
+        self.batch = None
+        batch_size = json_object_get(self.cfg, ["packet", "batch"])
+        if (batch_size != None and batch_size > 0):
+            if (batch_available()):
+                self.batch = field_batch(seed, batch_size)
+            else:
+                print("numpy is not installed, batch randomization is disabled", file=sys.stderr)
+        # Counter of packet which follows last packet seeded by counter
+        self.batch_next = None
         random.seed(seed)
+        self.seed = seed
+        # Protocol graph compiled to transition tables
+        self.graph = protocol_graph(self.protocols, self.cfg)
+        for it in set(self.graph.name):
+            self.protocols[it].load()
+
+        # "template" engine build packets from cached header templates
+        self.templates = None
+        if (engine == "template"):
+            self.templates = template_cache(json_object_get(self.cfg, ["packet", "template_cache"]))
+        # "raw" engine pack headers by struct without scapy
+        self.raw = None
+        if (engine == "raw"):
+            self.raw = raw_builder()
+        # Every validate_step packet is checked by scapy (0 disable validation)
+        self.validate_step   = 0
+        self.validate_index  = 0
+        self.validate_count  = 0
+        self.validate_errors = 0
+
+        # Duplicate packets are not written
+        self.dedup = None
+        dedup_cfg  = json_object_get(self.cfg, ["packet", "dedup"])
+        if (dedup_cfg != None):
+            self.dedup = packet_dedup(dedup_cfg.get("fp_rate", DEDUP_FP_RATE), dedup_cfg.get("capacity", DEDUP_CAPACITY))
+
+        # Mutants of built packets
+        self.mutator = None
+        self.mutant  = False
+        mutate_cfg   = json_object_get(self.cfg, ["packet", "mutate"])
+        if (mutate_cfg != None):
+            self.mutator = mutator(mutate_cfg)
+
+        # Distribution of packet length
+        self.size = None
+        # Packets truncated by err_probability and packets longer than selected size
+        self.truncated = 0
+        self.oversized = 0
+        size_cfg  = json_object_get(self.cfg, ["packet", "size"])
+        if (size_cfg != None):
+            self.size = size_dist(size_cfg)
 
         pkt_size_min = json_object_get(self.cfg, ["packet", "size_min"]);
         if (pkt_size_min != None):
@@ -317,6 +469,10 @@ class parser:
         else:
             self.pkt_size_min  = 60
 
+        # Time spent in generator stages. Measured only after profile_start.
+        self.profile      = None
+        self.profile_time = 0
+
         pkt_err_probability = json_object_get(self.cfg, ["packet", "err_probability"]);
         if (pkt_err_probability != None):
             self.pkt_err_probability = pkt_err_probability
@@ -325,36 +481,229 @@ class parser:
 
 
     def __del__(self):
-        self.pcap_file.close()
-
-    def gen(self):
-        print("This is Null packet generator and shouldn't be used", file=sys.stderr)
-        pass
-
-    def proto_weight_get(self, dict_items):
-        proto  = []
-        weight = []
-        for key in dict_items:
-            proto.append(key);
-            weight.append(dict_items[key]);
-
-        return (proto, weight)
-
+        self.close()
+
+    def close(self):
+        if (self.index_file != None):
+            self.index_file.close()
+            self.index_file = None
+        if (self.meta_file != None):
+            self.meta_file.close()
+            self.meta_file = None
+        if (self.pcap_file != None):
+            try:
+                self.pcap_file.close()
+            except BrokenPipeError:
+                # Reader of FIFO was closed
+                pass
+            self.pcap_file = None
+
+    def packet_counter(self, index):
+        # Counter of packet random generator. None if packet cannot be generated alone.
+        return None
 
-    def write(self, packet):
-        packet_fuzz = scapy.packet.fuzz(packet)
-        packet_wr   = b""
+    def packet_seed_set(self, counter):
+        random.seed(packet_seed(self.seed, counter))
+        # Batch columns are seeded at start of block and at first packet. Values
+        # depend on packet counter, not on split of packets to shards.
+        if (self.batch != None and (counter != self.batch_next or counter % BATCH_BLOCK == 0)):
+            self.batch.seed(packet_seed(self.seed, counter))
+        self.batch_next = counter + 1
+
+    def packet_at(self, counter):
+        # Return (protocol path, layers) of packet with counter
+        raise ValueError("Algorithm cannot generate single packet")
+
+    def index_open(self, file_name):
+        self.index_file = open(file_name, "w")
+        self.index_file.write("# index offset seed path\n")
+
+    def meta_open(self, file_name):
+        self.meta_file = meta_writer(file_name)
+
+    def meta_offsets(self, layers, data):
+        # Offsets of layers of built packet. Scapy engine packet has to be dissected.
+        if (self.templates != None):
+            return self.templates.offsets
+        if (self.raw != None):
+            return self.raw.offsets
         try:
-            packet_wr = packet_fuzz.build();
-        except:
-            packet_wr = packet.build();
+            return packet_dissect(layers, data)[1]
+        except ValueError:
+            return None
+
+    def meta_record(self, layers, offsets, length, length_err, length_pad):
+        # Lengths of built packet, packet after error generation and packet after padding.
+        # Record is written when packet is written.
+        flags = 0
+        if (offsets == None):
+            offsets = []
+            flags  |= META_PARTIAL
+        if (length_err < length):
+            flags |= META_ERROR
+        if (length_pad > length_err):
+            flags |= META_PADDED
+        return (tuple(proto.__name__ for (proto, fields) in layers), offsets, length_pad, flags)
+
+    def index_write(self, index, path):
+        counter = self.packet_counter(index)
+        seed    = "-" if counter == None else "%d" % (packet_seed(self.seed, counter))
+        self.index_file.write("%d %d %s %s\n" % (index, self.pcap_file.position(), seed, "/".join(path)))
+
+    def gen_only(self, index):
+        # Generate only packet index. Output is same as packet index of whole run.
+        if (self.batch != None):
+            raise ValueError("Single packet cannot be generated with batch randomization (packet.batch)")
+        counter = self.packet_counter(index)
+        if (counter == None):
+            raise ValueError("Packet %d cannot be generated alone by this algorithm" % (index))
+        (path, layers) = self.packet_at(counter)
+        if (self.index_file != None):
+            self.index_write(index, path)
+        data = self.build(layers)
+        if (self.meta_file != None):
+            self.meta_file.write(*self.meta_last)
+        self.write_raw(data, index)
+        return path
+
+    def config_create(self):
+        # Configuration of new packet
+        ret = packet_config(self.cfg)
+        ret.batch = self.batch
+        return ret
+
+    def path_layers(self, states):
+        # Return (protocol path, layers) of packet from list of graph states
+        cfg    = self.config_create()
+        packet = []
+        path   = []
+        for state in states:
+            proto_act = self.protocols[self.graph.name[state]]
+            packet += proto_act.protocol_layers(cfg)
+            path.append(proto_act.name_get())
+        return (tuple(path), packet)
+
+    def packet_iter(self):
+        # Generator of (protocol path, layers) for every generated packet
+        print("This is Null packet generator and shouldn't be used", file=sys.stderr)
+        return iter(())
+
+    def validate_set(self, step):
+        self.validate_step = step
+
+    def validate(self, layers, data):
+        self.validate_index += 1
+        if (self.validate_index < self.validate_step):
+            return
+        self.validate_index = 0
+        self.validate_count += 1
+        err = packet_validate(layers, data)
+        if (err != None):
+            self.validate_errors += 1
+            print("VALIDATE ERROR %s: %s %s" % ([proto.__name__ for (proto, fields) in layers], err, data.hex()), file=sys.stderr)
+
+    def profile_start(self):
+        # Stages are walk (protocol path and layers), fuzz, build, pad (errors and minimal size) and write
+        self.profile      = {"walk" : 0.0, "fuzz" : 0.0, "build" : 0.0, "pad" : 0.0, "write" : 0.0}
+        self.profile_time = time.perf_counter()
+
+    def profile_stage(self, name):
+        # Account time from previous stage to stage name
+        now = time.perf_counter()
+        self.profile[name] += now - self.profile_time
+        self.profile_time   = now
+
+    def build_mutants(self, path, layers):
+        # Generator of (packet bytes, protocol path) of built packet and its mutants
+        data = self.build(layers)
+        self.mutant = False
+        yield (data, path)
+        if (self.mutator == None):
+            return
+        names   = tuple(proto.__name__ for (proto, fields) in layers)
+        offsets = self.meta_offsets(layers, data)
+        base    = self.meta_last
+        for mutant in self.mutator.mutate(data, names, [] if offsets == None else offsets):
+            self.mutant = True
+            if (self.meta_file != None):
+                self.meta_last = (base[0], base[1], len(mutant), base[3] | META_MUTANT)
+            yield (mutant, path)
+
+    def __iter__(self):
+        # Generator of (packet bytes, protocol path)
+        for (path, layers) in self.packet_iter():
+            if (self.profile != None):
+                self.profile_stage("walk")
+            yield from self.build_mutants(path, layers)
 
+    def gen(self):
+        # Return number of written packets. Index of generated packet is used by
+        # sidecar index, it differs from written packets when duplicates are dropped.
+        index     = 0
+        generated = 0
+        for (data, path) in self:
+            # Mutant has index of its base packet
+            if (not self.mutant):
+                generated += 1
+            if (self.dedup != None and self.dedup.seen(data)):
+                continue
+            if (self.index_file != None):
+                self.index_write(generated - 1, path)
+            if (self.meta_file != None):
+                self.meta_file.write(*self.meta_last)
+            self.write_raw(data, index)
+            if (self.profile != None):
+                self.profile_stage("write")
+            index += 1
+        return index
+
+    def build(self, layers):
+        size = None if self.size == None else self.size.sample()
+        if (self.templates != None):
+            packet_wr = self.templates.build(layers, size)
+        elif (self.raw != None):
+            packet_wr = self.raw.build(layers, size)
+        else:
+            packet      = packet_stack(layers)
+            packet_fuzz = scapy.packet.fuzz(packet)
+            if (self.profile != None):
+                self.profile_stage("fuzz")
+            packet_wr   = b""
+            try:
+                if (size != None):
+                    packet_wr = scapy_build_size(packet_fuzz, size)
+                else:
+                    packet_wr = packet_fuzz.build();
+            except:
+                packet_wr = packet.build();
+        if (self.profile != None):
+            self.profile_stage("build")
+        if (self.validate_step > 0):
+            self.validate(layers, packet_wr)
+
+        length = len(packet_wr)
+        if (self.meta_file != None):
+            offsets = self.meta_offsets(layers, packet_wr)
+        if (size != None and length > max(size, self.pkt_size_min)):
+            self.oversized += 1
         # GENERATE ERROR PACKETS
-        if (random.randint(0, 99) < self.pkt_err_probability):
+        truncated = random.randint(0, 99) < self.pkt_err_probability
+        if (truncated):
             packet_wr = packet_wr[0:random.randint(0,len(packet_wr))];
-        # SET MINIMAL SIZE
-        if (len(packet_wr) < self.pkt_size_min):
-            packet_wr += b"\0" * (self.pkt_size_min -len(packet_wr))
-        self.pcap_file.write(packet_wr);
+            self.truncated += 1
+        length_err = len(packet_wr)
+        # SET MINIMAL SIZE. Truncated packet is not padded to selected size, it would look like right packet.
+        size_min = self.pkt_size_min if (size == None or truncated) else max(size, self.pkt_size_min)
+        if (len(packet_wr) < size_min):
+            packet_wr += b"\0" * (size_min -len(packet_wr))
+        if (self.meta_file != None):
+            self.meta_last = self.meta_record(layers, offsets, length, length_err, len(packet_wr))
+        if (self.profile != None):
+            self.profile_stage("pad")
+        return packet_wr
+
+    def write_raw(self, data, index):
+        # Timestamp is derived from packet index so output file is reproducible
+        self.pcap_file.write(data, index // 1000000, index % 1000000)
 
 
@@ -0,0 +1,120 @@
+#!/bin/python3
+
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+#  simple packet generator. Coverage directed random walk.
+#  Coverage item is protocol transition together with stack depth of next
+#  protocol (VLAN in VLAN in VLAN, ...). Random walk prefers transitions
+#  which lead to uncovered items. Generation stops when target coverage
+#  is reached.
+#
+#  Copyright (C) 2022 CESNET
+#  Author(s):
+#    Radek Iša <isa@cesnet.cz>
+
+from config import *
+from parser import *
+
+# Index of protocol in graph budget tuple (trill, vlan, mpls, ipv6ext).
+# Depth of protocol is number of same stack items before it.
+COV_STACK = {"ETH" : 0, "TRILL" : 0, "VLAN" : 1, "MPLS" : 2, "IPv6Ext" : 3}
+
+class parser_cov(parser):
+    def __init__(self, pcap_file, cfg, seed, packets, engine = "scapy", target = 100.0, report_file = None):
+        super().__init__(pcap_file, cfg, seed, engine);
+        self.packets     = packets
+        self.target      = target
+        self.report_file = report_file
+        self.generated   = 0
+
+        # Coverage items of graph edges
+        self.items = {}      # (name, next name, depth) -> item index
+        self.names = []      # item index -> (name, next name, depth)
+        self.hits  = []      # item index -> number of hits
+        self.edge  = []      # state -> tuple of item indexes of next states
+        self.covered = 0
+        for state in range(self.graph.states()):
+            edge = []
+            for it in self.graph.next[state]:
+                edge.append(None if it == GRAPH_END else self.item_add(state, it))
+            self.edge.append(tuple(edge))
+        self.reach = [None] * self.graph.states()
+
+    def depth(self, state):
+        name  = self.graph.name[state]
+        index = COV_STACK.get(name)
+        if (index == None):
+            return 0
+        return self.graph.budget[self.graph.start][index] - self.graph.budget[state][index]
+
+    def item_add(self, state, next_state):
+        key = (self.graph.name[state], self.graph.name[next_state], self.depth(next_state))
+        if (key not in self.items):
+            self.items[key] = len(self.names)
+            self.names.append(key)
+            self.hits.append(0)
+        return self.items[key]
+
+    def coverage(self):
+        if (len(self.names) == 0):
+            return 100.0
+        return 100.0 * self.covered / len(self.names)
+
+    def reach_get(self, state):
+        # True if some uncovered item is reachable from state. Memoized until coverage change.
+        if (self.reach[state] == None):
+            ret = False
+            for (it, item) in zip(self.graph.next[state], self.edge[state]):
+                if (item != None and (self.hits[item] == 0 or self.reach_get(it))):
+                    ret = True
+                    break
+            self.reach[state] = ret
+        return self.reach[state]
+
+    def walk(self):
+        # Weighted random walk restricted to transitions leading to uncovered items.
+        ret   = []
+        state = self.graph.start
+        while (state != None and state != GRAPH_END):
+            ret.append(state)
+            next_states = self.graph.next[state]
+            candidates  = []
+            weights     = []
+            for (it, item, weight) in zip(next_states, self.edge[state], self.graph.weight[state]):
+                if (item != None and (self.hits[item] == 0 or self.reach_get(it))):
+                    candidates.append(it)
+                    weights.append(weight)
+
+            if (len(candidates) > 0):
+                next_state = random.choices(candidates, weights)[0]
+            else:
+                next_state = self.graph.next_sample(state)
+            if (next_state != None and next_state != GRAPH_END):
+                self.hit(self.edge[state][next_states.index(next_state)])
+            state = next_state
+        return ret
+
+    def hit(self, item):
+        if (self.hits[item] == 0):
+            self.covered += 1
+            self.reach = [None] * self.graph.states()
+        self.hits[item] += 1
+
+    def packet_iter(self):
+        self.generated = 0
+        while (self.generated < self.packets and self.coverage() < self.target):
+            self.generated += 1
+            yield self.path_layers(self.walk())
+
+    def report(self):
+        return {"packets" : self.generated, "items" : len(self.names), "covered" : self.covered,
+                "coverage" : self.coverage(), "target" : self.target,
+                "hits" : [{"from" : name, "to" : name_next, "depth" : depth, "hits" : self.hits[index]}
+                    for (index, (name, name_next, depth)) in enumerate(self.names)]}
+
+    def gen(self):
+        packets = super().gen()
+        print("PACKETS %d COVERAGE %.2f%% (%d/%d)" % (packets, self.coverage(), self.covered, len(self.names)))
+        if (self.report_file != None):
+            with open(self.report_file, "w") as report:
+                json.dump(self.report(), report, indent=1)
@@ -3,7 +3,9 @@
 #  SPDX-License-Identifier: BSD-3-Clause
 #
 #  simple packet generator. Packet are generated by dfs algorithm.
-#  In this file is resolving how prototoclols follows.
+#  Paths of protocol graph are numbered in DFS order. Every path is
+#  created by unranking its index, so any index range can be generated
+#  without walking previous paths.
 #
 #  Copyright (C) 2022 CESNET
 #  Author(s):
@@ -12,69 +14,51 @@
 from config import *
 from parser import *
 
-class dfs_item:
-    def __init__(self, protocol, cfg):
-        self.protocol     = protocol
-        self.index        = 0
-        self.cfg          = cfg.copy()
-        proto_next = protocol.protocol_next(self.cfg)
-        self.protocols_next = []
-        for it in proto_next:
-            if (proto_next[it] != 0):
-                self.protocols_next.append(it)
+def dfs_range(graph, start = 0, max_paths = None):
+    # Return range <start, end) of generated path indexes
+    count = graph.path_count()
+    start = min(start, count)
+    end   = count
+    if (max_paths != None):
+        end = min(count, start + max_paths)
+    return (start, end)
 
-    def last(self):
-        return len(self.protocols_next) == 0;
 
-    def next(self):
-        if (self.protocols_next == None or self.index >= len(self.protocols_next)):
-            return None
-
-        ret = self.protocols_next[self.index]
-        self.index += 1
+class parser_dfs(parser):
+    def __init__(self, pcap_file, cfg, seed, engine = "scapy", start = 0, max_paths = None):
+        super().__init__(pcap_file, cfg, seed, engine);
+        self.start     = start
+        self.max_paths = max_paths
+
+    def path_count(self):
+        return self.graph.path_count()
+
+    def path_gen(self, rank):
+        return self.path_layers(self.graph.unrank(rank))
+
+    def packet_counter(self, index):
+        # Path index is counter, packet doesn't depend on start index
+        (start, end) = dfs_range(self.graph, self.start, self.max_paths)
+        return start + index if start + index < end else None
+
+    def packet_at(self, rank):
+        self.packet_seed_set(rank)
+        return self.path_gen(rank)
+
+    def gen_shard(self, start, packets):
+        # Generate paths <start, start + packets). Return list of (data, path, mutant flag).
+        ret = []
+        for rank in range(start, start + packets):
+            (path, packet) = self.packet_at(rank)
+            for (data, path) in self.build_mutants(path, packet):
+                ret.append((data, path, self.mutant))
         return ret
 
-
-class parser_dfs(parser):
-    def __init__(self, pcap_file, cfg, seed):
-        super().__init__(pcap_file, cfg, seed);
+    def packet_iter(self):
+        (start, end) = dfs_range(self.graph, self.start, self.max_paths)
+        for rank in range(start, end):
+            yield self.packet_at(rank)
 
     def gen(self):
-        next_items = []
-
-        cfg_act  = packet_config(self.cfg);
-        item = dfs_item(self.protocols["ETH"], cfg_act);
-        next_items.append(item)
-
-        packets = 0
-        while (len(next_items) > 0):
-            # get last item
-            item = next_items[-1];
-            # get next generated protocol
-            proto_next = item.next()
-
-            if (not item.last()):
-                if (proto_next != None):
-                    item_next = dfs_item(self.protocols[proto_next], item.cfg);
-                    next_items.append(item_next)
-                else:
-                    #remove last index there is no next protocol
-                    del next_items[-1]
-            else:
-                #generate packet
-                packets += 1
-                packet = scapy.packet.Packet()
-
-                for it in next_items:
-                    pkt_proto = it.protocol.protocol_add(it.cfg)
-                    if (pkt_proto != None):
-                        packet     = packet/pkt_proto
-
-                #write packet
-                self.write(packet)
-                #remove last index
-                del next_items[-1]
-
+        packets = super().gen()
         print ("PACKETS %d" % (packets))
-        pass
-
@@ -0,0 +1,142 @@
+#!/bin/python3
+
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+#  simple packet generator. Packets of flows.
+#  Flow table is created once. Flow is protocol path and seed of its
+#  random generator, so table is stored in two arrays. Addresses, ports,
+#  VLAN and MPLS labels of flow are generated from flow seed, other fields
+#  are random for every packet. Flow of next packet is selected by flow
+#  weight (zipf or elephant/mice) and packet timestamp is incremented
+#  by random inter-arrival gap.
+#
+#  Configuration (all values are optional):
+#  "flow" : {"count" : 1024,
+#            "size"  : {"type" : "zipf", "alpha" : 1.0} or
+#                      {"type" : "elephant", "ratio" : 0.1, "weight" : 0.9} or
+#                      {"type" : "uniform"},
+#            "gap"   : {"type" : "exp", "mean" : 1.0} or
+#                      {"type" : "pareto", "alpha" : 1.5, "mean" : 1.0} or
+#                      {"type" : "fixed", "mean" : 1.0}}
+#  Gaps are in microseconds.
+#
+#  Copyright (C) 2022 CESNET
+#  Author(s):
+#    Radek Iša <isa@cesnet.cz>
+
+from config import *
+from parser import *
+import array
+import socket
+
+FLOW_COUNT = 1024
+
+# Fields which are same for all packets of flow and number of random bits
+FLOW_FIELDS = {"Ether" : (("src", 48), ("dst", 48)), "Dot1Q" : (("vlan", 12),), "Dot1AD" : (("vlan", 12),),
+               "MPLS" : (("label", 20),), "IP" : (("src", 32), ("dst", 32)), "IPv6" : (("src", 128), ("dst", 128)),
+               "TCP" : (("sport", 16), ("dport", 16)), "UDP" : (("sport", 16), ("dport", 16)), "SCTP" : (("sport", 16), ("dport", 16))}
+
+def flow_value(name, bits, value):
+    # Convert random number to scapy field value
+    if (name == "Ether"):
+        return ":".join("%02x" % (it) for it in value.to_bytes(6, "big"))
+    if (name == "IP"):
+        return socket.inet_ntop(socket.AF_INET, value.to_bytes(4, "big"))
+    if (name == "IPv6"):
+        return socket.inet_ntop(socket.AF_INET6, value.to_bytes(16, "big"))
+    return value
+
+def flow_weights(count, size):
+    # Relative number of packets of every flow
+    size_type = size.get("type", "zipf")
+    if (size_type == "zipf"):
+        alpha = size.get("alpha", 1.0)
+        return [1.0 / ((it + 1) ** alpha) for it in range(count)]
+    if (size_type == "elephant"):
+        elephants = max(1, int(count * size.get("ratio", 0.1)))
+        weight    = size.get("weight", 0.9)
+        if (elephants >= count):
+            return [1.0] * count
+        return [weight / elephants] * elephants + [(1.0 - weight) / (count - elephants)] * (count - elephants)
+    if (size_type == "uniform"):
+        return [1.0] * count
+    raise ValueError("Unknown flow size distribution %s" % (size_type))
+
+
+class parser_flow(parser):
+    def __init__(self, pcap_file, cfg, seed, packets, engine = "scapy", flows = None):
+        super().__init__(pcap_file, cfg, seed, engine);
+        self.packets = packets
+        # Fields of flow are generated from flow seed. Batch columns don't depend on it.
+        self.batch   = None
+
+        flow_cfg   = json_object_get(self.cfg, ["flow"])
+        flow_cfg   = {} if flow_cfg == None else flow_cfg
+        self.count = flows if flows != None else flow_cfg.get("count", FLOW_COUNT)
+        self.gap   = flow_cfg.get("gap", {"type" : "exp", "mean" : 1.0})
+        if (self.gap.get("type", "exp") not in ("exp", "pareto", "fixed")):
+            raise ValueError("Unknown flow gap distribution %s" % (self.gap.get("type")))
+
+        # Flow table
+        self.paths      = []                # list of tuples of graph states
+        self.path_index = {}
+        self.flow_path  = array.array("I")
+        self.flow_seed  = array.array("Q")
+        for it in range(self.count):
+            path = tuple(self.graph.walk())
+            if (path not in self.path_index):
+                self.path_index[path] = len(self.paths)
+                self.paths.append(path)
+            self.flow_path.append(self.path_index[path])
+            self.flow_seed.append(random.getrandbits(64))
+
+        (self.flow_prob, self.flow_alias) = alias_table(flow_weights(self.count, flow_cfg.get("size", {})))
+        # Timestamp of last packet in microseconds
+        self.time = 0.0
+
+    def flow_sample(self):
+        x = random.random() * self.count
+        index = int(x)
+        if (x - index >= self.flow_prob[index]):
+            index = self.flow_alias[index]
+        return index
+
+    def flow_layers(self, flow):
+        # Layers of flow are generated by flow random generator
+        state = random.getstate()
+        random.seed(self.flow_seed[flow])
+        (path, layers) = self.path_layers(self.paths[self.flow_path[flow]])
+        for (proto, fields) in layers:
+            for (name, bits) in FLOW_FIELDS.get(proto.__name__, ()):
+                value = random.getrandbits(bits)
+                if (name not in fields or hasattr(fields[name], "_fix")):
+                    fields[name] = flow_value(proto.__name__, bits, value)
+        random.setstate(state)
+        return (path, layers)
+
+    def gap_gen(self):
+        gap_type = self.gap.get("type", "exp")
+        mean     = self.gap.get("mean", 1.0)
+        if (gap_type == "exp"):
+            return random.expovariate(1.0 / mean)
+        if (gap_type == "pareto"):
+            alpha = self.gap.get("alpha", 1.5)
+            # Mean of pareto distribution with minimum 1 is alpha/(alpha - 1)
+            return random.paretovariate(alpha) * mean * (alpha - 1) / alpha
+        return mean
+
+    def packet_iter(self):
+        self.time = 0.0
+        for x in range(self.packets):
+            flow = self.flow_sample()
+            self.time += self.gap_gen()
+            yield self.flow_layers(flow)
+
+    def write_raw(self, data, index):
+        # Timestamp of packet which was generated last
+        usec = int(self.time)
+        self.pcap_file.write(data, usec // 1000000, usec % 1000000)
+
+    def gen(self):
+        packets = super().gen()
+        print("PACKETS %d FLOWS %d PATHS %d" % (packets, self.count, len(self.paths)))
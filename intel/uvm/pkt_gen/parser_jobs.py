@@ -0,0 +1,117 @@
+#!/bin/python3
+
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+#  simple packet generator. Packets are generated by random walk or
+#  by DFS path index range in multiple processes. Packet counters are split
+#  to shards aligned to SHARD_PACKETS. Packet random generator is seeded by
+#  packet counter and batch columns are seeded by counter of block start
+#  (BATCH_BLOCK). Shards are merged in shard order, so output file depends
+#  only on seed and not on number of used processes.
+#
+#  Copyright (C) 2022 CESNET
+#  Author(s):
+#    Radek Iša <isa@cesnet.cz>
+
+from parser_rand import *
+from parser_dfs import *
+import multiprocessing
+
+# Number of packet counters in one shard. It has to be multiple of BATCH_BLOCK,
+# shard cannot start inside of batch block.
+SHARD_PACKETS = BATCH_BLOCK
+
+def shard_plan(packets, start = 0):
+    # Return list of (first packet counter, packets)
+    ret   = []
+    first = start
+    end   = start + packets
+    while (first < end):
+        last = min(end, (first // SHARD_PACKETS + 1) * SHARD_PACKETS)
+        ret.append((first, last - first))
+        first = last
+    return ret
+
+
+# Counters of generator which are summed from shards
+SHARD_COUNTERS = ("truncated", "oversized", "validate_count", "validate_errors")
+
+# Generator used by worker process. It is created once per process.
+shard_parser = None
+
+def shard_init(cfg, seed, engine, algorithm, validate):
+    global shard_parser
+    if (algorithm == "dfs"):
+        shard_parser = parser_dfs(None, cfg, seed, engine)
+    else:
+        shard_parser = parser_rand(None, cfg, seed, 0, engine)
+    shard_parser.validate_set(validate)
+
+def shard_gen(arg):
+    # Return (packets, counters, mutants) of shard. Packet is (data, path, mutant flag).
+    (start, packets) = arg
+    for it in SHARD_COUNTERS:
+        setattr(shard_parser, it, 0)
+    # Every Nth packet of shard is validated, it doesn't depend on previous shards of process
+    shard_parser.validate_index = 0
+    mutants = None
+    if (shard_parser.mutator != None):
+        mutants = shard_parser.mutator.count = dict.fromkeys(shard_parser.mutator.count, 0)
+    packets  = shard_parser.gen_shard(start, packets)
+    counters = {it : getattr(shard_parser, it) for it in SHARD_COUNTERS}
+    return (packets, counters, mutants)
+
+
+class parser_jobs(parser):
+    def __init__(self, pcap_file, cfg, seed, packets, jobs, engine = "scapy", algorithm = "rand", start = 0, max_paths = None):
+        super().__init__(pcap_file, cfg, seed, engine);
+        self.cfg_file  = cfg
+        self.engine    = engine
+        self.seed      = seed
+        self.jobs      = jobs
+        self.algorithm = algorithm
+        # DFS generate path index range, random walk generate number of packets
+        self.start     = 0
+        self.packets   = packets
+        if (algorithm == "dfs"):
+            (self.start, end) = dfs_range(self.graph, start, max_paths)
+            self.packets = end - self.start
+
+    def packet_counter(self, index):
+        if (index >= self.packets):
+            return None
+        return self.start + index
+
+    def __iter__(self):
+        shards = shard_plan(self.packets, self.start)
+        init   = (self.cfg_file, self.seed, self.engine, self.algorithm, self.validate_step)
+
+        if (self.jobs <= 1):
+            shard_init(*init)
+            results = map(shard_gen, shards)
+            pool    = None
+        else:
+            pool    = multiprocessing.Pool(self.jobs, shard_init, init)
+            # imap keep order of shards
+            results = pool.imap(shard_gen, shards)
+
+        try:
+            for (packets, counters, mutants) in results:
+                # Counters of shards generated by workers
+                for (name, count) in counters.items():
+                    setattr(self, name, getattr(self, name) + count)
+                if (mutants != None):
+                    for (kind, count) in mutants.items():
+                        self.mutator.count[kind] += count
+                for (data, path, mutant) in packets:
+                    # gen() doesn't count mutant as generated packet
+                    self.mutant = mutant
+                    yield (data, path)
+        finally:
+            if (pool != None):
+                pool.terminate()
+                pool.join()
+
+    def gen(self):
+        packets = super().gen()
+        print("PACKETS %d SHARDS %d JOBS %d" % (packets, len(shard_plan(self.packets, self.start)), max(self.jobs, 1)))
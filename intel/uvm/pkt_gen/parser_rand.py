@@ -13,28 +13,30 @@ from config import *
 from parser import *
 
 class parser_rand(parser):
-    def __init__(self, pcap_file, cfg, seed, packets):
-        super().__init__(pcap_file, cfg, seed);
+    def __init__(self, pcap_file, cfg, seed, packets, engine = "scapy"):
+        super().__init__(pcap_file, cfg, seed, engine);
         self.packets = packets
 
-    def gen(self):
-        for x in range(self.packets):
-            cfg = packet_config(self.cfg)
-            proto_act = self.protocols["ETH"]
-            packet = scapy.packet.Packet()
-
-            while (proto_act != None):
-                pkt_proto = proto_act.protocol_add(cfg)
-                if (pkt_proto != None):
-                    packet     = packet/pkt_proto
-                proto_next = proto_act.protocol_next(cfg)
-                if (len(proto_next) > 0):
-                    (proto_next_indexs, proto_next_weights) = self.proto_weight_get(proto_next)
-                    protocol_next_name = random.choices(proto_next_indexs, proto_next_weights)[0]
-                    proto_act = self.protocols.get(protocol_next_name);
-                else:
-                    proto_act = None
-
-            # End While
-            self.write(packet)
+    def packet_gen(self):
+        return self.path_layers(self.graph.walk())
+
+    def packet_counter(self, index):
+        return index
+
+    def packet_at(self, counter):
+        self.packet_seed_set(counter)
+        return self.packet_gen()
+
+    def gen_shard(self, start, packets):
+        # Generate packets <start, start + packets). Return list of (data, path, mutant flag).
+        ret = []
+        for index in range(start, start + packets):
+            (path, packet) = self.packet_at(index)
+            for (data, path) in self.build_mutants(path, packet):
+                ret.append((data, path, self.mutant))
+        return ret
+
+    def packet_iter(self):
+        for index in range(self.packets):
+            yield self.packet_at(index)
 
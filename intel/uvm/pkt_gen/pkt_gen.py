@@ -9,18 +9,26 @@
 #    Radek Iša <isa@cesnet.cz>
 
 
-from parser_rand import *
-from parser_dfs  import *
-import scapy.utils
+# Generators are imported when they are used. Import of scapy is slow
+# and client of generator server doesn't need it.
+from writer import *
+from server import *
+from cache import *
+from ports import *
 import string
 import argparse
 import time
 import enum
+import stat
+import sys
+import os
 
 class parse_alg(enum.Enum):
     noe  = 'none'
     dfs  = 'dfs'
     rand = 'rand'
+    cov  = 'cov'
+    flow = 'flow'
 
     def __str__(self):
         return self.value
@@ -33,35 +41,217 @@ class parse_alg(enum.Enum):
            ret.append(it.value);
        return ret;
 
-def main():
-    #parse options
+def generator_create(pcap_file, algorithm, packets, seed, conf, engine = "scapy", jobs = None, start = 0, max_paths = None,
+                     cov_target = 100.0, cov_report = None, flows = None):
+    from parser_rand import parser, parser_rand
+    from parser_dfs  import parser_dfs
+    from parser_jobs import parser_jobs
+    from parser_cov  import parser_cov
+    from parser_flow import parser_flow
+    gen = None
+    if (algorithm in (parse_alg.rand, parse_alg.dfs) and jobs != None):
+        gen = parser_jobs(pcap_file, conf, seed, packets, jobs, engine, str(algorithm), start, max_paths)
+    elif (algorithm == parse_alg.rand):
+        gen = parser_rand(pcap_file, conf, seed, packets, engine)
+    elif (algorithm == parse_alg.dfs):
+        gen = parser_dfs(pcap_file, conf, seed, engine, start, max_paths)
+    elif (algorithm == parse_alg.cov):
+        gen = parser_cov(pcap_file, conf, seed, packets, engine, cov_target, cov_report)
+    elif (algorithm == parse_alg.flow):
+        gen = parser_flow(pcap_file, conf, seed, packets, engine, flows)
+    if (gen == None):
+        gen = parser(pcap_file, conf, seed, engine)
+    return gen
+
+def generate(algorithm = parse_alg.rand, packets = 20, seed = 0, conf = None, engine = "scapy", jobs = None, start = 0, max_paths = None,
+             cov_target = 100.0):
+    # Streaming API. Return iterator of (packet bytes, protocol path) tuples.
+    return iter(generator_create(None, parse_alg(str(algorithm)), packets, seed, conf, engine, jobs, start, max_paths, cov_target))
+
+def path_count(conf = None):
+    # Number of packets generated by dfs algorithm
+    from parser_dfs import parser_dfs
+    return parser_dfs(None, conf, 0).path_count()
+
+def arg_parser_create():
     arg_parser = argparse.ArgumentParser()
     arg_parser.add_argument("-f", "--file_output", type=str,
-                        help="Set output file", required=True)
+                        help="Set output file (- is standard output)", default=None)
     arg_parser.add_argument("-p", "--packets", type=int,
-                        help="number of generated packets", default=20)
+                        help="number of generated packets (maximal number for cov algorithm)", default=20)
     arg_parser.add_argument("-a", "--algorithm", type=parse_alg,
                         help=("parse algorithms possible values [" + ' '.join(parse_alg.values()) + "]"), default="rand")
     arg_parser.add_argument("-s", "--seed", type=int,
                         help="set seed to random generator", default=int(time.time()*1000))
     arg_parser.add_argument("-c", "--conf", type=str,
                         help="Configrutation of random genertor for protocols in JSON", default=None)
+    arg_parser.add_argument("-e", "--engine", type=str, choices=["scapy", "template", "raw"],
+                        help="packet build engine. template build packets from cached header templates, raw pack headers without scapy", default="scapy")
+    arg_parser.add_argument("--validate", type=int,
+                        help="rebuild every Nth packet by scapy and compare it with generated packet (template and raw engine)", default=0)
+    arg_parser.add_argument("-j", "--jobs", type=int,
+                        help="generate packets in N processes (rand and dfs algorithm). Output depends only on seed, not on N", default=None)
+    arg_parser.add_argument("--start-index", type=int,
+                        help="dfs algorithm: index of first generated path", default=0)
+    arg_parser.add_argument("--max-paths", type=int,
+                        help="dfs algorithm: maximal number of generated paths", default=None)
+    arg_parser.add_argument("--count-paths", action="store_true",
+                        help="print number of paths generated by dfs algorithm and exit")
+    arg_parser.add_argument("--cov-target", type=float,
+                        help="cov algorithm: stop when protocol transition coverage reach this percentage", default=100.0)
+    arg_parser.add_argument("--cov-report", type=str,
+                        help="cov algorithm: write coverage report to file (JSON)", default=None)
+    arg_parser.add_argument("--flows", type=int,
+                        help="flow algorithm: number of flows (overrides flow count in configuration)", default=None)
+    arg_parser.add_argument("--index", type=str,
+                        help="write sidecar index (packet index, pcap offset, packet seed, protocol path) to file", default=None)
+    arg_parser.add_argument("--meta", type=str,
+                        help="write binary metadata sidecar (path id, layer offsets, flags) of every packet to file", default=None)
+    arg_parser.add_argument("--only-index", type=int,
+                        help="generate only packet with this index (rand and dfs algorithm). Other arguments have to be same as in original run", default=None)
+    arg_parser.add_argument("--cache", type=str,
+                        help="directory of generated pcap cache. Same request is generated only once", default=None)
+    arg_parser.add_argument("--cache-size", type=int,
+                        help="maximal size of pcap cache in MB", default=CACHE_SIZE >> 20)
+    arg_parser.add_argument("--ports", type=str, nargs="+",
+                        help="write packets to pcap file of every port instead of one output file", default=None)
+    arg_parser.add_argument("--port-dist", type=str, choices=PORT_DIST,
+                        help="select port of packet by round robin, weight or flow hash", default="rr")
+    arg_parser.add_argument("--port-weights", type=lambda arg : [int(it) for it in arg.split(",")],
+                        help="comma separated weights of ports for weight distribution", default=None)
+    arg_parser.add_argument("-w", "--writer", type=str, choices=WRITERS,
+                        help="output writer. pcap/pcapng are buffered, mmap write to preallocated memory mapped file, scapy is original PcapWriter, "
+                             "ring is shared memory ring buffer read by consumer while packets are generated", default="pcap")
+    arg_parser.add_argument("--ring-size", type=int,
+                        help="size of ring buffer in kB (ring writer)", default=RING_SIZE >> 10)
+    arg_parser.add_argument("--fifo", action="store_true",
+                        help="output file is named pipe (created if not exist). Reader can consume packets while they are generated")
+    arg_parser.add_argument("--server", type=str,
+                        help="run generator server on UNIX socket. Requests are processed without import of scapy")
+    arg_parser.add_argument("--client", type=str,
+                        help="send request to generator server on UNIX socket")
+    return arg_parser
+
+def run(argv):
+    # Generate packets. Return exit code.
+    arg_parser = arg_parser_create()
+    args = arg_parser.parse_args(argv)
+    if (args.count_paths):
+        print("PATHS %d" % (path_count(args.conf)))
+        return 0
+    if (args.file_output == None and args.ports == None):
+        arg_parser.error("the following arguments are required: -f/--file_output")
+    if (args.ports != None and (args.file_output != None or args.index != None or args.meta != None)):
+        # Position of packet in file is known only for one output
+        arg_parser.error("--ports cannot be used with -f, --index and --meta")
+    if (args.writer == "ring" and (args.file_output == "-" or args.fifo)):
+        arg_parser.error("ring writer cannot write to standard output or named pipe")
+    if (args.validate > 0 and args.engine == "scapy"):
+        # Fuzzed variable length fields (options) of scapy engine are not rebuilt same
+        arg_parser.error("--validate is supported by template and raw engine")
+    if (args.file_output == "-"):
+        # Standard output is used by packets
+        sys.stdout = sys.stderr
 
-    args = arg_parser.parse_args()
     print("SEED      : " + f'{args.seed}')
     print("ALGORITHM : " + f'{args.algorithm}')
+    print("ENGINE    : " + f'{args.engine}')
+
+    if (args.fifo):
+        for file_output in (args.ports if args.ports != None else [args.file_output]):
+            if (not os.path.exists(file_output)):
+                os.mkfifo(file_output)
+            elif (not stat.S_ISFIFO(os.stat(file_output).st_mode)):
+                print("Output file %s exists and it is not named pipe" % (file_output), file=sys.stderr)
+                return 1
 
+    # Sidecar files, single packet, multiple ports and ring are not cached.
+    # Cached ring would be already consumed (tail is equal to head).
+    if (args.cache != None and args.index == None and args.meta == None and args.only_index == None and args.cov_report == None
+            and args.ports == None and args.writer != "ring"):
+        return run_cache(args)
+    return run_gen(args)
+
+def run_cache(args):
+    cache = pcap_cache(args.cache, args.cache_size << 20)
+    # Arguments which change generated pcap
+    key   = cache_key({"algorithm" : str(args.algorithm), "packets" : args.packets, "seed" : args.seed, "engine" : args.engine,
+                       "start" : args.start_index, "max_paths" : args.max_paths, "cov_target" : args.cov_target,
+                       "flows" : args.flows, "writer" : args.writer}, args.conf)
+    with cache.lock(key):
+        if (cache.get(key, args.file_output)):
+            print("CACHE     : hit " + key)
+            return 0
+        print("CACHE     : miss " + key)
+        code = run_gen(args)
+        # Content of named pipe cannot be read again
+        if (code == 0 and args.file_output != "-" and not args.fifo):
+            cache.put(key, args.file_output)
+    return code
+
+def run_gen(args):
     #args.seed = 1667909888.37288 ./pkt_gen.py -f test.pcap -p 189 result in error
-    gen = parser(args.file_output, args.conf, args.seed)
+    if (args.ports != None):
+        writer = port_writer(args.ports, args.writer, args.fifo, args.port_dist, args.port_weights, args.seed, args.ring_size << 10)
+    else:
+        writer = pcap_writer_create(args.file_output, args.writer, args.fifo, args.ring_size << 10)
+    # Single packet and sidecar files are generated by one process
+    jobs   = args.jobs if args.only_index == None and args.meta == None and args.index == None else None
+    gen = generator_create(writer, args.algorithm, args.packets, args.seed, args.conf, args.engine, jobs,
+                           args.start_index, args.max_paths, args.cov_target, args.cov_report, args.flows)
 
-    if (args.algorithm == parse_alg.rand):
-        gen = parser_rand(args.file_output, args.conf, args.seed, args.packets)
-    if (args.algorithm == parse_alg.dfs):
-        gen = parser_dfs(args.file_output, args.conf, args.seed)
+    gen.validate_set(args.validate)
+    if (args.index != None):
+        gen.index_open(args.index)
+    if (args.meta != None):
+        gen.meta_open(args.meta)
 
     #run generator
-    gen.gen();
+    try:
+        if (args.only_index != None):
+            path = gen.gen_only(args.only_index)
+            print("PACKET %d PATH %s" % (args.only_index, "/".join(path)))
+        else:
+            gen.gen();
+    except ValueError as err:
+        print(err, file=sys.stderr)
+        gen.close()
+        return 1
+    except BrokenPipeError:
+        print("Reader closed output before all packets were generated", file=sys.stderr)
+    gen.close()
+    if (args.validate > 0):
+        print("VALIDATED %d ERRORS %d" % (gen.validate_count, gen.validate_errors))
+    if (gen.truncated > 0):
+        print("TRUNCATED %d" % (gen.truncated))
+    if (gen.oversized > 0):
+        print("OVERSIZED %d" % (gen.oversized))
+    if (gen.mutator != None):
+        print("MUTANTS " + " ".join("%s %d" % (kind, count) for (kind, count) in gen.mutator.count.items()))
+    if (gen.dedup != None):
+        print("DUPLICATES %d (filter %d kB)" % (gen.dedup.duplicates, gen.dedup.memory() >> 10))
+    if (args.ports != None):
+        for (port, packets) in enumerate(writer.packets):
+            print("PORT %d PACKETS %d" % (port, packets))
+    return 0
+
+def client_argv(argv):
+    # Request arguments are argv without --client (both "--client PATH" and "--client=PATH")
+    client_parser = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    client_parser.add_argument("--client", type=str)
+    return client_parser.parse_known_args(argv)[1]
+
+def main():
+    args = arg_parser_create().parse_args()
+    if (args.server != None):
+        # Import all generator layers before requests are forked
+        generator_create(None, parse_alg.rand, 0, 0, None)
+        server_run(args.server, run)
+        return 0
+    if (args.client != None):
+        return client_run(args.client, client_argv(sys.argv[1:]), args.file_output == "-")
+    return run(sys.argv[1:])
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
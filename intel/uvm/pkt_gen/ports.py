@@ -0,0 +1,95 @@
+#!/bin/python3
+
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+#  simple packet generator. Output to multiple ports.
+#  One generator writes packets to pcap file of every port. Port of packet
+#  is selected by round robin, by weight or by hash of packet flow
+#  (addresses and ports found behind VLAN tags), so one flow is always
+#  on one port. Port writer has same interface as pcap writer.
+#
+#  Copyright (C) 2022 CESNET
+#  Author(s):
+#    Radek Iša <isa@cesnet.cz>
+
+from writer import *
+import multiprocessing.pool
+import itertools
+import random
+import zlib
+
+PORT_DIST = ("rr", "weight", "flow")
+
+ETHER_VLAN = (0x8100, 0x88a8, 0x9100)
+ETHER_IPV4 = 0x0800
+ETHER_IPV6 = 0x86dd
+# IP protocols with source and destination port in first four bytes
+IP_PORTS   = (6, 17, 132)
+
+def flow_key(data):
+    # Return bytes which identify flow of packet
+    offset = 12
+    ether  = int.from_bytes(data[offset:offset + 2], "big")
+    while (ether in ETHER_VLAN):
+        offset += 4
+        ether   = int.from_bytes(data[offset:offset + 2], "big")
+    offset += 2
+    if (ether == ETHER_IPV4 and len(data) >= offset + 20):
+        ihl   = (data[offset] & 0xf) * 4
+        proto = data[offset + 9]
+        key   = data[offset + 9:offset + 10] + data[offset + 12:offset + 20]
+        if (proto in IP_PORTS and (int.from_bytes(data[offset + 6:offset + 8], "big") & 0x1fff) == 0):
+            key += data[offset + ihl:offset + ihl + 4]
+        return key
+    if (ether == ETHER_IPV6 and len(data) >= offset + 40):
+        proto = data[offset + 6]
+        key   = data[offset + 6:offset + 7] + data[offset + 8:offset + 40]
+        if (proto in IP_PORTS):
+            key += data[offset + 40:offset + 44]
+        return key
+    # Other protocols are distributed by MAC addresses and first label or type
+    return data[0:offset + 4]
+
+
+class port_writer:
+    def __init__(self, file_names, writer = "pcap", fifo = False, dist = "rr", weights = None, seed = 0, ring_size = RING_SIZE):
+        if (dist not in PORT_DIST):
+            raise ValueError("Unknown port distribution %s" % (dist))
+        # Writers are created concurrently, reader of named pipe can open ports in any order
+        with multiprocessing.pool.ThreadPool(len(file_names)) as pool:
+            self.ports = pool.map(lambda file_name : pcap_writer_create(file_name, writer, fifo, ring_size), file_names)
+        self.dist    = dist
+        weights      = [1] * len(self.ports) if weights == None else weights
+        if (len(weights) != len(self.ports)):
+            raise ValueError("Number of port weights is different from number of ports")
+        self.index   = range(len(self.ports))
+        self.weights = list(itertools.accumulate(weights))
+        # Own random generator, generated packets don't depend on number of ports
+        self.random  = random.Random(seed)
+        self.next    = 0
+        self.packets = [0] * len(self.ports)
+
+    def select(self, data):
+        if (self.dist == "rr"):
+            ret = self.next
+            self.next = (self.next + 1) % len(self.ports)
+            return ret
+        if (self.dist == "weight"):
+            return self.random.choices(self.index, cum_weights=self.weights)[0]
+        return zlib.crc32(flow_key(data)) % len(self.ports)
+
+    def write(self, data, sec = 0, usec = 0):
+        port = self.select(data)
+        self.packets[port] += 1
+        self.ports[port].write(data, sec, usec)
+
+    def position(self):
+        raise ValueError("Position in file is not known before port is selected")
+
+    def flush(self):
+        for it in self.ports:
+            it.flush()
+
+    def close(self):
+        for it in self.ports:
+            it.close()
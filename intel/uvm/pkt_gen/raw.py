@@ -0,0 +1,256 @@
+#!/bin/python3
+
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+#  simple packet generator. Header builder without scapy.
+#  Headers are packed by struct directly to one preallocated buffer.
+#  Fields are randomized same way as by scapy.packet.fuzz(). Type and
+#  protocol fields are set to number of next header. Lengths and checksums
+#  are computed by fixups.
+#
+#  Copyright (C) 2022 CESNET
+#  Author(s):
+#    Radek Iša <isa@cesnet.cz>
+
+from fixup import *
+from batch import *
+import random
+import socket
+import struct
+
+# Size of random payload. Same as scapy fuzz() of Raw layer.
+RAW_PAYLOAD_MAX = 1200
+# Maximal size of one header (TRILL with 31 options words)
+RAW_HEADER_MAX  = 256
+
+# Number of next header. Layer is identified by scapy class name.
+RAW_ETHER_TYPE = {"Dot1Q" : 0x8100, "Dot1AD" : 0x88a8, "Trill" : 0x22f3, "PPPoE" : 0x8864, "MPLS" : 0x8847,
+                  "IP" : 0x0800, "IPv6" : 0x86dd}
+RAW_PPP_PROTO  = {"IP" : 0x0021, "IPv6" : 0x0057, "MPLS" : 0x0281}
+RAW_IP_PROTO   = {"IPv6ExtHdrHopByHop" : 0, "ICMP" : 1, "IP" : 4, "TCP" : 6, "UDP" : 17, "IPv6" : 41,
+                  "IPv6ExtHdrRouting" : 43, "IPv6ExtHdrFragment" : 44, "ICMPv6Unknown" : 58,
+                  "IPv6ExtHdrDestOpt" : 60, "MPLS" : 137, "SCTP" : 132}
+
+# ICMP types with id and seq fields
+RAW_ICMP_ID_SEQ = (0, 8, 13, 14, 15, 16, 17, 18, 37, 38)
+
+RAW_ETHER    = struct.Struct("!6s6sH")
+RAW_VLAN     = struct.Struct("!HH")
+RAW_TRILL    = struct.Struct("!HHH")
+RAW_PPPOE    = struct.Struct("!BBHH")
+RAW_PPP      = struct.Struct("!H")
+RAW_MPLS     = struct.Struct("!I")
+RAW_IP       = struct.Struct("!BBHHHBBH4s4s")
+RAW_IPV6     = struct.Struct("!IHBB16s16s")
+RAW_IPV6_OPT = struct.Struct("!BB6s")
+RAW_ROUTING  = struct.Struct("!BBBBI")
+RAW_FRAGMENT = struct.Struct("!BBHI")
+RAW_ICMP     = struct.Struct("!BBH")
+RAW_UDP      = struct.Struct("!HHHH")
+RAW_TCP      = struct.Struct("!HHIIHHHH")
+RAW_SCTP     = struct.Struct("!HHII")
+
+
+def value_int(fields, name, bits):
+    # Explicit value of field or random number. Fields are not compared with None
+    # because batch columns are volatile values.
+    if (name not in fields):
+        return random.getrandbits(bits)
+    value = fields[name]
+    if (isinstance(value, batch_column)):
+        return int.from_bytes(value.take(), "big")
+    if (hasattr(value, "_fix")):
+        value = value._fix()
+    return int(value) & ((1 << bits) - 1)
+
+def value_mac(fields, name):
+    if (name not in fields):
+        return random.randbytes(6)
+    value = fields[name]
+    if (isinstance(value, batch_column)):
+        return value.take()
+    if (hasattr(value, "_fix")):
+        value = value._fix()
+    return bytes.fromhex(str(value).replace(":", ""))
+
+def value_ip(fields, name, family):
+    if (name not in fields):
+        return random.randbytes(4 if family == socket.AF_INET else 16)
+    value = fields[name]
+    if (isinstance(value, batch_column)):
+        return value.take()
+    if (hasattr(value, "_fix")):
+        value = value._fix()
+    return socket.inet_pton(family, str(value))
+
+def next_number(table, name, bits):
+    # Number of next header or random number if next header is unknown
+    ret = table.get(name)
+    if (ret == None):
+        ret = random.getrandbits(bits)
+    return ret
+
+
+def raw_ether(buf, off, fields, name_next):
+    RAW_ETHER.pack_into(buf, off, value_mac(fields, "dst"), value_mac(fields, "src"),
+                        next_number(RAW_ETHER_TYPE, name_next, 16))
+    return RAW_ETHER.size
+
+def raw_vlan(buf, off, fields, name_next):
+    tci = (value_int(fields, "prio", 3) << 13) | (value_int(fields, "dei", 1) << 12) | value_int(fields, "vlan", 12)
+    RAW_VLAN.pack_into(buf, off, tci, next_number(RAW_ETHER_TYPE, name_next, 16))
+    return RAW_VLAN.size
+
+def raw_trill(buf, off, fields, name_next):
+    # Same as Trill.do_build, options length is random and options are random data
+    opt_length = value_int(fields, "opt_length", 5)
+    hdr = (value_int(fields, "version", 2) << 14) | (value_int(fields, "res", 2) << 12) | (value_int(fields, "m", 1) << 11)
+    hdr |= (opt_length << 6) | value_int(fields, "hop_count", 6)
+    RAW_TRILL.pack_into(buf, off, hdr, value_int(fields, "src_trill_id", 16), value_int(fields, "dst_trill_id", 16))
+    buf[off + RAW_TRILL.size:off + RAW_TRILL.size + opt_length*4] = random.randbytes(opt_length*4)
+    return RAW_TRILL.size + opt_length*4
+
+def raw_pppoe(buf, off, fields, name_next):
+    code = 0 if name_next == "PPP" else value_int(fields, "code", 8)
+    RAW_PPPOE.pack_into(buf, off, (value_int(fields, "version", 4) << 4) | value_int(fields, "type", 4), code,
+                        value_int(fields, "sessionid", 16), 0)
+    return RAW_PPPOE.size
+
+def raw_ppp(buf, off, fields, name_next):
+    proto = RAW_PPP_PROTO.get(name_next)
+    if (proto == None):
+        # Protocol number have even high byte and odd low byte (RFC 1661)
+        proto = (value_int(fields, "proto", 16) & 0xfeff) | 0x0001
+    RAW_PPP.pack_into(buf, off, proto)
+    return RAW_PPP.size
+
+def raw_mpls(buf, off, fields, name_next):
+    label = (value_int(fields, "label", 20) << 12) | (value_int(fields, "cos", 3) << 9) | value_int(fields, "ttl", 8)
+    if (name_next != "MPLS"):
+        label |= 1 << 8 # bottom of stack
+    RAW_MPLS.pack_into(buf, off, label)
+    return RAW_MPLS.size
+
+def raw_ip(buf, off, fields, name_next):
+    # Fragment offset is zero if next header is known
+    frag = 0 if name_next in RAW_IP_PROTO else value_int(fields, "frag", 13)
+    RAW_IP.pack_into(buf, off, (value_int(fields, "version", 4) << 4) | 5, value_int(fields, "tos", 8), 0,
+                     value_int(fields, "id", 16), (value_int(fields, "flags", 3) << 13) | frag,
+                     value_int(fields, "ttl", 8), next_number(RAW_IP_PROTO, name_next, 8), 0,
+                     value_ip(fields, "src", socket.AF_INET), value_ip(fields, "dst", socket.AF_INET))
+    return RAW_IP.size
+
+def raw_ipv6(buf, off, fields, name_next):
+    ver = (value_int(fields, "version", 4) << 28) | (value_int(fields, "tc", 8) << 20) | value_int(fields, "fl", 20)
+    RAW_IPV6.pack_into(buf, off, ver, 0, next_number(RAW_IP_PROTO, name_next, 8), value_int(fields, "hlim", 8),
+                       value_ip(fields, "src", socket.AF_INET6), value_ip(fields, "dst", socket.AF_INET6))
+    return RAW_IPV6.size
+
+def raw_ipv6_opt(buf, off, fields, name_next):
+    # Hop by hop and destination options without options. Padded by PadN option.
+    RAW_IPV6_OPT.pack_into(buf, off, next_number(RAW_IP_PROTO, name_next, 8), 0, b"\x01\x04\0\0\0\0")
+    return RAW_IPV6_OPT.size
+
+def raw_routing(buf, off, fields, name_next):
+    RAW_ROUTING.pack_into(buf, off, next_number(RAW_IP_PROTO, name_next, 8), 0, value_int(fields, "type", 8), 0,
+                          value_int(fields, "reserved", 32))
+    return RAW_ROUTING.size
+
+def raw_fragment(buf, off, fields, name_next):
+    frag = (value_int(fields, "offset", 13) << 3) | (value_int(fields, "res2", 2) << 1) | value_int(fields, "m", 1)
+    RAW_FRAGMENT.pack_into(buf, off, next_number(RAW_IP_PROTO, name_next, 8), value_int(fields, "res1", 8), frag,
+                           value_int(fields, "id", 32))
+    return RAW_FRAGMENT.size
+
+def raw_icmp(buf, off, fields, name_next):
+    # Layout depends on ICMP type same as scapy ICMP conditional fields
+    icmp_type = value_int(fields, "type", 8)
+    RAW_ICMP.pack_into(buf, off, icmp_type, value_int(fields, "code", 8), 0)
+    data = b""
+    if (icmp_type in RAW_ICMP_ID_SEQ):
+        data += struct.pack("!HH", value_int(fields, "id", 16), value_int(fields, "seq", 16))
+    if (icmp_type in (13, 14)):
+        data += struct.pack("!III", value_int(fields, "ts_ori", 32), value_int(fields, "ts_rx", 32), value_int(fields, "ts_tx", 32))
+    if (icmp_type == 5):
+        data += value_ip(fields, "gw", socket.AF_INET)
+    if (icmp_type == 12):
+        data += struct.pack("!B", value_int(fields, "ptr", 8))
+    if (icmp_type in (3, 11)):
+        data += struct.pack("!B", value_int(fields, "reserved", 8))
+    if (icmp_type in (3, 11, 12)):
+        data += struct.pack("!B", value_int(fields, "length", 8))
+    if (icmp_type in (17, 18)):
+        data += value_ip(fields, "addr_mask", socket.AF_INET)
+    if (icmp_type == 3):
+        data += struct.pack("!H", value_int(fields, "nexthopmtu", 16))
+    if (icmp_type in (11, 12)):
+        data += struct.pack("!H", value_int(fields, "unused", 16))
+    elif (icmp_type not in (0, 3, 5, 8, 11, 12, 13, 14, 15, 16, 17, 18)):
+        data += struct.pack("!I", value_int(fields, "unused", 32))
+    buf[off + RAW_ICMP.size:off + RAW_ICMP.size + len(data)] = data
+    return RAW_ICMP.size + len(data)
+
+def raw_icmpv6(buf, off, fields, name_next):
+    RAW_ICMP.pack_into(buf, off, value_int(fields, "type", 8), value_int(fields, "code", 8), 0)
+    return RAW_ICMP.size
+
+def raw_udp(buf, off, fields, name_next):
+    RAW_UDP.pack_into(buf, off, value_int(fields, "sport", 16), value_int(fields, "dport", 16), 0, 0)
+    return RAW_UDP.size
+
+def raw_tcp(buf, off, fields, name_next):
+    flags = (5 << 12) | (value_int(fields, "reserved", 3) << 9) | value_int(fields, "flags", 9)
+    RAW_TCP.pack_into(buf, off, value_int(fields, "sport", 16), value_int(fields, "dport", 16), value_int(fields, "seq", 32),
+                      value_int(fields, "ack", 32), flags, value_int(fields, "window", 16), 0, value_int(fields, "urgptr", 16))
+    return RAW_TCP.size
+
+def raw_sctp(buf, off, fields, name_next):
+    RAW_SCTP.pack_into(buf, off, value_int(fields, "sport", 16), value_int(fields, "dport", 16), value_int(fields, "tag", 32), 0)
+    return RAW_SCTP.size
+
+def raw_payload(buf, off, fields, name_next):
+    length = random.randint(0, RAW_PAYLOAD_MAX)
+    buf[off:off + length] = random.randbytes(length)
+    return length
+
+
+RAW_BUILDERS = {"Ether" : raw_ether, "Dot1Q" : raw_vlan, "Dot1AD" : raw_vlan, "Trill" : raw_trill,
+                "PPPoE" : raw_pppoe, "PPP" : raw_ppp, "MPLS" : raw_mpls, "IP" : raw_ip, "IPv6" : raw_ipv6,
+                "IPv6ExtHdrHopByHop" : raw_ipv6_opt, "IPv6ExtHdrDestOpt" : raw_ipv6_opt,
+                "IPv6ExtHdrRouting" : raw_routing, "IPv6ExtHdrFragment" : raw_fragment,
+                "ICMP" : raw_icmp, "ICMPv6Unknown" : raw_icmpv6, "UDP" : raw_udp, "TCP" : raw_tcp, "SCTP" : raw_sctp,
+                "Raw" : raw_payload}
+
+
+class raw_builder:
+    def __init__(self):
+        self.buf = bytearray(RAW_HEADER_MAX * 16 + RAW_PAYLOAD_MAX)
+        self.offsets = []
+
+    def build(self, layers, size = None):
+        # layers is list of (scapy layer class, explicit fields). Only class name is used.
+        # size is required packet length, payload length is computed from it.
+        buf     = self.buf
+        names   = [proto.__name__ for (proto, fields) in layers] + [None]
+        offset  = 0
+        headers = []
+        for (index, (proto, fields)) in enumerate(layers):
+            builder = RAW_BUILDERS.get(names[index])
+            if (builder == None):
+                raise ValueError("Raw engine doesn't support layer %s" % (names[index]))
+            if (len(buf) < offset + RAW_HEADER_MAX + RAW_PAYLOAD_MAX):
+                buf.extend(bytes(len(buf)))
+            if (builder == raw_payload and size != None):
+                hdr_len = max(0, size - offset)
+                if (len(buf) < offset + hdr_len):
+                    buf.extend(bytes(offset + hdr_len - len(buf)))
+                buf[offset:offset + hdr_len] = random.randbytes(hdr_len)
+            else:
+                hdr_len = builder(buf, offset, fields, names[index + 1])
+            headers.append((names[index], offset, hdr_len))
+            offset += hdr_len
+
+        fixup_apply(buf, offset, fixup_plan(headers))
+        # Offsets of layers of last packet
+        self.offsets = [off for (name, off, hdr_len) in headers]
+        return bytes(buf[0:offset])
@@ -0,0 +1,166 @@
+#!/bin/python3
+
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+#  simple packet generator. Shared memory ring buffer of packets.
+#  Generator (producer) writes packets to memory mapped file and consumer
+#  (simulation) reads them while they are generated. Producer waits when
+#  ring is full, so amount of data in flight is bounded by ring size.
+#
+#  File layout (little endian)
+#    0   : magic "PKTR", version, size of data area
+#    64  : head (u64, bytes written by producer), done (u32, producer finished)
+#    128 : tail (u64, bytes read by consumer)
+#    192 : data area
+#  Record is length (u32), seconds (u32), microseconds (u32), reserved (u32)
+#  and packet data padded to 8 bytes. Record never wraps around end of data
+#  area. If record doesn't fit, length RING_WRAP is written and record
+#  starts on beginning of data area. Head and tail are never decreased,
+#  position in data area is head (tail) modulo size of data area.
+#  Consumer reads record only if tail < head and it updates tail when
+#  record is read.
+#
+#  Producer creates new file and renames it to ring name, so ring of previous
+#  run is never reused. Consumer removes ring when all records are read after
+#  producer finished, so consumer started before next producer doesn't find
+#  old ring. ring_dpi.c is consumer for simulation (DPI).
+#
+#  Copyright (C) 2022 CESNET
+#  Author(s):
+#    Radek Iša <isa@cesnet.cz>
+
+import struct
+import mmap
+import time
+import os
+
+RING_MAGIC   = 0x52544b50 # "PKTR"
+RING_VERSION = 1
+RING_SIZE    = 16 << 20
+RING_WRAP    = 0xffffffff
+# Time between checks of other side
+RING_POLL    = 0.0001
+
+RING_HEADER  = struct.Struct("<IIQ")
+RING_HEAD    = 64
+RING_DONE    = 72
+RING_TAIL    = 128
+RING_DATA    = 192
+RING_INDEX   = struct.Struct("<Q")
+RING_FLAG    = struct.Struct("<I")
+RING_RECORD  = struct.Struct("<IIII")
+
+def ring_align(length):
+    return (length + 7) & ~0x7
+
+
+class ring_writer:
+    def __init__(self, file_name, size = RING_SIZE):
+        self.size = ring_align(size)
+        # New file is initialized under temporary name. Consumer sees
+        # whole header and never attaches to ring of previous run.
+        tmp_name  = "%s.%d.tmp" % (file_name, os.getpid())
+        self.file = open(tmp_name, "w+b")
+        os.ftruncate(self.file.fileno(), RING_DATA + self.size)
+        self.mem  = mmap.mmap(self.file.fileno(), RING_DATA + self.size)
+        RING_HEADER.pack_into(self.mem, 0, RING_MAGIC, RING_VERSION, self.size)
+        os.replace(tmp_name, file_name)
+        self.head = 0
+
+    def wait(self, length):
+        # Wait until there is space for length bytes
+        while (self.size - (self.head - RING_INDEX.unpack_from(self.mem, RING_TAIL)[0]) < length):
+            time.sleep(RING_POLL)
+
+    def write(self, data, sec = 0, usec = 0):
+        length = RING_RECORD.size + ring_align(len(data))
+        if (length > self.size):
+            raise ValueError("Packet of length %d is larger than ring" % (len(data)))
+        offset = self.head % self.size
+        if (offset + length > self.size):
+            # Rest of data area is skipped
+            self.wait(self.size - offset)
+            RING_FLAG.pack_into(self.mem, RING_DATA + offset, RING_WRAP)
+            self.head += self.size - offset
+            RING_INDEX.pack_into(self.mem, RING_HEAD, self.head)
+            offset = 0
+        self.wait(length)
+        RING_RECORD.pack_into(self.mem, RING_DATA + offset, len(data), sec, usec, 0)
+        self.mem[RING_DATA + offset + RING_RECORD.size:RING_DATA + offset + RING_RECORD.size + len(data)] = data
+        # Record is visible for consumer after head is moved
+        self.head += length
+        RING_INDEX.pack_into(self.mem, RING_HEAD, self.head)
+
+    def position(self):
+        # Number of bytes written to ring
+        return self.head
+
+    def flush(self):
+        pass
+
+    def close(self):
+        if (self.file != None):
+            RING_FLAG.pack_into(self.mem, RING_DONE, 1)
+            self.mem.close()
+            self.file.close()
+            self.file = None
+
+
+class ring_reader:
+    # Iterator of (packet data, seconds, microseconds)
+    def __init__(self, file_name, timeout = None):
+        self.file_name = file_name
+        self.done      = False
+        start = time.monotonic()
+        # Wait until producer initialize ring
+        while (True):
+            if (os.path.exists(file_name) and os.path.getsize(file_name) >= RING_DATA):
+                self.file = open(file_name, "r+b")
+                self.mem  = mmap.mmap(self.file.fileno(), 0)
+                (magic, version, self.size) = RING_HEADER.unpack_from(self.mem, 0)
+                if (magic == RING_MAGIC and version == RING_VERSION and len(self.mem) >= RING_DATA + self.size):
+                    break
+                self.mem.close()
+                self.file.close()
+            if (timeout != None and time.monotonic() - start > timeout):
+                raise TimeoutError("Ring %s is not initialized" % (file_name))
+            time.sleep(RING_POLL)
+        self.tail = RING_INDEX.unpack_from(self.mem, RING_TAIL)[0]
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while (True):
+            # Done flag is read before head, all records are visible when it is set
+            done = RING_FLAG.unpack_from(self.mem, RING_DONE)[0]
+            head = RING_INDEX.unpack_from(self.mem, RING_HEAD)[0]
+            if (self.tail < head):
+                break
+            if (done):
+                self.done = True
+                raise StopIteration
+            time.sleep(RING_POLL)
+
+        offset = self.tail % self.size
+        if (RING_FLAG.unpack_from(self.mem, RING_DATA + offset)[0] == RING_WRAP):
+            self.tail += self.size - offset
+            RING_INDEX.pack_into(self.mem, RING_TAIL, self.tail)
+            return self.__next__()
+        (length, sec, usec, reserved) = RING_RECORD.unpack_from(self.mem, RING_DATA + offset)
+        start = RING_DATA + offset + RING_RECORD.size
+        data  = bytes(self.mem[start:start + length])
+        self.tail += RING_RECORD.size + ring_align(length)
+        RING_INDEX.pack_into(self.mem, RING_TAIL, self.tail)
+        return (data, sec, usec)
+
+    def close(self):
+        # Consumed ring is removed if it wasn't replaced by next producer
+        if (self.done):
+            try:
+                if (os.stat(self.file_name).st_ino == os.fstat(self.file.fileno()).st_ino):
+                    os.unlink(self.file_name)
+            except FileNotFoundError:
+                pass
+        self.mem.close()
+        self.file.close()
@@ -0,0 +1,159 @@
+/*
+ * SPDX-License-Identifier: BSD-3-Clause
+ *
+ * simple packet generator. DPI consumer of shared memory ring buffer
+ * written by ring_writer (ring.py). File layout is described in ring.py.
+ *
+ * Copyright (C) 2022 CESNET
+ * Author(s):
+ *   Radek Iša <isa@cesnet.cz>
+ */
+
+#include <stdint.h>
+#include <stdlib.h>
+#include <string.h>
+#include <unistd.h>
+#include <fcntl.h>
+#include <time.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include "svdpi.h"
+
+#define RING_MAGIC   0x52544b50 /* "PKTR" */
+#define RING_VERSION 1
+#define RING_WRAP    0xffffffff
+#define RING_HEAD    64
+#define RING_DONE    72
+#define RING_TAIL    128
+#define RING_DATA    192
+#define RING_RECORD  16
+/* Time between checks of producer in microseconds */
+#define RING_POLL    100
+
+struct ring {
+    char    *file_name;
+    int      fd;
+    uint8_t *mem;
+    size_t   mem_size;
+    uint64_t size;
+    uint64_t tail;
+    int      done;
+};
+
+static uint64_t ring_align(uint64_t length)
+{
+    return (length + 7) & ~(uint64_t)0x7;
+}
+
+static void ring_sleep(void)
+{
+    struct timespec poll = {0, RING_POLL * 1000};
+    nanosleep(&poll, NULL);
+}
+
+static int ring_attach(struct ring *ring)
+{
+    struct stat st;
+    uint32_t   *header;
+
+    ring->fd = open(ring->file_name, O_RDWR);
+    if (ring->fd < 0)
+        return -1;
+    if (fstat(ring->fd, &st) != 0 || st.st_size < RING_DATA) {
+        close(ring->fd);
+        return -1;
+    }
+    ring->mem_size = st.st_size;
+    ring->mem      = mmap(NULL, ring->mem_size, PROT_READ | PROT_WRITE, MAP_SHARED, ring->fd, 0);
+    if (ring->mem == MAP_FAILED) {
+        close(ring->fd);
+        return -1;
+    }
+    header     = (uint32_t *)ring->mem;
+    ring->size = *(uint64_t *)(ring->mem + 8);
+    if (header[0] != RING_MAGIC || header[1] != RING_VERSION || ring->mem_size < RING_DATA + ring->size) {
+        munmap(ring->mem, ring->mem_size);
+        close(ring->fd);
+        return -1;
+    }
+    ring->tail = __atomic_load_n((uint64_t *)(ring->mem + RING_TAIL), __ATOMIC_ACQUIRE);
+    return 0;
+}
+
+/* Wait until producer initialize ring. Return NULL after timeout (ms). */
+void *pkt_gen_ring_open(const char *file_name, int timeout)
+{
+    struct ring    *ring = calloc(1, sizeof(struct ring));
+    struct timespec start, now;
+
+    if (ring == NULL)
+        return NULL;
+    ring->file_name = strdup(file_name);
+    clock_gettime(CLOCK_MONOTONIC, &start);
+    while (ring_attach(ring) != 0) {
+        clock_gettime(CLOCK_MONOTONIC, &now);
+        if (timeout >= 0 && (now.tv_sec - start.tv_sec) * 1000 + (now.tv_nsec - start.tv_nsec) / 1000000 > timeout) {
+            free(ring->file_name);
+            free(ring);
+            return NULL;
+        }
+        ring_sleep();
+    }
+    return ring;
+}
+
+/* Wait for next record. Return length of packet or -1 when producer finished. */
+int pkt_gen_ring_next(void *handle)
+{
+    struct ring *ring = handle;
+    uint64_t     head, offset;
+    uint32_t     done, length;
+
+    while (1) {
+        /* Done flag is read before head, all records are visible when it is set */
+        done = __atomic_load_n((uint32_t *)(ring->mem + RING_DONE), __ATOMIC_ACQUIRE);
+        head = __atomic_load_n((uint64_t *)(ring->mem + RING_HEAD), __ATOMIC_ACQUIRE);
+        if (ring->tail < head) {
+            offset = ring->tail % ring->size;
+            length = *(uint32_t *)(ring->mem + RING_DATA + offset);
+            if (length != RING_WRAP)
+                return length;
+            /* Rest of data area is skipped */
+            ring->tail += ring->size - offset;
+            __atomic_store_n((uint64_t *)(ring->mem + RING_TAIL), ring->tail, __ATOMIC_RELEASE);
+            continue;
+        }
+        if (done) {
+            ring->done = 1;
+            return -1;
+        }
+        ring_sleep();
+    }
+}
+
+/* Copy record returned by pkt_gen_ring_next to data and release it to producer */
+void pkt_gen_ring_get(void *handle, const svOpenArrayHandle data)
+{
+    struct ring *ring   = handle;
+    uint64_t     offset = ring->tail % ring->size;
+    uint32_t     length = *(uint32_t *)(ring->mem + RING_DATA + offset);
+    uint32_t     size   = svSize(data, 1);
+
+    memcpy(svGetArrayPtr(data), ring->mem + RING_DATA + offset + RING_RECORD, length < size ? length : size);
+    ring->tail += RING_RECORD + ring_align(length);
+    __atomic_store_n((uint64_t *)(ring->mem + RING_TAIL), ring->tail, __ATOMIC_RELEASE);
+}
+
+/* Consumed ring is removed if it wasn't replaced by next producer */
+void pkt_gen_ring_close(void *handle)
+{
+    struct ring *ring = handle;
+    struct stat  st_file, st_fd;
+
+    if (ring->done && stat(ring->file_name, &st_file) == 0 && fstat(ring->fd, &st_fd) == 0 && st_file.st_ino == st_fd.st_ino)
+        unlink(ring->file_name);
+    munmap(ring->mem, ring->mem_size);
+    close(ring->fd);
+    free(ring->file_name);
+    free(ring);
+}
@@ -0,0 +1,114 @@
+#!/bin/python3
+
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+#  simple packet generator. Generator server on local UNIX socket.
+#  Server keeps interpreter with imported scapy layers. Every request
+#  is processed in forked process, so it doesn't pay import time.
+#
+#  Request is one JSON line {"argv" : [...], "cwd" : "...", "stream" : bool}.
+#  If stream is false, response is text output of generator followed by
+#  line "PKT_GEN_EXIT <exit code>". If stream is true, response is pcap
+#  stream and text output goes to server stderr.
+#
+#  Copyright (C) 2022 CESNET
+#  Author(s):
+#    Radek Iša <isa@cesnet.cz>
+
+import traceback
+import socket
+import signal
+import json
+import sys
+import os
+
+SERVER_EXIT = "PKT_GEN_EXIT "
+
+def server_cwd(path):
+    # Request works only in existing directory of server user
+    if (not os.path.isabs(path) or not os.path.isdir(path) or os.stat(path).st_uid != os.getuid()):
+        print("Invalid working directory %s" % (path), file=sys.stderr)
+        sys.exit(1)
+    os.chdir(path)
+
+def server_request(conn, handler):
+    # Run in forked process. Return exit code.
+    request = json.loads(conn.makefile("rb").readline())
+    os.dup2(conn.fileno(), 1)
+    if (not request["stream"]):
+        os.dup2(conn.fileno(), 2)
+    code = 1
+    try:
+        server_cwd(request["cwd"])
+        code = handler(request["argv"])
+    except SystemExit as err:
+        # argparse errors
+        code = err.code if isinstance(err.code, int) else 1
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    if (not request["stream"]):
+        os.write(1, ("%s%d\n" % (SERVER_EXIT, code)).encode())
+    return code
+
+def server_run(path, handler):
+    # handler(argv) generate packets and return exit code
+    if (os.path.exists(path)):
+        os.unlink(path)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # Only server user can connect to socket
+    umask = os.umask(0o077)
+    try:
+        sock.bind(path)
+    finally:
+        os.umask(umask)
+    sock.listen()
+    # Finished requests are not waited for
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    # Socket is removed when server is terminated
+    signal.signal(signal.SIGTERM, lambda signum, frame : sys.exit(0))
+    print("SERVER    : " + path, flush=True)
+    try:
+        while (True):
+            (conn, addr) = sock.accept()
+            pid = os.fork()
+            if (pid == 0):
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+                sock.close()
+                code = 1
+                try:
+                    code = server_request(conn, handler)
+                finally:
+                    os._exit(code)
+            conn.close()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sock.close()
+        os.unlink(path)
+
+def client_run(path, argv, stream):
+    # Send request to server. Return exit code of request.
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(path)
+    sock.sendall((json.dumps({"argv" : argv, "cwd" : os.getcwd(), "stream" : stream}) + "\n").encode())
+    code = 0
+    if (stream):
+        out  = sys.stdout.buffer
+        data = sock.recv(1 << 16)
+        while (len(data) > 0):
+            out.write(data)
+            data = sock.recv(1 << 16)
+        out.flush()
+    else:
+        code = 1
+        for line in sock.makefile("r"):
+            if (line.startswith(SERVER_EXIT)):
+                code = int(line[len(SERVER_EXIT):])
+            else:
+                print(line, end="")
+    sock.close()
+    return code
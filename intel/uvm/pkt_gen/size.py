@@ -0,0 +1,98 @@
+#!/bin/python3
+
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+#  simple packet generator. Packet size distribution.
+#  Length of packet is selected before packet is built. Length of random
+#  payload is computed from length of headers, so packet has selected
+#  length. Packets without payload and packets shorter than selected length
+#  are padded by zeros. Fuzzed variable length fields of scapy engine are
+#  shortened to fit selected length, other headers are never truncated
+#  (packet is counted as oversized). Error packets truncated by
+#  err_probability are padded only to size_min. Lengths are without FCS.
+#
+#  Configuration "packet" : {"size" : ...}
+#    {"type" : "fixed", "value" : 60}
+#    {"type" : "range", "min" : 60, "max" : 1514}
+#    {"type" : "imix"}
+#    {"type" : "histogram", "sizes" : [[60, 7], [590, 4], [1514, 1]]}
+#
+#  Copyright (C) 2022 CESNET
+#  Author(s):
+#    Radek Iša <isa@cesnet.cz>
+
+from graph import *
+import scapy.packet
+import scapy.volatile
+import random
+
+# Simple IMIX (64, 594 and 1518 bytes with FCS) as (length, weight)
+SIZE_IMIX = ((60, 7), (590, 4), (1514, 1))
+
+class size_dist:
+    def __init__(self, cfg):
+        self.type = cfg.get("type", "fixed")
+        if (self.type == "fixed"):
+            self.min = self.max = cfg["value"]
+        elif (self.type == "range"):
+            self.min = cfg["min"]
+            self.max = cfg["max"]
+        elif (self.type in ("imix", "histogram")):
+            sizes = SIZE_IMIX if self.type == "imix" else cfg["sizes"]
+            self.sizes = tuple(length for (length, weight) in sizes)
+            (self.prob, self.alias) = alias_table([weight for (length, weight) in sizes])
+        else:
+            raise ValueError("Unknown packet size distribution %s" % (self.type))
+
+    def sample(self):
+        if (self.type == "fixed"):
+            return self.min
+        if (self.type == "range"):
+            return random.randint(self.min, self.max)
+        x = random.random() * len(self.sizes)
+        index = int(x)
+        if (x - index >= self.prob[index]):
+            index = self.alias[index]
+        return self.sizes[index]
+
+
+def scapy_trim(fields, over):
+    # Shorten fuzzed variable length values (strings, options) by over bytes.
+    # Return False if there is no value which can be shortened.
+    for (values, name) in reversed(fields):
+        value = values[name]
+        if (isinstance(value, (bytes, str)) and len(value) > 0):
+            values[name] = value[0:max(0, len(value) - over)]
+            return True
+        if (isinstance(value, list) and len(value) > 0):
+            values[name] = value[0:-1]
+            return True
+    return False
+
+def scapy_build_size(packet, size):
+    # Fuzzed packet is fixed first, so headers are same in both builds.
+    # Headers are built with empty payload and then with payload of computed length.
+    # Fuzzed variable length fields are shortened when headers are longer than size.
+    payload = None
+    fields  = []
+    layer   = packet
+    while (not isinstance(layer, scapy.packet.NoPayload)):
+        for values in (layer.default_fields, layer.fields):
+            for (name, value) in values.items():
+                if (isinstance(value, scapy.volatile.VolatileValue)):
+                    values[name] = value._fix()
+                    fields.append((values, name))
+        if (isinstance(layer, scapy.packet.Raw)):
+            payload = layer
+        layer = layer.payload
+
+    if (payload != None):
+        payload.load = b""
+    data = packet.build()
+    while (len(data) > size and scapy_trim(fields, len(data) - size)):
+        data = packet.build()
+    length = size - len(data)
+    if (payload == None or length <= 0):
+        return data
+    payload.load = random.randbytes(length)
+    return packet.build()
@@ -0,0 +1,248 @@
+#!/bin/python3
+
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+#  simple packet generator. Compiled header templates.
+#  Header skeleton of every protocol path is built by scapy only once.
+#  Next packets with same path are created by copying the skeleton and
+#  rewriting fields which would be randomized by scapy.packet.fuzz().
+#
+#  Copyright (C) 2022 CESNET
+#  Author(s):
+#    Radek Iša <isa@cesnet.cz>
+
+from fixup import *
+from batch import *
+import scapy.packet
+import scapy.fields
+import scapy.volatile
+import collections
+import random
+
+# Size of random payload. Same as scapy fuzz() of Raw layer.
+TEMPLATE_PAYLOAD_MAX = 1200
+# Default number of cached templates
+TEMPLATE_CACHE_SIZE  = 1024
+# Fields which are not randomized because other fields depends on them.
+TEMPLATE_STATIC = {"Trill" : ("opt_length",)}
+# Fields which change layout of header (conditional fields). Value is selected
+# before template is searched and every value has its own template.
+TEMPLATE_LAYOUT = {"ICMP" : ("type",)}
+
+# Slot types
+SLOT_RANGE    = 0 # random number from range
+SLOT_BITS     = 1 # random bits (addresses)
+SLOT_EXPLICIT = 2 # explicit value set by protocol
+SLOT_BATCH    = 3 # next value of batch column
+
+
+def packet_stack(layers):
+    # Create scapy packet from list of (layer class, fields)
+    packet = None
+    for (proto, fields) in reversed(layers):
+        layer = proto(**fields)
+        if (packet != None):
+            layer.add_payload(packet)
+        packet = layer
+
+    if (packet == None):
+        packet = scapy.packet.Packet()
+    return packet
+
+
+def volatile_fixed(value):
+    # Skeleton is built with fixed values instead of volatile values. Creating
+    # of template doesn't consume random numbers, so output doesn't depend on
+    # content of template cache.
+    if (isinstance(value, batch_column)):
+        return value.conv(bytes(value.width))
+    if (isinstance(value, scapy.volatile.RandMAC)):
+        return "00:00:00:00:00:00"
+    if (isinstance(value, scapy.volatile.RandIP)):
+        return "0.0.0.0"
+    if (isinstance(value, scapy.volatile.RandIP6)):
+        return "::"
+    if (isinstance(value, scapy.volatile.RandNum)):
+        return value.min
+    return value
+
+
+def bits_set(buf, offset, width, value):
+    # Write value to bit offset in buffer (big endian)
+    start = offset >> 3
+    end   = (offset + width + 7) >> 3
+    if ((offset & 0x7) == 0 and (width & 0x7) == 0):
+        buf[start:end] = (value & ((1 << width) - 1)).to_bytes(end - start, "big")
+        return
+    shift = end*8 - (offset + width)
+    mask  = ((1 << width) - 1) << shift
+    act   = int.from_bytes(buf[start:end], "big")
+    act   = (act & ~mask) | ((value << shift) & mask)
+    buf[start:end] = act.to_bytes(end - start, "big")
+
+
+class template:
+    def __init__(self, layers):
+        packet = packet_stack([(proto, {name : volatile_fixed(value) for (name, value) in fields.items()}) for (proto, fields) in layers])
+        self.skeleton = packet.build()
+        self.length   = len(self.skeleton)
+        self.slots    = []
+        self.payload  = False
+
+        # Layers are placed one after another. Length of every header is
+        # computed while slots are searched, so packet is built only once.
+        layer  = packet
+        index  = 0
+        offset = 0
+        fixups = []
+        while (index < len(layers)):
+            if (isinstance(layer, scapy.packet.Raw) and len(layers[index][1]) == 0):
+                self.payload = True
+                hdr_len = 0
+            else:
+                hdr_len = self.slots_add(layer, layers[index][1], index, offset)
+            fixups.append((layer.__class__.__name__, offset, hdr_len))
+            offset += hdr_len
+            layer = layer.payload
+            index += 1
+
+        if (offset != self.length):
+            raise ValueError("Template of %s has unexpected length" % ([proto.__name__ for (proto, fields) in layers]))
+
+        self.fixups  = fixup_plan(fixups)
+        self.offsets = [off for (name, off, hdr_len) in fixups]
+        # Preallocated buffer for packet
+        self.buf = bytearray(self.length + TEMPLATE_PAYLOAD_MAX)
+
+    def slots_add(self, layer, fields, index, offset):
+        static = TEMPLATE_STATIC.get(layer.__class__.__name__, ())
+        build  = b""
+        for field in layer.fields_desc:
+            # Compute bit position of field same way as scapy self_build.
+            start = len(build[0])*8 + build[1] if isinstance(build, tuple) else len(build)*8
+            build = field.addfield(layer, build, layer.getfieldval(field.name))
+            end   = len(build[0])*8 + build[1] if isinstance(build, tuple) else len(build)*8
+            width = end - start
+
+            if (width == 0 or field.name in static):
+                continue
+
+            slot = None
+            if (field.name in fields):
+                value = fields[field.name]
+                if (isinstance(value, batch_column)):
+                    slot = (SLOT_BATCH, index, field.name, None)
+                elif (isinstance(value, scapy.volatile.VolatileValue)):
+                    slot = self.slot_random(value, width)
+                else:
+                    slot = (SLOT_EXPLICIT, index, field, value)
+            elif (field.name not in layer.overloaded_fields and field.default != None):
+                # same fields as are randomized by scapy.packet.fuzz
+                slot = self.slot_random(field.randval(), width)
+
+            if (slot != None):
+                self.slots.append((offset*8 + start, width, layer) + slot)
+        # Return length of header
+        return len(build)
+
+    @staticmethod
+    def slot_random(value, width):
+        if (isinstance(value, scapy.volatile.RandNum)):
+            return (SLOT_RANGE, value.min, value.max, None)
+        if (isinstance(value, (scapy.volatile.RandMAC, scapy.volatile.RandIP, scapy.volatile.RandIP6))):
+            return (SLOT_BITS, None, None, None)
+        # Variable size values (strings, options) stay same as in skeleton
+        return None
+
+    def render(self, layers, size = None):
+        # size is required packet length, payload length is computed from it
+        buf    = self.buf
+        length = self.length
+        buf[0:length] = self.skeleton
+
+        for (offset, width, layer, kind, arg0, arg1, arg2) in self.slots:
+            if (kind == SLOT_RANGE):
+                bits_set(buf, offset, width, random.randint(arg0, arg1))
+            elif (kind == SLOT_BITS):
+                bits_set(buf, offset, width, random.getrandbits(width))
+            elif (kind == SLOT_BATCH):
+                data = layers[arg0][1][arg1].take()
+                if ((offset & 0x7) == 0 and len(data)*8 == width):
+                    buf[offset >> 3:(offset + width) >> 3] = data
+                else:
+                    bits_set(buf, offset, width, int.from_bytes(data, "big"))
+            else:
+                value = layers[arg0][1][arg1.name]
+                if (value != arg2):
+                    self.explicit_set(buf, offset, width, layer, arg1, value)
+
+        if (self.payload):
+            if (size == None):
+                payload_len = random.randint(0, TEMPLATE_PAYLOAD_MAX)
+            else:
+                payload_len = max(0, size - length)
+                if (length + payload_len > len(buf)):
+                    buf.extend(bytes(length + payload_len - len(buf)))
+            buf[length:length + payload_len] = random.randbytes(payload_len)
+            length += payload_len
+
+        fixup_apply(buf, length, self.fixups)
+        return bytes(buf[0:length])
+
+    @staticmethod
+    def explicit_set(buf, offset, width, layer, field, value):
+        if ((offset & 0x7) == 0 and (width & 0x7) == 0):
+            data = field.addfield(layer, b"", value)
+            if (isinstance(data, bytes) and len(data)*8 == width):
+                buf[offset >> 3:(offset + width) >> 3] = data
+                return
+        bits_set(buf, offset, width, field.i2m(layer, field.any2i(layer, value)))
+
+
+class template_cache:
+    def __init__(self, size = None):
+        self.size      = TEMPLATE_CACHE_SIZE if size == None else size
+        self.templates = collections.OrderedDict()
+        self.hits      = 0
+        self.misses    = 0
+        # Offsets of layers of last packet
+        self.offsets   = []
+
+    @staticmethod
+    def layout(layers):
+        # Select values of layout fields, same as scapy.packet.fuzz() would do
+        ret = []
+        for (proto, fields) in layers:
+            names = TEMPLATE_LAYOUT.get(proto.__name__, ())
+            if (len(names) > 0):
+                fields = dict(fields)
+                for field in proto.fields_desc:
+                    if (field.name not in names):
+                        continue
+                    value = fields.get(field.name, field.randval())
+                    if (isinstance(value, scapy.volatile.VolatileValue)):
+                        value = int(value)
+                    fields[field.name] = value
+            ret.append((proto, fields))
+        return ret
+
+    def get(self, layers):
+        key  = tuple((proto, tuple(fields), tuple(fields[name] for name in TEMPLATE_LAYOUT.get(proto.__name__, ())))
+                     for (proto, fields) in layers)
+        tmpl = self.templates.get(key)
+        if (tmpl == None):
+            self.misses += 1
+            tmpl = template(layers)
+            self.templates[key] = tmpl
+            if (len(self.templates) > self.size):
+                self.templates.popitem(last=False)
+        else:
+            self.hits += 1
+            self.templates.move_to_end(key)
+        return tmpl
+
+    def build(self, layers, size = None):
+        layers = self.layout(layers)
+        tmpl   = self.get(layers)
+        self.offsets = tmpl.offsets
+        return tmpl.render(layers, size)
@@ -0,0 +1,24 @@
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+#  simple packet generator. Tests import generator modules from parent directory.
+#
+#  Copyright (C) 2022 CESNET
+#  Author(s):
+#    Radek Iša <isa@cesnet.cz>
+
+import json
+import sys
+import os
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def conf(tmp_path):
+    # Return function which write configuration to file and return its name
+    def conf_write(cfg, name = "conf.json"):
+        file_name = str(tmp_path / name)
+        with open(file_name, "w") as conf_file:
+            json.dump(cfg, conf_file)
+        return file_name
+    return conf_write
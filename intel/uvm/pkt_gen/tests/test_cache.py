@@ -0,0 +1,38 @@
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+#  simple packet generator. Cache of generated pcap files.
+#
+#  Copyright (C) 2022 CESNET
+#  Author(s):
+#    Radek Iša <isa@cesnet.cz>
+
+from cache import pcap_cache
+import os
+
+def cache_put(cache, tmp_path, key, size):
+    file_name = str(tmp_path / "out.pcap")
+    with open(file_name, "wb") as out:
+        out.write(bytes(size))
+    with cache.lock(key):
+        cache.put(key, file_name)
+
+def test_evict_lock(tmp_path):
+    cache = pcap_cache(str(tmp_path / "cache"), 2500)
+    for it in range(4):
+        cache_put(cache, tmp_path, "key%d" % it, 1000)
+        os.utime(cache.path("key%d" % it), (it, it))
+    cache.evict()
+    # Evicted entries are removed together with their locks
+    assert sorted(os.listdir(cache.directory)) == ["cache.lock", "key2.lock", "key2.pcap", "key3.lock", "key3.pcap"]
+
+def test_evict_held_lock(tmp_path):
+    cache = pcap_cache(str(tmp_path / "cache"))
+    with cache.lock("key"):
+        # Key is generated, its lock is kept
+        cache.evict()
+        assert os.path.exists(cache.lock_path("key"))
+    cache.evict()
+    assert not os.path.exists(cache.lock_path("key"))
+    # Removed lock is created again
+    with cache.lock("key"):
+        assert os.path.exists(cache.lock_path("key"))
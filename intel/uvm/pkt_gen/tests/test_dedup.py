@@ -0,0 +1,39 @@
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+#  simple packet generator. Suppression of duplicate packets.
+#
+#  Copyright (C) 2022 CESNET
+#  Author(s):
+#    Radek Iša <isa@cesnet.cz>
+
+from dedup import packet_dedup
+import hashlib
+
+def test_duplicates():
+    dedup = packet_dedup(0.001, 100)
+    assert not dedup.seen(b"packet")
+    assert dedup.seen(b"packet")
+    assert not dedup.seen(b"other")
+    assert dedup.duplicates == 1
+
+def test_memory():
+    dedup = packet_dedup(0.001, 100)
+    size  = len(dedup.actual.array)
+    assert dedup.memory() == size
+    for it in range(101):
+        dedup.seen(it.to_bytes(4, "big"))
+    # Filter was rotated, previous filter is kept
+    assert dedup.previous != None
+    assert dedup.memory() == 2 * size
+
+def test_fp_rate():
+    # Both filters are full, packet is checked in both of them
+    dedup = packet_dedup(0.01, 2000)
+    for it in range(4000):
+        dedup.seen(it.to_bytes(4, "big"))
+    assert dedup.previous != None
+    positive = 0
+    for it in range(4000, 44000):
+        indexes   = dedup.actual.indexes(hashlib.blake2b(it.to_bytes(4, "big"), digest_size=16).digest())
+        positive += dedup.actual.contains(indexes) or dedup.previous.contains(indexes)
+    assert positive / 40000 < 0.012
@@ -0,0 +1,67 @@
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+#  simple packet generator. Output depends only on seed, not on number of
+#  processes, and single packet is same as packet of whole run.
+#
+#  Copyright (C) 2022 CESNET
+#  Author(s):
+#    Radek Iša <isa@cesnet.cz>
+
+from pkt_gen import run, generator_create, parse_alg
+from batch import batch_available
+import scapy.utils
+import parser_jobs
+import parser
+import pytest
+
+def packets(file_name):
+    # Packets are not dissected, scapy wouldn't rebuild them same
+    with scapy.utils.RawPcapReader(file_name) as reader:
+        return [data for (data, meta) in reader]
+
+@pytest.fixture
+def shards(monkeypatch):
+    # More shards than processes with small number of packets
+    monkeypatch.setattr(parser_jobs, "SHARD_PACKETS", 16)
+    monkeypatch.setattr(parser, "BATCH_BLOCK", 8)
+
+@pytest.mark.parametrize("engine", ["scapy", "raw"])
+@pytest.mark.parametrize("algorithm", ["rand", "dfs"])
+def test_jobs_equal(tmp_path, shards, engine, algorithm):
+    args = ["-p", "100", "-s", "7", "-e", engine, "-a", algorithm, "--max-paths", "100"]
+    assert run(["-f", str(tmp_path / "single.pcap")] + args) == 0
+    assert run(["-f", str(tmp_path / "jobs.pcap"), "-j", "3"] + args) == 0
+    assert packets(str(tmp_path / "jobs.pcap")) == packets(str(tmp_path / "single.pcap"))
+
+@pytest.mark.skipif(not batch_available(), reason="batch randomization requires numpy")
+@pytest.mark.parametrize("algorithm", ["rand", "dfs"])
+def test_jobs_batch_equal(tmp_path, conf, shards, capsys, algorithm):
+    cfg  = {"packet" : {"batch" : 32, "mutate" : {"mutants" : 1, "bitflip" : {"rate" : 50}}}}
+    args = ["-p", "100", "-s", "5", "-e", "raw", "-a", algorithm, "--start-index", "3", "--max-paths", "100", "-c", conf(cfg),
+            "--validate", "1"]
+    assert run(["-f", str(tmp_path / "single.pcap")] + args) == 0
+    single = capsys.readouterr().out
+    assert run(["-f", str(tmp_path / "jobs.pcap"), "-j", "3"] + args) == 0
+    jobs   = capsys.readouterr().out
+    assert packets(str(tmp_path / "jobs.pcap")) == packets(str(tmp_path / "single.pcap"))
+    # Counters of workers are printed
+    for name in ("MUTANTS", "VALIDATED"):
+        lines = [line for line in single.splitlines() if line.startswith(name)]
+        assert len(lines) == 1 and lines[0] in jobs.splitlines()
+
+def test_jobs_mutant_flag(conf, shards):
+    cfg    = conf({"packet" : {"mutate" : {"mutants" : 2, "fcs" : {"rate" : 50}}}})
+    single = generator_create(None, parse_alg.rand, 60, 9, cfg, "raw")
+    jobs   = generator_create(None, parse_alg.rand, 60, 9, cfg, "raw", 2)
+    flags  = [single.mutant for (data, path) in single]
+    assert [jobs.mutant for (data, path) in jobs] == flags
+    assert 60 < len(flags)
+
+@pytest.mark.parametrize("engine", ["scapy", "template", "raw"])
+def test_only_index(tmp_path, engine):
+    args = ["-p", "40", "-s", "11", "-e", engine]
+    assert run(["-f", str(tmp_path / "all.pcap")] + args) == 0
+    whole = packets(str(tmp_path / "all.pcap"))
+    for index in (0, 17, 39):
+        assert run(["-f", str(tmp_path / "one.pcap"), "--only-index", str(index)] + args) == 0
+        assert packets(str(tmp_path / "one.pcap")) == [whole[index]]
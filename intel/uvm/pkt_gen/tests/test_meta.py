@@ -0,0 +1,56 @@
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+#  simple packet generator. Binary metadata sidecar of pcap file.
+#
+#  Copyright (C) 2022 CESNET
+#  Author(s):
+#    Radek Iša <isa@cesnet.cz>
+
+from pkt_gen import run
+from meta import *
+from scapy.all import RawPcapReader
+import pytest
+
+IP_VERSION = {"IP" : 4, "IPv6" : 6}
+
+def test_meta_file(tmp_path):
+    file_name = str(tmp_path / "out.meta")
+    writer    = meta_writer(file_name)
+    writer.write(("Ether", "IP", "UDP"), [0, 14, 34], 60, META_PADDED)
+    writer.write(tuple("L%d" % (it) for it in range(20)), list(range(20)), 100, 0)
+    writer.write(("Ether", "IP", "UDP"), [0, 14, 34], 70000, META_ERROR)
+    writer.close()
+
+    reader = meta_reader(file_name)
+    assert len(reader) == 3
+    assert reader[0] == (("Ether", "IP", "UDP"), META_PADDED, 60, (0, 14, 34))
+    # Only META_LAYERS offsets are stored
+    (path, flags, length, offsets) = reader[1]
+    assert len(path) == 20 and flags == META_DEEP and offsets == tuple(range(META_LAYERS))
+    # Both records of same path share path id
+    assert reader[2] == (("Ether", "IP", "UDP"), META_ERROR, 0xffff, (0, 14, 34))
+    assert len(reader.paths) == 2
+    with pytest.raises(IndexError):
+        reader[3]
+    reader.close()
+
+@pytest.mark.parametrize("engine", ["scapy", "raw"])
+def test_meta_packets(tmp_path, engine):
+    pcap = str(tmp_path / "out.pcap")
+    meta = str(tmp_path / "out.meta")
+    assert run(["-f", pcap, "--meta", meta, "-p", "100", "-s", "3", "-e", engine]) == 0
+    reader  = meta_reader(meta)
+    packets = [data for (data, info) in RawPcapReader(pcap)]
+    assert len(reader) == len(packets) == 100
+    for (index, data) in enumerate(packets):
+        (path, flags, length, offsets) = reader[index]
+        assert length == len(data)
+        if (flags & (META_PARTIAL | META_ERROR)):
+            continue
+        # Layers are in order of path, IP headers begin with version
+        assert path[0] == "Ether" and offsets[0] == 0
+        assert list(offsets) == sorted(offsets) and offsets[-1] <= length
+        for (name, offset) in zip(path, offsets):
+            if (name in IP_VERSION):
+                assert data[offset] >> 4 == IP_VERSION[name]
+    reader.close()
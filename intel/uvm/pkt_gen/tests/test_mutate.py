@@ -0,0 +1,64 @@
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+#  simple packet generator. Mutation of built packets (error packets).
+#
+#  Copyright (C) 2022 CESNET
+#  Author(s):
+#    Radek Iša <isa@cesnet.cz>
+
+from pkt_gen import generator_create, parse_alg
+from mutate import *
+import random
+import struct
+import zlib
+import pytest
+
+# Ether / IPv4 / UDP with 8 bytes of payload
+PACKET  = bytes(12) + b"\x08\x00" + b"\x45\x00\x00\x24" + bytes(16) + b"\x00\x35\x00\x35\x00\x10\x00\x00" + bytes(8)
+NAMES   = ("Ether", "IP", "UDP", "Raw")
+OFFSETS = [0, 14, 34, 42]
+
+def mutants(cfg):
+    random.seed(1)
+    return list(mutator(cfg).mutate(PACKET, NAMES, OFFSETS))
+
+def test_fcs():
+    (mutant,) = mutants({"fcs" : {"rate" : 100}})
+    assert mutant[0:len(PACKET)] == PACKET
+    (fcs,) = struct.unpack("<I", mutant[len(PACKET):])
+    assert fcs != zlib.crc32(PACKET)
+
+def test_length():
+    (mutant,) = mutants({"length" : {"rate" : 100}})
+    # Only total length of IPv4 is changed
+    assert len(mutant) == len(PACKET)
+    assert mutant[16:18] != PACKET[16:18]
+    assert mutant[0:16] + mutant[18:] == PACKET[0:16] + PACKET[18:]
+
+def test_bitflip():
+    (mutant,) = mutants({"bitflip" : {"rate" : 100, "bits" : 1}})
+    diff = int.from_bytes(mutant, "big") ^ int.from_bytes(PACKET, "big")
+    assert bin(diff).count("1") == 1
+
+def test_not_applicable():
+    # Packet doesn't have IPv6 extension or TRILL header
+    assert mutants({"ext_trunc" : {"rate" : 100}, "trill_opt" : {"rate" : 100}}) == []
+
+def test_mutants_limit():
+    result = mutants({"mutants" : 2, "fcs" : {"rate" : 100}, "truncate" : {"rate" : 100}, "bitflip" : {"rate" : 100}})
+    assert len(result) == 2
+    assert len(result[1]) < len(PACKET)
+
+def test_unknown():
+    with pytest.raises(ValueError):
+        mutator({"swap" : {"rate" : 100}})
+
+@pytest.mark.parametrize("engine", ["scapy", "raw"])
+def test_mutant_flag(conf, engine):
+    # Every base packet is followed by its mutant, base packet is not changed
+    gen     = generator_create(None, parse_alg.rand, 50, 2, conf({"packet" : {"mutate" : {"fcs" : {"rate" : 100}}}}), engine)
+    packets = [(data, gen.mutant) for (data, path) in gen]
+    assert [mutant for (data, mutant) in packets] == [False, True] * 50
+    for it in range(0, 100, 2):
+        assert packets[it + 1][0][0:len(packets[it][0])] == packets[it][0]
+    assert gen.mutator.count == {"fcs" : 50}
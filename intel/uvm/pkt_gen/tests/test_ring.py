@@ -0,0 +1,61 @@
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+#  simple packet generator. Ring writer is consumed while packets are
+#  generated, so it is not served from pcap cache.
+#
+#  Copyright (C) 2022 CESNET
+#  Author(s):
+#    Radek Iša <isa@cesnet.cz>
+
+from pkt_gen import run
+from ring import ring_reader, ring_writer
+import threading
+import os
+import pytest
+
+def ring_run(tmp_path, name, argv):
+    # Return (exit code, packets read by consumer)
+    file_name = str(tmp_path / name)
+    packets   = []
+    def consume():
+        reader = ring_reader(file_name, timeout=60)
+        packets.extend(data for (data, sec, usec) in reader)
+        reader.close()
+    consumer = threading.Thread(target=consume)
+    consumer.start()
+    code = run(["-f", file_name, "-w", "ring"] + argv)
+    consumer.join()
+    return (code, packets)
+
+def test_ring_cache(tmp_path, capsys):
+    argv = ["-p", "200", "-s", "1", "-e", "raw", "--cache", str(tmp_path / "cache")]
+    (code, first)  = ring_run(tmp_path, "first.ring", argv)
+    assert code == 0
+    (code, second) = ring_run(tmp_path, "second.ring", argv)
+    assert code == 0
+    # Every run generate packets again
+    assert "CACHE" not in capsys.readouterr().out
+    assert len(first) == 200
+    assert second == first
+
+@pytest.mark.parametrize("argv", [["-f", "-"], ["-f", "out.ring", "--fifo"]])
+def test_ring_stream_rejected(argv):
+    with pytest.raises(SystemExit):
+        run(argv + ["-w", "ring"])
+
+def test_ring_stale(tmp_path):
+    file_name = str(tmp_path / "stale.ring")
+    writer = ring_writer(file_name, 4096)
+    writer.write(b"old")
+    writer.close()
+    # Next producer replaces unread ring of previous run
+    writer = ring_writer(file_name, 4096)
+    reader = ring_reader(file_name, timeout=60)
+    writer.write(b"new")
+    writer.close()
+    assert [data for (data, sec, usec) in reader] == [b"new"]
+    reader.close()
+    # Consumed ring is removed, so next consumer waits for next producer
+    assert not os.path.exists(file_name)
+    with pytest.raises(TimeoutError):
+        ring_reader(file_name, timeout=0.01)
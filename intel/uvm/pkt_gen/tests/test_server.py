@@ -0,0 +1,57 @@
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+#  simple packet generator. Generator server on local UNIX socket.
+#
+#  Copyright (C) 2022 CESNET
+#  Author(s):
+#    Radek Iša <isa@cesnet.cz>
+
+from pkt_gen import client_argv
+from server import server_run, client_run
+import multiprocessing
+import signal
+import stat
+import time
+import sys
+import os
+import pytest
+
+def server_handler(argv):
+    print("ARGV " + " ".join(argv))
+    return 0
+
+def server_start(path):
+    # Output of request goes to file descriptors, not to captured output of pytest
+    sys.stdout = sys.__stdout__
+    sys.stderr = sys.__stderr__
+    server_run(path, server_handler)
+
+@pytest.fixture
+def server(tmp_path):
+    path    = str(tmp_path / "server.sock")
+    process = multiprocessing.get_context("fork").Process(target=server_start, args=(path,))
+    process.start()
+    while (not os.path.exists(path)):
+        time.sleep(0.01)
+    yield path
+    os.kill(process.pid, signal.SIGTERM)
+    process.join()
+
+@pytest.mark.parametrize("argv", [["--client", "gen.sock", "-p", "10"], ["--client=gen.sock", "-p", "10"], ["-p", "10", "--client=gen.sock"]])
+def test_client_argv(argv):
+    assert client_argv(argv) == ["-p", "10"]
+
+def test_socket_mode(server):
+    assert stat.S_IMODE(os.stat(server).st_mode) & 0o077 == 0
+
+def test_request(server, tmp_path, capsys, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert client_run(server, ["-p", "10"], False) == 0
+    assert "ARGV -p 10" in capsys.readouterr().out
+
+def test_request_cwd(server, tmp_path, capsys, monkeypatch):
+    monkeypatch.setattr(os, "getcwd", lambda : "relative")
+    assert client_run(server, ["-p", "10"], False) == 1
+    out = capsys.readouterr().out
+    assert "Invalid working directory" in out
+    assert "ARGV" not in out
@@ -0,0 +1,28 @@
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+#  simple packet generator. Packet size distribution.
+#
+#  Copyright (C) 2022 CESNET
+#  Author(s):
+#    Radek Iša <isa@cesnet.cz>
+
+from pkt_gen import generator_create, parse_alg
+import pytest
+
+@pytest.mark.parametrize("engine", ["scapy", "template", "raw"])
+def test_fixed_size(conf, engine):
+    # Headers of default configuration fit to 256 bytes, no packet is oversized
+    gen     = generator_create(None, parse_alg.rand, 600, 5, conf({"packet" : {"size" : {"type" : "fixed", "value" : 256}}}), engine)
+    lengths = [len(data) for (data, path) in gen]
+    assert gen.oversized == 0
+    assert lengths == [256] * 600
+
+@pytest.mark.parametrize("engine", ["scapy", "raw"])
+def test_truncated_not_padded(conf, engine):
+    cfg     = {"packet" : {"size" : {"type" : "fixed", "value" : 256}, "err_probability" : 50}}
+    gen     = generator_create(None, parse_alg.rand, 400, 3, conf(cfg), engine)
+    lengths = [len(data) for (data, path) in gen]
+    assert gen.truncated > 0
+    # Truncated packets are padded only to size_min
+    assert len([it for it in lengths if it < 256]) > 0
+    assert min(lengths) >= 60
@@ -0,0 +1,35 @@
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+#  simple packet generator. Template and raw engine packets are same as
+#  packets built by scapy from same protocol path and field values.
+#
+#  Copyright (C) 2022 CESNET
+#  Author(s):
+#    Radek Iša <isa@cesnet.cz>
+
+from pkt_gen import generator_create, parse_alg
+from validate import packet_validate
+import scapy.layers.l2
+import scapy.layers.inet
+import scapy.utils
+import pytest
+
+@pytest.mark.parametrize("engine", ["template", "raw"])
+@pytest.mark.parametrize("seed", [1, 2])
+def test_engine_equal_scapy(engine, seed):
+    gen = generator_create(None, parse_alg.rand, 1500, seed, None, engine)
+    gen.validate_set(1)
+    for (data, path) in gen:
+        pass
+    assert gen.validate_count == 1500
+    assert gen.validate_errors == 0
+
+def test_wrong_next_header():
+    layers = [(scapy.layers.l2.Ether, {}), (scapy.layers.inet.IP, {}), (scapy.layers.inet.TCP, {})]
+    data   = bytearray(bytes(scapy.layers.l2.Ether()/scapy.layers.inet.IP()/scapy.layers.inet.TCP()))
+    assert packet_validate(layers, data) == None
+    # IP protocol of UDP with right checksum
+    data[23] = 17
+    data[24:26] = b"\0\0"
+    data[24:26] = scapy.utils.checksum(bytes(data[14:34])).to_bytes(2, "big")
+    assert packet_validate(layers, data) != None
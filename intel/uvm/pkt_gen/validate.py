@@ -0,0 +1,90 @@
+#!/bin/python3
+
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+#  simple packet generator. Cross validation of packet build engines.
+#  Packet is dissected by scapy layer by layer (layer classes are known
+#  from generator), computed fields (lengths, checksums) and next header
+#  numbers bound by scapy (ethertype, IP protocol, IPv6 next header, ...)
+#  are cleared and same path is built again by scapy. Result has to be
+#  same as packet built by template or raw engine.
+#
+#  Copyright (C) 2022 CESNET
+#  Author(s):
+#    Radek Iša <isa@cesnet.cz>
+
+import scapy.packet
+
+# Fields computed by scapy during build
+VALIDATE_AUTO = {"IP" : ("ihl", "len", "chksum"), "IPv6" : ("plen",), "PPPoE" : ("len",), "UDP" : ("len", "chksum"),
+                 "TCP" : ("dataofs", "chksum"), "ICMP" : ("chksum",),
+                 "ICMPv6Unknown" : ("cksum",), "SCTP" : ("chksum",)}
+
+# Next header fields. Value is computed by scapy if scapy bind layer with its payload.
+VALIDATE_NEXT = {"Ether" : ("type",), "Dot1Q" : ("type",), "Dot1AD" : ("type",), "PPP" : ("proto",), "MPLS" : ("s",),
+                 "IP" : ("proto",), "IPv6" : ("nh",), "IPv6ExtHdrHopByHop" : ("nh",), "IPv6ExtHdrRouting" : ("nh",),
+                 "IPv6ExtHdrFragment" : ("nh",), "IPv6ExtHdrDestOpt" : ("nh",)}
+
+def packet_dissect(layers, data):
+    # Return (dissected layers, offsets of layers, end of last dissected header).
+    # Raise ValueError if packet cannot be dissected.
+    data    = bytes(data)
+    offset  = 0
+    offsets = []
+    dissect = []
+    for (proto, fields) in layers:
+        name = proto.__name__
+        rest = data[offset:]
+        offsets.append(offset)
+        if (proto == scapy.packet.Raw):
+            layer = proto(rest)
+            rest  = b""
+        elif (name == "PPP"):
+            # scapy dissect one byte protocol if lowest bit of first byte is set
+            layer = proto()
+            layer.fields = {"proto" : int.from_bytes(rest[0:2], "big")}
+            rest  = rest[2:]
+        else:
+            layer = proto()
+            try:
+                rest = layer.do_dissect(rest)
+            except Exception as err:
+                raise ValueError("%s dissection: %s" % (name, err))
+        dissect.append(layer)
+        offset = len(data) - len(rest)
+    return (dissect, offsets, offset)
+
+def packet_next(layer, payload):
+    # Return next header fields of layer which scapy compute from payload (bind_layers)
+    for it in layer.aliastypes:
+        if (it in payload.overload_fields):
+            bound = payload.overload_fields[it]
+            return [name for name in VALIDATE_NEXT.get(layer.__class__.__name__, ()) if name in bound]
+    return []
+
+def packet_validate(layers, data):
+    # Return None if packet is valid or description of error.
+    data = bytes(data)
+    try:
+        (dissect, offsets, offset) = packet_dissect(layers, data)
+    except ValueError as err:
+        return str(err)
+    packet = None
+    for layer in reversed(dissect):
+        fields = dict(layer.fields)
+        for it in VALIDATE_AUTO.get(layer.__class__.__name__, ()):
+            fields[it] = None
+        if (packet != None):
+            # Next header number is taken from scapy bindings, wrong number of engine is found.
+            for it in packet_next(layer, packet):
+                fields.pop(it, None)
+        layer = layer.__class__(**fields)
+        if (packet != None):
+            layer.add_payload(packet)
+        packet = layer
+
+    if (packet != None and packet.build() != data[0:offset]):
+        return "packet built by scapy is different"
+    if (offset != len(data)):
+        return "%d bytes after last header" % (len(data) - offset)
+    return None
@@ -0,0 +1,181 @@
+#!/bin/python3
+
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+#  simple packet generator. Buffered pcap and pcapng writers.
+#  Records are packed with struct to large buffer which is written
+#  to file only when it is full or when writer is closed.
+#
+#  Copyright (C) 2022 CESNET
+#  Author(s):
+#    Radek Iša <isa@cesnet.cz>
+
+from ring import *
+import struct
+import mmap
+import os
+
+PCAP_BUFFER   = 1 << 20
+PCAP_SNAPLEN  = 65535
+PCAP_LINKTYPE = 1 # Ethernet
+
+PCAP_HEADER   = struct.Struct("=IHHiIII")
+PCAP_RECORD   = struct.Struct("=IIII")
+
+PCAPNG_SHB    = struct.Struct("=IIIHHqI")
+PCAPNG_IDB    = struct.Struct("=IIHHII")
+PCAPNG_EPB    = struct.Struct("=IIIIIII")
+PCAPNG_LEN    = struct.Struct("=I")
+
+
+class pcap_writer:
+    def __init__(self, file_name, buffer_size = PCAP_BUFFER):
+        self.file        = open(file_name, "wb", buffering=0)
+        self.buffer_size = buffer_size
+        self.buf         = bytearray()
+        self.written     = 0
+        self.header()
+
+    def header(self):
+        self.buf += PCAP_HEADER.pack(0xa1b2c3d4, 2, 4, 0, 0, PCAP_SNAPLEN, PCAP_LINKTYPE)
+
+    def write(self, data, sec = 0, usec = 0):
+        self.buf += PCAP_RECORD.pack(sec, usec, len(data), len(data))
+        self.buf += data
+        if (len(self.buf) >= self.buffer_size):
+            self.flush()
+
+    def position(self):
+        # File offset of next record
+        return self.written + len(self.buf)
+
+    def flush(self):
+        if (len(self.buf) > 0):
+            self.file.write(self.buf)
+            self.written += len(self.buf)
+            self.buf.clear()
+
+    def close(self):
+        if (self.file != None):
+            try:
+                self.flush()
+            finally:
+                self.file.close()
+                self.file = None
+
+
+class pcapng_writer(pcap_writer):
+    def header(self):
+        # Section header block
+        self.buf += PCAPNG_SHB.pack(0x0a0d0d0a, PCAPNG_SHB.size, 0x1a2b3c4d, 1, 0, -1, PCAPNG_SHB.size)
+        # Interface description block. Default timestamp resolution is microseconds.
+        self.buf += PCAPNG_IDB.pack(0x00000001, PCAPNG_IDB.size, PCAP_LINKTYPE, 0, PCAP_SNAPLEN, PCAPNG_IDB.size)
+
+    def write(self, data, sec = 0, usec = 0):
+        pad   = (-len(data)) % 4
+        size  = PCAPNG_EPB.size + len(data) + pad + 4
+        stamp = sec * 1000000 + usec
+        # Enhanced packet block
+        self.buf += PCAPNG_EPB.pack(0x00000006, size, 0, stamp >> 32, stamp & 0xffffffff, len(data), len(data))
+        self.buf += data
+        self.buf += b"\0" * pad
+        self.buf += PCAPNG_LEN.pack(size)
+        if (len(self.buf) >= self.buffer_size):
+            self.flush()
+
+
+class pcap_mmap_writer:
+    # Pcap file is preallocated and memory mapped. Records are copied
+    # directly to mapped memory. File is enlarged when it is full and
+    # truncated to real size on close.
+    def __init__(self, file_name, size = 64 * PCAP_BUFFER):
+        self.file   = open(file_name, "w+b")
+        self.size   = 0
+        self.offset = 0
+        self.mem    = None
+        self.resize(size)
+        self.put(PCAP_HEADER.pack(0xa1b2c3d4, 2, 4, 0, 0, PCAP_SNAPLEN, PCAP_LINKTYPE))
+
+    def resize(self, size):
+        if (self.mem != None):
+            self.mem.close()
+        self.size = size
+        os.ftruncate(self.file.fileno(), size)
+        self.mem  = mmap.mmap(self.file.fileno(), size)
+
+    def put(self, data):
+        end = self.offset + len(data)
+        if (end > self.size):
+            self.resize(max(2*self.size, end))
+        self.mem[self.offset:end] = data
+        self.offset = end
+
+    def write(self, data, sec = 0, usec = 0):
+        end = self.offset + PCAP_RECORD.size + len(data)
+        if (end > self.size):
+            self.resize(max(2*self.size, end))
+        PCAP_RECORD.pack_into(self.mem, self.offset, sec, usec, len(data), len(data))
+        self.mem[self.offset + PCAP_RECORD.size:end] = data
+        self.offset = end
+
+    def position(self):
+        return self.offset
+
+    def flush(self):
+        self.mem.flush()
+
+    def close(self):
+        if (self.file != None):
+            self.mem.close()
+            self.mem = None
+            os.ftruncate(self.file.fileno(), self.offset)
+            self.file.close()
+            self.file = None
+
+
+class pcap_scapy_writer:
+    # Original writer. Flush and sync after every packet.
+    def __init__(self, file_name):
+        import scapy.utils
+        self.file = scapy.utils.PcapWriter(file_name, append=False, sync=True, linktype=PCAP_LINKTYPE)
+
+    def write(self, data, sec = 0, usec = 0):
+        if (not self.file.header_present):
+            self.file.write_header(data)
+        self.file.write_packet(data, sec=sec, usec=usec)
+
+    def position(self):
+        # Header is written with first packet
+        if (not self.file.header_present):
+            return PCAP_HEADER.size
+        return self.file.f.tell()
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+PCAP_WRITERS = {"pcap" : pcap_writer, "pcapng" : pcapng_writer, "mmap" : pcap_mmap_writer, "scapy" : pcap_scapy_writer}
+# Ring is not pcap file, it needs consumer which reads packets while they are written
+WRITERS      = list(PCAP_WRITERS) + ["ring"]
+
+def pcap_writer_create(file_name, writer = "pcap", fifo = False, ring_size = RING_SIZE):
+    if (writer == "ring"):
+        if (file_name == "-" or fifo):
+            raise ValueError("Ring writer cannot write to named pipe or standard output")
+        return ring_writer(file_name, ring_size)
+    if (file_name == "-"):
+        # Standard output behave as named pipe
+        file_name = os.dup(1)
+        fifo      = True
+        if (writer == "scapy"):
+            file_name = os.fdopen(file_name, "wb")
+    if (fifo):
+        if (writer == "mmap"):
+            raise ValueError("Memory mapped writer cannot write to named pipe")
+        if (writer != "scapy"):
+            # Do not hold packets in memory longer than reader can consume them.
+            return PCAP_WRITERS[writer](file_name, buffer_size = 1 << 16)
+    return PCAP_WRITERS[writer](file_name)